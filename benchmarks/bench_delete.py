@@ -0,0 +1,106 @@
+"""Deletion backend benchmark: delete_tree vs shutil.rmtree.
+
+Each case generates the same tree twice and removes one copy with
+``shutil.rmtree(ignore_errors=True)`` (the old safe_rmtree) and the other
+with ``delete_tree``. When not running as root a read-only folder is added so
+the error accounting shows up in the results.
+
+    python benchmarks/bench_delete.py --files 20000 50000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from treegen import make_temp_like, make_tree  # noqa: E402
+from fixer import DeleteStats, delete_tree  # noqa: E402
+
+CAN_LOCK = hasattr(os, "geteuid") and os.geteuid() != 0
+
+
+def _build(root: str, shape: str, files: int):
+    if shape == "temp":
+        n = make_temp_like(root, files)
+    else:
+        n = make_tree(root, max(1, files // 20), 20)
+    locked = None
+    if CAN_LOCK:
+        locked = os.path.join(root, "locked")
+        os.makedirs(os.path.join(locked, "sub"))
+        for i in range(5):
+            open(os.path.join(locked, "sub", f"f{i}"), "wb").close()
+        os.chmod(locked, stat.S_IRUSR | stat.S_IXUSR)
+    return n, locked
+
+
+def _unlock(locked):
+    if locked and os.path.exists(locked):
+        os.chmod(locked, stat.S_IRWXU)
+
+
+def run_case(shape: str, files: int):
+    out = {"shape": shape, "files": files}
+    for backend in ("shutil_rmtree", "delete_tree"):
+        base = tempfile.mkdtemp(prefix="wf_del_")
+        try:
+            n, locked = _build(base, shape, files)
+            t0 = time.perf_counter()
+            if backend == "shutil_rmtree":
+                for name in os.listdir(base):
+                    path = os.path.join(base, name)
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.remove(path)
+                secs = time.perf_counter() - t0
+                out[backend] = {"secs": round(secs, 3), "files_per_sec": int(n / secs), "errors": "not reported"}
+            else:
+                st = DeleteStats()
+                for name in os.listdir(base):
+                    delete_tree(os.path.join(base, name), st)
+                secs = time.perf_counter() - t0
+                out[backend] = {
+                    "secs": round(secs, 3),
+                    "files_per_sec": int(n / secs),
+                    "removed": st.removed,
+                    "failed": st.failed,
+                    "errors": st.errors,
+                    "top_offenders": st.top_offenders(3),
+                }
+        finally:
+            _unlock(locked)
+            shutil.rmtree(base, ignore_errors=True)
+    out["speedup"] = round(out["shutil_rmtree"]["secs"] / max(1e-9, out["delete_tree"]["secs"]), 2)
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--files", type=int, nargs="+", default=[20000])
+    ap.add_argument("--shapes", nargs="+", default=["temp", "deep"], choices=["temp", "deep"])
+    ap.add_argument("--out", help="write JSON results here as well")
+    args = ap.parse_args(argv)
+
+    doc = {
+        "benchmark": "delete",
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "error_case": CAN_LOCK,
+        "cases": [run_case(shape, n) for shape in args.shapes for n in args.files],
+    }
+    text = json.dumps(doc, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Space analysis scanner benchmark.
+
+Builds synthetic trees with the same folder layout but a growing number of
+files per folder, then runs ``scan_space`` on each. Peak Python memory must
+track the folder count, not the file count: the run fails (exit 1) when the
+largest case peaks more than ``--max-growth`` times above the smallest.
+
+    python benchmarks/bench_space_scan.py --dirs 2000 --files-per-dir 10 50 250
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from treegen import make_tree  # noqa: E402
+from fixer import scan_space  # noqa: E402
+
+
+def run_case(dirs: int, files_per_dir: int, workers):
+    root = tempfile.mkdtemp(prefix="wf_space_")
+    try:
+        t0 = time.perf_counter()
+        files = make_tree(root, dirs, files_per_dir)
+        gen_secs = time.perf_counter() - t0
+
+        cache = {}
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        tree = scan_space([root], cache=cache, max_workers=workers)
+        cold = time.perf_counter() - t0
+        _cur, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        t0 = time.perf_counter()
+        tree2 = scan_space([root], cache=cache, max_workers=workers)
+        warm = time.perf_counter() - t0
+
+        r = tree.roots[0]
+        assert tree.total_files[r] == files, (tree.total_files[r], files)
+        assert tree2.total_files[tree2.roots[0]] == files
+        return {
+            "dirs": dirs,
+            "files": files,
+            "generate_secs": round(gen_secs, 3),
+            "cold_secs": round(cold, 3),
+            "incremental_secs": round(warm, 3),
+            "files_per_sec": int(files / cold) if cold else None,
+            "peak_bytes": peak,
+            "peak_bytes_per_dir": round(peak / max(1, len(tree)), 1),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--dirs", type=int, default=2000)
+    ap.add_argument("--files-per-dir", type=int, nargs="+", default=[10, 50, 250])
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--max-growth", type=float, default=1.5, help="allowed peak memory ratio, largest/smallest case")
+    ap.add_argument("--out", help="write JSON results here instead of stdout")
+    args = ap.parse_args(argv)
+
+    results = {
+        "benchmark": "space_scan",
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "cases": [run_case(args.dirs, n, args.workers) for n in sorted(args.files_per_dir)],
+    }
+    peaks = [c["peak_bytes"] for c in results["cases"]]
+    results["peak_growth"] = round(peaks[-1] / max(1, peaks[0]), 2)
+    results["flat_ok"] = results["peak_growth"] <= args.max_growth
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 0 if results["flat_ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Stand-ins for DISM / SFC used by the benchmarks.
+
+    python fake_commands.py noisy --lines 200000   # DISM-style flood of progress lines
+    python fake_commands.py quiet --secs 2         # long silence, a few lines (SFC)
+    python fake_commands.py hanging                # one line, then never exits or writes
+    python fake_commands.py replay --file t.txt    # print a recorded transcript
+"""
+
+import argparse
+import sys
+import time
+
+
+def noisy(lines: int):
+    out = sys.stdout
+    for i in range(lines):
+        out.write(f"[{'=' * (i % 50):<50}] {i * 100 // max(1, lines)}.0% line {i}\n")
+    out.flush()
+
+
+def quiet(secs: float):
+    print("Beginning system scan.  This process will take some time.", flush=True)
+    time.sleep(secs)
+    print("Windows Resource Protection did not find any integrity violations.", flush=True)
+
+
+def hanging():
+    print("Beginning verification phase of system scan.", flush=True)
+    while True:
+        time.sleep(3600)
+
+
+def replay(path: str, secs: float):
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    for line in lines:
+        print(line, flush=True)
+        time.sleep(secs / max(1, len(lines)))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("mode", choices=["noisy", "quiet", "hanging", "replay"])
+    ap.add_argument("--lines", type=int, default=100000)
+    ap.add_argument("--secs", type=float, default=1.0)
+    ap.add_argument("--file")
+    args = ap.parse_args(argv)
+    if args.mode == "noisy":
+        noisy(args.lines)
+    elif args.mode == "quiet":
+        quiet(args.secs)
+    elif args.mode == "replay":
+        replay(args.file, args.secs)
+    else:
+        hanging()
+
+
+if __name__ == "__main__":
+    main()
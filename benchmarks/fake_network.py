@@ -0,0 +1,91 @@
+"""Local stand-ins for a DNS server and a TCP service, for the network probes.
+
+The DNS responder answers every A query with 127.0.0.1 after ``--dns-delay``
+milliseconds (names under "fail." get SERVFAIL); the TCP listener accepts and
+closes connections.
+
+    python fake_network.py --dns-delay 20          # prints the two addresses, serves until Ctrl+C
+"""
+
+import argparse
+import socket
+import struct
+import threading
+import time
+
+
+class FakeNetwork:
+    def __init__(self, dns_delay_ms: float = 0.0, host: str = "127.0.0.1"):
+        self.dns_delay = dns_delay_ms / 1000.0
+        self.queries = 0
+        self._udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._udp.bind((host, 0))
+        self._tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._tcp.bind((host, 0))
+        self._tcp.listen(64)
+        # set here, not in the serving threads: stop() may close the sockets before they run
+        self._udp.settimeout(0.2)
+        self._tcp.settimeout(0.2)
+        self._stop = threading.Event()
+        self.dns_addr = "%s:%d" % self._udp.getsockname()
+        self.tcp_addr = "%s:%d" % self._tcp.getsockname()
+
+    def _answer(self, query: bytes) -> bytes:
+        qid, _flags = struct.unpack(">HH", query[:4])
+        end = query.index(b"\0", 12) + 5
+        question = query[12:end]
+        name = question[1:].split(b"\0")[0]
+        if name.startswith(b"fail"):
+            return struct.pack(">HHHHHH", qid, 0x8182, 1, 0, 0, 0) + question
+        answer = b"\xc0\x0c" + struct.pack(">HHIH", 1, 1, 60, 4) + socket.inet_aton("127.0.0.1")
+        return struct.pack(">HHHHHH", qid, 0x8180, 1, 1, 0, 0) + question + answer
+
+    def _serve_dns(self):
+        while not self._stop.is_set():
+            try:
+                data, addr = self._udp.recvfrom(512)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self.queries += 1
+            if self.dns_delay:
+                time.sleep(self.dns_delay)
+            self._udp.sendto(self._answer(data), addr)
+
+    def _serve_tcp(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._tcp.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            conn.close()
+
+    def start(self):
+        for fn in (self._serve_dns, self._serve_tcp):
+            threading.Thread(target=fn, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._udp.close()
+        self._tcp.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--dns-delay", type=float, default=0.0, help="milliseconds before each DNS answer")
+    args = ap.parse_args(argv)
+    net = FakeNetwork(args.dns_delay).start()
+    print(f"dns {net.dns_addr}\ntcp {net.tcp_addr}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        net.stop()
+
+
+if __name__ == "__main__":
+    main()
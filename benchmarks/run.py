@@ -0,0 +1,370 @@
+"""Benchmark suite for the step pipeline, cleanup engine and log path.
+
+Runs on Linux or Windows without admin rights: DISM/SFC are replaced by
+``fake_commands.py`` and cleanup runs against generated trees in a temp dir.
+
+    python benchmarks/run.py                       # all cases, writes benchmarks/results/<stamp>.json
+    python benchmarks/run.py --only cmd cancel     # case name prefixes
+    python benchmarks/run.py --quick --compare benchmarks/results/old.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from fake_network import FakeNetwork  # noqa: E402
+from treegen import make_temp_like  # noqa: E402
+import fixer  # noqa: E402
+import windows_fixer as wf  # noqa: E402  (GUI side: App, LineStore)
+
+FAKE = os.path.join(HERE, "fake_commands.py")
+TRANSCRIPTS = os.path.join(HERE, "transcripts")
+
+
+def fake_cmd(mode: str, *args):
+    return [sys.executable, FAKE, mode, *map(str, args)]
+
+
+class CountingSink:
+    def __init__(self):
+        self.lines = 0
+        self.first_line = threading.Event()
+
+    def __call__(self, msg):
+        self.lines += 1
+        self.first_line.set()
+
+
+# ---------- cases ----------
+def bench_cmd_noisy(scale):
+    lines = int(200000 * scale)
+    sink = CountingSink()
+    runner = fixer.CommandRunner(sink)
+    t0 = time.perf_counter()
+    result = runner.run_cmd(fake_cmd("noisy", "--lines", lines))
+    secs = time.perf_counter() - t0
+    return {"result": result, "lines": lines, "secs": round(secs, 3), "lines_per_sec": int(lines / secs)}
+
+
+def bench_cmd_quiet(scale):
+    sleep = 0.5
+    runner = fixer.CommandRunner(CountingSink())
+    t0 = time.perf_counter()
+    result = runner.run_cmd(fake_cmd("quiet", "--secs", sleep))
+    secs = time.perf_counter() - t0
+    return {"result": result, "secs": round(secs, 3), "overhead_ms": round((secs - sleep) * 1000, 1)}
+
+
+class _FakeLogView:
+    """LogView without Tk: the store is real, drawing is skipped."""
+
+    def __init__(self):
+        self.store = wf.LineStore()
+
+    def append_many(self, rows):
+        for msg, sev in rows:
+            self.store.append(msg, sev)
+
+
+def bench_log_sink(scale):
+    """Drive App.flush_log_queue headlessly into a LineStore."""
+    lines = int(500000 * scale)
+    bus = fixer.EventBus()
+    fake = SimpleNamespace(
+        engine=SimpleNamespace(bus=bus),
+        events=bus.subscribe(max_events=lines + 1),
+        log_view=_FakeLogView(),
+        after=lambda *a: None,
+    )
+    fake.enqueue_log = lambda msg: wf.App.enqueue_log(fake, msg)
+    fake.flush_log_queue = lambda: None
+
+    t0 = time.perf_counter()
+    for i in range(lines):
+        fake.enqueue_log(f"[INFO] progress line {i}")
+    produce = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    wf.App.flush_log_queue(fake)
+    drain = time.perf_counter() - t0
+    return {
+        "lines": lines,
+        "enqueue_per_sec": int(lines / produce),
+        "drain_per_sec": int(lines / drain),
+        "drain_secs": round(drain, 3),
+    }
+
+
+def bench_event_bus(scale):
+    """A producer publishing to a fast pull subscriber and a stalled callback subscriber."""
+    lines = int(500000 * scale)
+    bus = fixer.EventBus()
+    fast = bus.subscribe(max_lines=lines + 1)
+    stall = threading.Event()
+    slow = bus.subscribe(lambda batch: stall.wait(5), max_events=100, max_lines=1000)
+    t0 = time.perf_counter()
+    for i in range(lines):
+        bus.publish_output(f"line {i}")
+        if i % 100 == 0:
+            bus.publish(fixer.Progress("step", i / lines))
+    produce = time.perf_counter() - t0
+    fast_events = fast.drain()
+    got = sum(len(ev.lines) for ev in fast_events if type(ev) is fixer.OutputChunk)
+    slow_dropped = slow.dropped
+    stall.set()
+    slow.close()
+    return {
+        "lines": lines,
+        "publish_per_sec": int(lines / produce),
+        "fast_lines": got,
+        "fast_progress_events": sum(1 for ev in fast_events if type(ev) is fixer.Progress),
+        "slow_dropped": slow_dropped,
+        "no_loss_fast": got == lines,
+    }
+
+
+def bench_log_window(scale):
+    """Cost of fetching one screen of lines (what LogView draws) vs store size."""
+    out = {}
+    store = wf.LineStore()
+    for size in (50, int(5000000 * scale)):
+        store.clear()
+        for i in range(size):
+            warn = i % 7 == 0
+            store.append(f"[{'WARN' if warn else 'INFO'}] line {i} of the log", wf.SEV_WARN if warn else wf.SEV_INFO)
+        samples = []
+        for top in (0, size // 2, max(0, size - 40)) * 100:
+            t0 = time.perf_counter()
+            store.window(top, top + 40)
+            samples.append(time.perf_counter() - t0)
+        out[f"window_us_{size}"] = round(statistics.median(samples) * 1e6, 1)
+    return out
+
+
+def _latency(cmd, action, ready, repeat=3):
+    samples = []
+    for _ in range(repeat):
+        sink = CountingSink()
+        runner = fixer.CommandRunner(sink)
+        out = {}
+        th = threading.Thread(target=lambda: out.setdefault("r", runner.run_cmd(cmd)))
+        th.start()
+        # wait for the child to be up and producing
+        sink.first_line.wait(10)
+        while sink.lines < ready:
+            time.sleep(0.001)
+        t0 = time.perf_counter()
+        getattr(runner, action)()
+        th.join(30)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {
+        "result": out.get("r"),
+        "median_ms": round(statistics.median(samples), 1),
+        "max_ms": round(max(samples), 1),
+    }
+
+
+def bench_cancel_hanging(scale):
+    # 2 = the RUN banner plus the command's first line
+    return _latency(fake_cmd("hanging"), "request_cancel_all", ready=2)
+
+
+def bench_skip_noisy(scale):
+    return _latency(fake_cmd("noisy", "--lines", 5000000), "request_skip_step", ready=1000)
+
+
+def bench_cleanup(scale):
+    files = int(20000 * scale)
+    root = tempfile.mkdtemp(prefix="wf_clean_")
+    try:
+        t0 = time.perf_counter()
+        made = make_temp_like(root, files)
+        gen = time.perf_counter() - t0
+
+        target = fixer.CleanupTarget("bench", [root])
+        t0 = time.perf_counter()
+        plan = fixer.scan_cleanup_targets([target], lambda: False)
+        scan = time.perf_counter() - t0
+        found = sum(size for _, size in plan["bench"])
+
+        t0 = time.perf_counter()
+        freed = fixer.run_cleanup_targets([target], lambda m: None, lambda: False)
+        total = time.perf_counter() - t0
+        return {
+            "files": made,
+            "bytes": found,
+            "generate_secs": round(gen, 3),
+            "scan_secs": round(scan, 3),
+            "clean_secs": round(total, 3),
+            "files_per_sec": int(made / total),
+            "freed_ok": freed == found,
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_network_probe(scale):
+    """Before/after probes against the local stand-in; the "repair" cuts DNS delay."""
+    net = FakeNetwork(dns_delay_ms=20).start()
+    try:
+        names = [f"host{i}.test" for i in range(max(2, int(8 * scale)))]
+        tcp = [net.tcp_addr] * 2
+        before = fixer.measure_network(names, tcp, dns_server=net.dns_addr, samples=3)
+        net.dns_delay = 0.002
+        after = fixer.measure_network(names, tcp, dns_server=net.dns_addr, samples=3)
+        rows = fixer.network_deltas(before, after)
+        dns = [r["delta_ms"] for r in rows if r["kind"] == "dns"]
+        return {
+            "targets": len(names) + len(tcp),
+            "before_secs": before["secs"],
+            "after_secs": after["secs"],
+            "dns_delta_ms_median": round(statistics.median(dns), 2),
+            "queries": net.queries,
+            "all_ok": all(not r["after_fail"] for r in rows),
+        }
+    finally:
+        net.stop()
+
+
+def bench_component_analyze(scale):
+    """Replay recorded /AnalyzeComponentStore transcripts through CommandRunner and the parser."""
+    with open(os.path.join(TRANSCRIPTS, "expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    mismatches = []
+    parse_secs = 0.0
+    for name, want in expected.items():
+        if name.startswith("_"):
+            continue
+        lines = []
+        fixer.CommandRunner(lines.append).run_cmd(fake_cmd("replay", "--file", os.path.join(TRANSCRIPTS, name), "--secs", 0))
+        t0 = time.perf_counter()
+        info = fixer.parse_component_store(lines)
+        parse_secs += time.perf_counter() - t0
+        run, _ = fixer.component_cleanup_decision(info, 500 * 1024 * 1024)
+        got = {"parsed": info is not None, "run": run}
+        if info:
+            got.update(
+                recommended=info.get("recommended"),
+                reclaimable_packages=info.get("reclaimable_packages"),
+                reclaimable_mb=round(info["reclaimable"] / 1024**2, 1),
+            )
+        if any(got.get(k) != v for k, v in want.items()):
+            mismatches.append({"transcript": name, "expected": want, "got": got})
+    return {
+        "transcripts": sum(1 for k in expected if not k.startswith("_")),
+        "parse_us": round(parse_secs * 1e6, 1),
+        "all_ok": not mismatches,
+        "mismatches": mismatches,
+    }
+
+
+CASES = {
+    "cmd_noisy": bench_cmd_noisy,
+    "cmd_quiet": bench_cmd_quiet,
+    "log_sink": bench_log_sink,
+    "event_bus": bench_event_bus,
+    "log_window": bench_log_window,
+    "cancel_hanging": bench_cancel_hanging,
+    "skip_noisy": bench_skip_noisy,
+    "cleanup": bench_cleanup,
+    "network_probe": bench_network_probe,
+    "component_analyze": bench_component_analyze,
+}
+
+
+# ---------- results ----------
+def _git_rev():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(old: dict, new: dict):
+    print(f"{'case.metric':<40}{'old':>14}{'new':>14}{'change':>10}")
+    for case, res in new["results"].items():
+        prev = old.get("results", {}).get(case) or {}
+        for k, v in res.items():
+            pv = prev.get(k)
+            if isinstance(v, bool) or not isinstance(v, (int, float)) or not isinstance(pv, (int, float)):
+                continue
+            change = f"{(v - pv) * 100 / pv:+.1f}%" if pv else "-"
+            print(f"{case + '.' + k:<40}{pv:>14}{v:>14}{change:>10}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--only", nargs="*", help="run cases whose name starts with one of these")
+    ap.add_argument("--quick", action="store_true", help="smaller inputs")
+    ap.add_argument("--scale", type=int, default=1)
+    ap.add_argument("--out", help="result file (default: benchmarks/results/<timestamp>.json)")
+    ap.add_argument("--compare", help="previous result file to diff against")
+    ap.add_argument("--profile", action="store_true", help="enable PROFILER and include its snapshot")
+    args = ap.parse_args(argv)
+
+    scale = args.scale
+    fixer.PROFILER.enabled = args.profile
+    results = {}
+    for name, fn in CASES.items():
+        if args.only and not any(name.startswith(p) for p in args.only):
+            continue
+        print(f"running {name}...", file=sys.stderr)
+        if args.quick:
+            # Same code paths, a tenth of the work.
+            results[name] = fn(scale / 10)
+        else:
+            results[name] = fn(scale)
+
+    doc = {
+        "suite": "windows_fixer",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_rev": _git_rev(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "cpu_count": os.cpu_count(),
+        "quick": args.quick,
+        "scale": scale,
+        "results": results,
+    }
+    if args.profile:
+        doc["profiler"] = fixer.PROFILER.snapshot()
+
+    out = args.out
+    if not out:
+        folder = os.path.join(HERE, "results")
+        os.makedirs(folder, exist_ok=True)
+        out = os.path.join(folder, datetime.now().strftime("%Y%m%d-%H%M%S.json"))
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(json.dumps(doc, indent=2))
+    print(f"results written to {out}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), doc)
+
+    # correctness checks inside the cases fail the run, not just the numbers
+    failed = [name for name, res in results.items() if False in (res.get("all_ok"), res.get("freed_ok"))]
+    if failed:
+        print(f"checks failed: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
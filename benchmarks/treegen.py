@@ -0,0 +1,57 @@
+"""Synthetic temp-tree generators for the cleanup and scan benchmarks."""
+
+import os
+import random
+
+
+def make_tree(root: str, dirs: int, files_per_dir: int, fanout: int = 8, file_size: int = 0):
+    """Create ``dirs`` folders (``fanout`` children each) holding ``files_per_dir`` files.
+
+    Returns the number of files created.
+    """
+    paths = [root]
+    made = 0
+    i = 0
+    payload = b"x" * file_size
+    while made < dirs:
+        parent = paths[i]
+        i += 1
+        for c in range(fanout):
+            if made >= dirs:
+                break
+            d = os.path.join(parent, f"d{c}")
+            os.mkdir(d)
+            paths.append(d)
+            made += 1
+            for f in range(files_per_dir):
+                with open(os.path.join(d, f"f{f}.bin"), "wb") as fh:
+                    fh.write(payload)
+    return dirs * files_per_dir
+
+
+def make_temp_like(root: str, files: int, seed: int = 1):
+    """A %TEMP%-like mix: many small flat files, installer folders, a few big blobs.
+
+    Returns the number of files created.
+    """
+    rnd = random.Random(seed)
+    made = 0
+    flat = files // 2
+    for i in range(flat):
+        with open(os.path.join(root, f"tmp{i:06d}.tmp"), "wb") as fh:
+            fh.write(b"t" * rnd.choice((0, 64, 512, 4096)))
+    made += flat
+
+    rest = files - flat
+    folder = 0
+    while rest > 0:
+        d = os.path.join(root, f"{{{folder:08x}-installer}}", "payload", "cab")
+        os.makedirs(d)
+        n = min(rest, rnd.randint(20, 200))
+        for i in range(n):
+            with open(os.path.join(d, f"part{i}.dat"), "wb") as fh:
+                fh.write(b"p" * rnd.choice((128, 2048, 16384)))
+        rest -= n
+        made += n
+        folder += 1
+    return made
@@ -0,0 +1,96 @@
+"""Windows Fixer's step engine, importable without Tk or Windows-only modules.
+
+The GUI (windows_fixer.py), the command line (``python -m fixer``), the fleet
+agent and the benchmarks all drive it the same way::
+
+    from fixer import StepEngine, StubCommandRunner
+
+    engine = StepEngine(print, runner_cls=StubCommandRunner, dry_run=True)
+    steps = engine.build_steps({"sfc": True})   # list[Step]
+    status = engine.run(steps)                  # "ok" / "cancel" / "error"
+    engine.results                              # list[StepResult]
+
+Progress, output and log messages are typed events on ``engine.bus``;
+``engine.bus.subscribe(callback)`` attaches another consumer.
+
+Windows APIs (ctypes.windll, winreg) are only looked up inside the functions
+that need them, so everything here imports on Linux.
+"""
+
+from .background import BackgroundMode
+from .cleanup import (
+    CLEANUP_TARGETS,
+    CleanupTarget,
+    DeleteStats,
+    delete_tree,
+    format_bytes,
+    run_cleanup_targets,
+    scan_cleanup_targets,
+    scan_space,
+)
+from .component_store import component_cleanup_decision, parse_component_store
+from .engine import DEFAULT_PROFILE, Step, StepEngine, StepResult, StepStatus, normalize_profile
+from .events import (
+    BytesFreed,
+    Dropped,
+    EventBus,
+    LogLine,
+    OutputChunk,
+    Progress,
+    RunFinished,
+    StepFinished,
+    StepStarted,
+    Subscription,
+    WarningLogged,
+    text_sink,
+)
+from .i18n import Catalog
+from .meta import APP_ID, APP_VERSION
+from .network import measure_network, network_deltas
+from .profiling import PROFILER
+from .report import build_run_report, write_run_report
+from .runner import CommandRunner, StubCommandRunner
+from .scheduler import Scheduler
+
+__all__ = [
+    "APP_ID",
+    "APP_VERSION",
+    "BackgroundMode",
+    "BytesFreed",
+    "CLEANUP_TARGETS",
+    "Catalog",
+    "CleanupTarget",
+    "CommandRunner",
+    "DEFAULT_PROFILE",
+    "DeleteStats",
+    "Dropped",
+    "EventBus",
+    "LogLine",
+    "OutputChunk",
+    "PROFILER",
+    "Progress",
+    "RunFinished",
+    "Scheduler",
+    "Step",
+    "StepEngine",
+    "StepFinished",
+    "StepResult",
+    "StepStarted",
+    "StepStatus",
+    "StubCommandRunner",
+    "Subscription",
+    "WarningLogged",
+    "build_run_report",
+    "component_cleanup_decision",
+    "delete_tree",
+    "format_bytes",
+    "measure_network",
+    "network_deltas",
+    "normalize_profile",
+    "parse_component_store",
+    "run_cleanup_targets",
+    "scan_cleanup_targets",
+    "scan_space",
+    "text_sink",
+    "write_run_report",
+]
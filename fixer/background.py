@@ -0,0 +1,370 @@
+"""Background mode: low priority, throttling and load-based pausing."""
+
+import os
+import sys
+import time
+import ctypes
+import threading
+import contextlib
+
+
+BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+THREAD_MODE_BACKGROUND_END = 0x00020000
+PROCESS_IO_PRIORITY = 33  # ProcessIoPriority for NtSetInformationProcess
+IO_PRIORITY_LOW = 1
+BACKGROUND_NICE = 10
+
+
+class _PdhFmtValue(ctypes.Structure):
+    _fields_ = [("CStatus", ctypes.c_ulong), ("doubleValue", ctypes.c_double)]
+
+
+def _cpu_times():
+    """(idle, total) cumulative CPU time, or None when unavailable."""
+    if os.name == "nt":
+        idle, kernel, user = (ctypes.c_ulonglong() for _ in range(3))
+        if not ctypes.windll.kernel32.GetSystemTimes(ctypes.byref(idle), ctypes.byref(kernel), ctypes.byref(user)):
+            return None
+        # kernel time includes idle time
+        return idle.value, kernel.value + user.value
+    try:
+        with open("/proc/stat", "r", encoding="ascii") as f:
+            fields = [int(x) for x in f.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    return fields[3] + (fields[4] if len(fields) > 4 else 0), sum(fields[:8])
+
+
+def _disk_busy_ms():
+    """{disk: cumulative milliseconds spent doing I/O} (Linux /proc/diskstats)."""
+    out = {}
+    try:
+        with open("/proc/diskstats", "r", encoding="ascii") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) > 12 and os.path.exists(f"/sys/block/{parts[2]}/device"):
+                    out[parts[2]] = int(parts[12])
+    except (OSError, ValueError):
+        pass
+    return out
+
+
+class LoadMonitor:
+    """CPU and disk busy percentages, measured between consecutive samples.
+
+    Windows reads CPU from GetSystemTimes and disk from the PDH
+    ``PhysicalDisk(_Total)\\% Idle Time`` counter; Linux reads /proc.
+    """
+
+    def __init__(self, interval: float = 1.0, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self._cpu = _cpu_times()
+        self._disk = None if os.name == "nt" else _disk_busy_ms()
+        self._at = clock()
+        self._last = (0.0, 0.0)
+        self._pdh = None
+        if os.name == "nt":
+            self._open_pdh()
+
+    def _open_pdh(self):
+        try:
+            pdh = ctypes.windll.pdh
+            query, counter = ctypes.c_void_p(), ctypes.c_void_p()
+            if pdh.PdhOpenQueryW(None, 0, ctypes.byref(query)):
+                return
+            if pdh.PdhAddEnglishCounterW(query, r"\PhysicalDisk(_Total)\% Idle Time", 0, ctypes.byref(counter)):
+                pdh.PdhCloseQuery(query)
+                return
+            pdh.PdhCollectQueryData(query)
+            self._pdh = (pdh, query, counter)
+        except (AttributeError, OSError):
+            self._pdh = None
+
+    def _pdh_disk_busy(self) -> float:
+        pdh, query, counter = self._pdh
+        val = _PdhFmtValue()
+        if pdh.PdhCollectQueryData(query) or pdh.PdhGetFormattedCounterValue(counter, 0x200, None, ctypes.byref(val)):
+            return 0.0
+        return max(0.0, min(100.0, 100.0 - val.doubleValue))
+
+    def sample(self):
+        """(cpu %, disk %) since the previous sample; cached for ``interval``."""
+        now = self.clock()
+        elapsed = now - self._at
+        if elapsed < self.interval:
+            return self._last
+        cpu_pct = 0.0
+        cpu = _cpu_times()
+        if cpu and self._cpu and cpu[1] > self._cpu[1]:
+            cpu_pct = 100.0 * (1 - (cpu[0] - self._cpu[0]) / (cpu[1] - self._cpu[1]))
+        self._cpu = cpu
+
+        disk_pct = 0.0
+        if self._pdh:
+            disk_pct = self._pdh_disk_busy()
+        elif self._disk is not None:
+            disk = _disk_busy_ms()
+            deltas = [disk[k] - self._disk[k] for k in disk if k in self._disk]
+            if deltas:
+                disk_pct = min(100.0, max(deltas) / (elapsed * 10))
+            self._disk = disk
+
+        self._at = now
+        self._last = (round(cpu_pct, 1), round(disk_pct, 1))
+        return self._last
+
+
+class BackgroundMode:
+    """Low-priority, throttled execution for machines that are in use.
+
+    Child processes start at below-normal CPU and low I/O priority (nice and
+    ionice on POSIX), the deleter is held to ``ops_per_sec`` and
+    ``mb_per_sec``, and work waits while CPU or disk is above the busy
+    thresholds. A value of 0 disables that limit.
+    """
+
+    def __init__(
+        self,
+        log_cb,
+        ops_per_sec: float = 0,
+        mb_per_sec: float = 0,
+        busy_cpu: float = 0,
+        busy_disk: float = 0,
+        monitor=None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        max_pause: float = 600,
+    ):
+        self.log_cb = log_cb
+        self.ops_per_sec = ops_per_sec
+        self.bytes_per_sec = mb_per_sec * 1024 * 1024
+        self.busy_cpu = busy_cpu
+        self.busy_disk = busy_disk
+        self.monitor = monitor if monitor is not None else (LoadMonitor() if busy_cpu or busy_disk else None)
+        self.clock = clock
+        self.sleep = sleep
+        self.max_pause = max_pause
+        self.paused_secs = 0.0
+        self.throttled_secs = 0.0
+
+    @classmethod
+    def from_profile(cls, profile: dict, log_cb):
+        return cls(
+            log_cb,
+            ops_per_sec=profile["bg_ops_per_sec"],
+            mb_per_sec=profile["bg_mb_per_sec"],
+            busy_cpu=profile["bg_busy_cpu"],
+            busy_disk=profile["bg_busy_disk"],
+        )
+
+    # ----- load -----
+    def busy_reason(self) -> str:
+        if not self.monitor:
+            return ""
+        cpu, disk = self.monitor.sample()
+        if self.busy_cpu and cpu >= self.busy_cpu:
+            return f"CPU {cpu:.0f}%"
+        if self.busy_disk and disk >= self.busy_disk:
+            return f"disk {disk:.0f}%"
+        return ""
+
+    def wait_until_idle(self, should_abort) -> float:
+        """Block while the machine is busy; returns the seconds spent paused."""
+        reason = self.busy_reason()
+        if not reason:
+            return 0.0
+        self.log_cb(f"[INFO] Background mode: machine busy ({reason}), pausing...")
+        t0 = self.clock()
+        while reason:
+            if should_abort():
+                break
+            if self.clock() - t0 >= self.max_pause:
+                self.log_cb(f"[WARN] Background mode: still busy after {self.max_pause:.0f}s, continuing.")
+                break
+            self.sleep(0.5)
+            reason = self.busy_reason()
+        secs = self.clock() - t0
+        self.paused_secs += secs
+        if not reason:
+            self.log_cb(f"[INFO] Background mode: resumed after {secs:.1f}s.")
+        return secs
+
+    # ----- deleter -----
+    def gate(self, stats, should_abort):
+        """Wrap ``should_abort`` so each call also enforces the rate limits."""
+        t0 = self.clock()
+        ops0, bytes0 = stats.removed, stats.bytes
+        paused = 0.0
+
+        def check() -> bool:
+            nonlocal paused
+            if should_abort():
+                return True
+            paused += self.wait_until_idle(should_abort)
+            need = 0.0
+            if self.ops_per_sec:
+                need = (stats.removed - ops0) / self.ops_per_sec
+            if self.bytes_per_sec:
+                need = max(need, (stats.bytes - bytes0) / self.bytes_per_sec)
+            ahead = need - (self.clock() - t0 - paused)
+            while ahead > 0:
+                if should_abort():
+                    return True
+                step = min(ahead, 0.25)
+                self.sleep(step)
+                self.throttled_secs += step
+                ahead -= step
+            return should_abort()
+
+        return check
+
+    # ----- priorities -----
+    def popen_kwargs(self) -> dict:
+        if os.name == "nt":
+            return {"creationflags": BELOW_NORMAL_PRIORITY_CLASS}
+        return {}
+
+    def lower_child(self, proc):
+        """Drop a freshly started child to low I/O priority (and nice on POSIX).
+
+        This runs in the parent after spawn: a ``preexec_fn`` is not safe
+        while other threads are running.
+        """
+        if os.name == "nt":
+            try:
+                prio = ctypes.c_ulong(IO_PRIORITY_LOW)
+                ctypes.windll.ntdll.NtSetInformationProcess(
+                    int(proc._handle), PROCESS_IO_PRIORITY, ctypes.byref(prio), ctypes.sizeof(prio)
+                )
+            except (AttributeError, OSError):
+                pass
+            return
+        _lower_posix(proc.pid)
+
+    def lower_current_thread(self):
+        """Put the calling thread at background priority; returns what ``restore_thread`` needs."""
+        if os.name == "nt":
+            try:
+                ctypes.windll.kernel32.SetThreadPriority(
+                    ctypes.windll.kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN
+                )
+            except (AttributeError, OSError):
+                pass
+            return None
+        if sys.platform.startswith("linux"):
+            # Linux applies setpriority/ioprio to a single thread id.
+            return _lower_posix(threading.get_native_id())
+        return None
+
+    def restore_thread(self, before):
+        if os.name == "nt":
+            ctypes.windll.kernel32.SetThreadPriority(
+                ctypes.windll.kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_END
+            )
+        elif before is not None:
+            tid = threading.get_native_id()
+            _set_ioprio(tid, IOPRIO_CLASS_NONE, 0)
+            if os.getpriority(os.PRIO_PROCESS, tid) != before:
+                os.setpriority(os.PRIO_PROCESS, tid, before)
+
+    @contextlib.contextmanager
+    def lowered_thread(self, restore: bool = True):
+        """Run the calling thread at background CPU and I/O priority.
+
+        Raising a Linux thread's priority back needs privileges, so an
+        unprivileged restore can be refused; that is logged. Prefer
+        ``run_lowered`` for threads that outlive the run.
+        """
+        before = self.lower_current_thread()
+        try:
+            yield self
+        finally:
+            if restore:
+                try:
+                    self.restore_thread(before)
+                except (AttributeError, OSError) as e:
+                    self.log_cb(f"[WARN] Background mode: could not restore thread priority ({e}); it stays lowered.")
+
+    def run_lowered(self, fn, *args, cancel=None):
+        """Run ``fn(*args)`` on a short-lived thread at background priority and return its result.
+
+        The caller's thread is never lowered, so a scheduler or pool thread
+        keeps its priority for later work. If the wait is interrupted,
+        ``cancel`` is called and the worker is given time to wind down.
+        """
+        out = {}
+
+        def work():
+            with self.lowered_thread(restore=False):
+                try:
+                    out["result"] = fn(*args)
+                except BaseException as e:
+                    out["error"] = e
+
+        t = threading.Thread(target=work, name="background-run", daemon=True)
+        t.start()
+        try:
+            t.join()
+        except BaseException:
+            if cancel:
+                cancel()
+            t.join(10)
+            raise
+        if "error" in out:
+            raise out["error"]
+        return out["result"]
+
+    def summary(self) -> str:
+        return f"paused {self.paused_secs:.1f}s while busy, throttled {self.throttled_secs:.1f}s"
+
+
+# ioprio_set(2) numbers; there is no libc wrapper and no os-module equivalent.
+_IOPRIO_SYSCALLS = {"x86_64": 251, "amd64": 251, "i386": 289, "i686": 289, "aarch64": 30, "arm64": 30, "riscv64": 30}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_NONE = 0
+IOPRIO_CLASS_BE = 2
+_ioprio = []
+
+
+def _ioprio_syscall():
+    """(libc.syscall, number) on Linux, else None; resolved once."""
+    if not _ioprio:
+        fn = None
+        nr = _IOPRIO_SYSCALLS.get(os.uname().machine.lower()) if sys.platform.startswith("linux") else None
+        if nr is not None:
+            try:
+                fn = (ctypes.CDLL(None, use_errno=True).syscall, nr)
+            except (AttributeError, OSError):
+                fn = None
+        _ioprio.append(fn)
+    return _ioprio[0]
+
+
+def _set_ioprio(tid: int, cls: int, level: int):
+    """ioprio_set for a process or thread id (0 = the caller); no-op where unsupported."""
+    call = _ioprio_syscall()
+    if call and call[0](call[1], IOPRIO_WHO_PROCESS, tid, (cls << 13) | level) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def _lower_posix(pid: int):
+    """Lower ``pid`` (a process, or a thread id on Linux) to background priority.
+
+    Nice becomes at least BACKGROUND_NICE, so a child that already inherited
+    it is not pushed further, and I/O drops to best-effort level 7. Returns
+    the previous nice value, or None if it could not be read.
+    """
+    try:
+        before = os.getpriority(os.PRIO_PROCESS, pid)
+        if before < BACKGROUND_NICE:
+            os.setpriority(os.PRIO_PROCESS, pid, BACKGROUND_NICE)
+    except (AttributeError, OSError):
+        before = None
+    try:
+        _set_ioprio(pid, IOPRIO_CLASS_BE, 7)
+    except OSError:
+        pass
+    return before
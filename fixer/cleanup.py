@@ -0,0 +1,735 @@
+"""Deletion, cleanup targets and space analysis."""
+
+import os
+import sys
+import glob
+import stat
+import time
+import errno
+import fnmatch
+import ctypes
+import subprocess
+import queue
+import re
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+
+from .profiling import PROFILER
+
+
+FILE_ATTRIBUTE_READONLY = 0x1
+FILE_ATTRIBUTE_DIRECTORY = 0x10
+FO_DELETE = 0x3
+FOF_SILENT = 0x4
+FOF_NOCONFIRMATION = 0x10
+FOF_NOCONFIRMMKDIR = 0x200
+FOF_NOERRORUI = 0x400
+# shellapi.h's FOF_NO_UI; without FOF_ALLOWUNDO nothing goes to the Recycle Bin
+FOF_NO_UI = FOF_SILENT | FOF_NOCONFIRMATION | FOF_NOERRORUI | FOF_NOCONFIRMMKDIR
+
+_WINERROR_NAMES = {
+    2: "ERROR_FILE_NOT_FOUND",
+    3: "ERROR_PATH_NOT_FOUND",
+    5: "ERROR_ACCESS_DENIED",
+    32: "ERROR_SHARING_VIOLATION",
+    33: "ERROR_LOCK_VIOLATION",
+    145: "ERROR_DIR_NOT_EMPTY",
+    206: "ERROR_FILENAME_EXCED_RANGE",
+    1920: "ERROR_CANT_ACCESS_FILE",
+}
+
+
+def error_category(err: OSError) -> str:
+    winerror = getattr(err, "winerror", None)
+    if winerror:
+        return _WINERROR_NAMES.get(winerror, f"WINERROR_{winerror}")
+    if err.errno:
+        return errno.errorcode.get(err.errno, f"ERRNO_{err.errno}")
+    return type(err).__name__
+
+
+class DeleteStats:
+    """What a deletion pass removed and what it could not, by error category.
+
+    Failures are also attributed to the top-level entry they happened under,
+    so the log can name the few folders responsible for most of the misses.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.dirs = 0
+        self.links = 0
+        self.native = 0
+        self.bytes = 0
+        self.failed = 0
+        self.errors = {}
+        self.offenders = {}
+
+    @property
+    def removed(self) -> int:
+        return self.files + self.dirs + self.links + self.native
+
+    def fail(self, path: str, err: OSError):
+        self.failed += 1
+        cat = error_category(err)
+        self.errors[cat] = self.errors.get(cat, 0) + 1
+
+    def blame(self, path: str, n: int):
+        self.offenders[path] = self.offenders.get(path, 0) + n
+
+    def merge(self, other: "DeleteStats"):
+        for name in ("files", "dirs", "links", "native", "bytes", "failed"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for k, v in other.errors.items():
+            self.errors[k] = self.errors.get(k, 0) + v
+        for k, v in other.offenders.items():
+            self.blame(k, v)
+
+    def top_offenders(self, n: int = 5):
+        return heapq.nlargest(n, self.offenders.items(), key=lambda kv: kv[1])
+
+    def report(self, log_cb, label: str = ""):
+        if not self.failed:
+            return
+        cats = ", ".join(f"{k} {v}" for k, v in sorted(self.errors.items(), key=lambda kv: -kv[1]))
+        log_cb(f"[WARN] {label}{self.failed} item(s) could not be deleted: {cats}")
+        for path, n in self.top_offenders():
+            log_cb(f"[WARN]   {n} under {path}")
+
+
+def _unlink(path: str, st, stats: DeleteStats):
+    try:
+        os.unlink(path)
+    except PermissionError as e:
+        # Windows refuses to delete read-only files; clear the bit once and retry.
+        if not getattr(st, "st_file_attributes", 0) & FILE_ATTRIBUTE_READONLY:
+            stats.fail(path, e)
+            return
+        try:
+            os.chmod(path, stat.S_IWRITE)
+            os.unlink(path)
+        except OSError as e2:
+            stats.fail(path, e2)
+            return
+    except FileNotFoundError:
+        return
+    except OSError as e:
+        stats.fail(path, e)
+        return
+    stats.files += 1
+    stats.bytes += st.st_size
+
+
+def _remove_link(path: str, st, stats: DeleteStats):
+    # Never follow: a junction or directory symlink is removed with rmdir,
+    # which drops the link itself and leaves the target alone.
+    is_dir_link = bool(getattr(st, "st_file_attributes", 0) & FILE_ATTRIBUTE_DIRECTORY)
+    try:
+        (os.rmdir if is_dir_link else os.unlink)(path)
+        stats.links += 1
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        stats.fail(path, e)
+
+
+def _delete_dir(root: str, stats: DeleteStats, should_abort):
+    # Iterative post-order walk: (path, listed). Deep trees cannot hit the recursion limit.
+    stack = [(root, False)]
+    while stack:
+        path, listed = stack.pop()
+        if listed:
+            try:
+                os.rmdir(path)
+                stats.dirs += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # Non-empty because a child failed: already counted there.
+                if e.errno != errno.ENOTEMPTY and getattr(e, "winerror", None) != 145:
+                    stats.fail(path, e)
+            continue
+
+        if should_abort and should_abort():
+            return
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            stats.fail(path, e)
+            continue
+
+        stack.append((path, True))
+        for i, e in enumerate(entries):
+            # Large flat folders: let should_abort (and throttling) run every 64 entries.
+            if should_abort and i & 63 == 63 and should_abort():
+                return
+            try:
+                st = e.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            except OSError as err:
+                stats.fail(e.path, err)
+                continue
+            if _is_link(st):
+                _remove_link(e.path, st, stats)
+            elif stat.S_ISDIR(st.st_mode):
+                stack.append((e.path, False))
+            else:
+                _unlink(e.path, st, stats)
+
+
+def delete_tree(path: str, stats: DeleteStats = None, should_abort=None) -> DeleteStats:
+    """Remove ``path`` (file, link or folder) using the cheapest call per entry.
+
+    Files are unlinked, folders rmdir'ed bottom-up and links/junctions removed
+    without ever following them. Failures are counted in ``stats`` instead of
+    being swallowed.
+    """
+    stats = stats if stats is not None else DeleteStats()
+    before = stats.failed
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return stats
+    except OSError as e:
+        stats.fail(path, e)
+    else:
+        if _is_link(st):
+            _remove_link(path, st, stats)
+        elif stat.S_ISDIR(st.st_mode):
+            _delete_dir(path, stats, should_abort)
+        else:
+            _unlink(path, st, stats)
+    if stats.failed > before:
+        stats.blame(path, stats.failed - before)
+    return stats
+
+
+def _native_delete_batch(paths) -> bool:
+    """Delete many entries with one SHFileOperationW call (Windows only).
+
+    Returns False when the native API is unavailable or reported an error;
+    callers then finish with delete_tree, which also does the error accounting.
+    """
+    if not paths or sys.platform != "win32":
+        return False
+    from ctypes import wintypes
+
+    class SHFILEOPSTRUCTW(ctypes.Structure):
+        _fields_ = [
+            ("hwnd", wintypes.HWND),
+            ("wFunc", wintypes.UINT),
+            ("pFrom", wintypes.LPCWSTR),
+            ("pTo", wintypes.LPCWSTR),
+            ("fFlags", ctypes.c_uint16),
+            ("fAnyOperationsAborted", wintypes.BOOL),
+            ("hNameMappings", ctypes.c_void_p),
+            ("lpszProgressTitle", wintypes.LPCWSTR),
+        ]
+
+    op = SHFILEOPSTRUCTW()
+    op.wFunc = FO_DELETE
+    op.pFrom = "\0".join(paths) + "\0\0"
+    op.fFlags = FOF_NO_UI
+    try:
+        return ctypes.windll.shell32.SHFileOperationW(ctypes.byref(op)) == 0 and not op.fAnyOperationsAborted
+    except Exception:
+        return False
+
+
+NATIVE_BATCH = 512
+
+
+def format_bytes(n: int) -> str:
+    size = float(n)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_duration(secs: float) -> str:
+    secs = abs(secs)
+    return f"{secs / 60:.0f} min" if secs >= 90 else f"{secs:.0f} s"
+
+
+# ---------- Cleanup targets ----------
+FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+
+
+class CleanupTarget:
+    """A cleanup location described as data instead of a step_* method.
+
+    ``paths`` are templates: ``%VAR%`` is taken from the environment and ``*``
+    matches one path component (e.g. every browser profile). A template whose
+    variables are not set on this machine is ignored. Without ``patterns`` the
+    whole content of each folder is removed; with ``patterns`` only matching
+    files are (searched recursively unless ``recursive`` is False).
+    """
+
+    def __init__(
+        self,
+        key,
+        paths,
+        patterns=None,
+        recursive=True,
+        min_age_hours=0,
+        requires_admin=False,
+        stop_services=(),
+        default=False,
+    ):
+        self.key = key
+        self.paths = tuple(paths)
+        self.patterns = tuple(p.lower() for p in (patterns or ()))
+        self.recursive = recursive
+        self.min_age_hours = min_age_hours
+        self.requires_admin = requires_admin
+        self.stop_services = tuple(stop_services)
+        self.default = default
+
+    @property
+    def label_key(self):
+        return f"opt_{self.key}"
+
+    @property
+    def desc_key(self):
+        return f"desc_{self.key}"
+
+
+CLEANUP_TARGETS = [
+    CleanupTarget("temp", [r"%TEMP%", r"%WINDIR%\Temp"], default=True),
+    CleanupTarget("prefetch", [r"%WINDIR%\Prefetch"], requires_admin=True),
+    CleanupTarget(
+        "wu",
+        [r"%WINDIR%\SoftwareDistribution\Download"],
+        requires_admin=True,
+        stop_services=("wuauserv", "bits"),
+    ),
+    CleanupTarget(
+        "browser",
+        [
+            r"%LOCALAPPDATA%\Google\Chrome\User Data\*\Cache\Cache_Data",
+            r"%LOCALAPPDATA%\Google\Chrome\User Data\*\Code Cache",
+            r"%LOCALAPPDATA%\Google\Chrome\User Data\*\GPUCache",
+            r"%LOCALAPPDATA%\Microsoft\Edge\User Data\*\Cache\Cache_Data",
+            r"%LOCALAPPDATA%\Microsoft\Edge\User Data\*\Code Cache",
+            r"%LOCALAPPDATA%\Microsoft\Edge\User Data\*\GPUCache",
+            r"%LOCALAPPDATA%\BraveSoftware\Brave-Browser\User Data\*\Cache\Cache_Data",
+            r"%LOCALAPPDATA%\Mozilla\Firefox\Profiles\*\cache2",
+        ],
+    ),
+    CleanupTarget(
+        "shader",
+        [
+            r"%LOCALAPPDATA%\D3DSCache",
+            r"%LOCALAPPDATA%\NVIDIA\DXCache",
+            r"%LOCALAPPDATA%\NVIDIA\GLCache",
+            r"%LOCALAPPDATA%\AMD\DxCache",
+        ],
+    ),
+    CleanupTarget(
+        "dumps",
+        [
+            r"%LOCALAPPDATA%\CrashDumps",
+            r"%WINDIR%\Minidump",
+            r"%WINDIR%\MEMORY.DMP",
+            r"%PROGRAMDATA%\Microsoft\Windows\WER\ReportArchive",
+            r"%PROGRAMDATA%\Microsoft\Windows\WER\ReportQueue",
+        ],
+        requires_admin=True,
+    ),
+    CleanupTarget(
+        "thumbs",
+        [r"%LOCALAPPDATA%\Microsoft\Windows\Explorer"],
+        patterns=["thumbcache_*.db", "iconcache_*.db"],
+        recursive=False,
+    ),
+    CleanupTarget(
+        "delivery_opt",
+        [r"%WINDIR%\ServiceProfiles\NetworkService\AppData\Local\Microsoft\Windows\DeliveryOptimization\Cache"],
+        requires_admin=True,
+        stop_services=("dosvc",),
+    ),
+]
+
+CLEANUP_TARGETS_BY_KEY = {t.key: t for t in CLEANUP_TARGETS}
+
+
+def _expand_env(template: str):
+    missing = []
+
+    def _sub(m):
+        val = os.environ.get(m.group(1))
+        if not val:
+            missing.append(m.group(1))
+            return ""
+        return val
+
+    path = re.sub(r"%([A-Za-z0-9_]+)%", _sub, template)
+    return None if missing else path
+
+
+def expand_target_paths(target: CleanupTarget):
+    found = []
+    seen = set()
+    for tmpl in target.paths:
+        path = _expand_env(tmpl)
+        if not path:
+            continue
+        matches = glob.glob(path) if "*" in path else ([path] if os.path.lexists(path) else [])
+        for m in matches:
+            k = os.path.normcase(os.path.abspath(m))
+            if k not in seen:
+                seen.add(k)
+                found.append(m)
+    return found
+
+
+def _is_link(st) -> bool:
+    # Symlinks everywhere, plus junctions/mount points on Windows.
+    return stat.S_ISLNK(st.st_mode) or bool(getattr(st, "st_file_attributes", 0) & FILE_ATTRIBUTE_REPARSE_POINT)
+
+
+def _entry_size(path: str) -> int:
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return 0
+    if _is_link(st) or not stat.S_ISDIR(st.st_mode):
+        return st.st_size
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for e in it:
+                    try:
+                        est = e.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if stat.S_ISDIR(est.st_mode) and not _is_link(est):
+                        stack.append(e.path)
+                    else:
+                        total += est.st_size
+        except OSError:
+            pass
+    return total
+
+
+def _list_root(target: CleanupTarget, root: str, should_abort):
+    """Return (path, size or None) candidates under one root.
+
+    Size is None when it still has to be computed by walking the entry.
+    """
+    cutoff = time.time() - target.min_age_hours * 3600 if target.min_age_hours else None
+    out = []
+    try:
+        st = os.lstat(root)
+    except OSError:
+        return out
+
+    if not stat.S_ISDIR(st.st_mode) or _is_link(st):
+        name = os.path.basename(root).lower()
+        if not target.patterns or any(fnmatch.fnmatch(name, p) for p in target.patterns):
+            out.append((root, st.st_size))
+        return out
+
+    stack = [root]
+    while stack:
+        if should_abort():
+            break
+        try:
+            with os.scandir(stack.pop()) as it:
+                for e in it:
+                    try:
+                        est = e.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if cutoff is not None and est.st_mtime > cutoff:
+                        continue
+                    is_dir = stat.S_ISDIR(est.st_mode) and not _is_link(est)
+                    if not target.patterns:
+                        out.append((e.path, None if is_dir else est.st_size))
+                    elif is_dir:
+                        if target.recursive:
+                            stack.append(e.path)
+                    elif any(fnmatch.fnmatch(e.name.lower(), p) for p in target.patterns):
+                        out.append((e.path, est.st_size))
+        except OSError:
+            pass
+    return out
+
+
+def scan_cleanup_targets(targets, should_abort, max_workers=None, background=None):
+    """Scan every target in one shared pool.
+
+    Roots are listed in parallel, then the size of every top-level entry is
+    computed in the same pool, so a huge browser cache does not serialize
+    behind the Temp folder. With a ``background`` mode each worker runs at
+    background priority (Windows threads do not inherit it). Returns
+    {target.key: [(path, size), ...]}.
+    """
+    workers = max_workers or min(16, (os.cpu_count() or 2) * 2)
+    result = {t.key: [] for t in targets}
+    lower = background.lower_current_thread if background else None
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan", initializer=lower) as pool:
+        listings = []
+        for t in targets:
+            for root in expand_target_paths(t):
+                listings.append((t, pool.submit(_list_root, t, root, should_abort)))
+
+        sizing = []
+        for t, fut in listings:
+            for path, size in fut.result():
+                if size is None:
+                    sizing.append((t.key, path, pool.submit(_entry_size, path)))
+                else:
+                    result[t.key].append((path, size))
+
+        for key, path, fut in sizing:
+            result[key].append((path, fut.result()))
+
+    return result
+
+
+def delete_cleanup_entries(entries, should_abort, stats: DeleteStats, native: bool = False, background=None) -> int:
+    """Delete scanned entries into ``stats``, returning the bytes actually freed.
+
+    With ``native`` (Windows) entries go through SHFileOperationW in batches
+    first; whatever survives a batch is retried with delete_tree so every
+    failure is still counted. A ``background`` mode rate-limits the deleter.
+    """
+    freed = 0
+    if background:
+        should_abort = background.gate(stats, should_abort)
+    if native:
+        for i in range(0, len(entries), NATIVE_BATCH):
+            if should_abort():
+                return freed
+            batch = entries[i : i + NATIVE_BATCH]
+            _native_delete_batch([p for p, _ in batch])
+            for path, size in batch:
+                if not os.path.lexists(path):
+                    stats.native += 1
+                    freed += size
+                    continue
+                before = stats.bytes
+                delete_tree(path, stats, should_abort)
+                freed += stats.bytes - before
+        return freed
+
+    for path, _size in entries:
+        if should_abort():
+            break
+        before = stats.bytes
+        delete_tree(path, stats, should_abort)
+        freed += stats.bytes - before
+    return freed
+
+
+def run_cleanup_targets(targets, log_cb, should_abort, native: bool = False, on_target=None, background=None) -> int:
+    """Scan and delete ``targets``; returns total bytes freed.
+
+    ``on_target(key, found, freed, stats)`` is called after each target.
+    """
+    targets = list(targets)
+    if not targets:
+        return 0
+    if native and background:
+        # Shell batches cannot be paced; background mode deletes entry by entry.
+        log_cb("[INFO] Background mode: native batch deletion disabled.")
+        native = False
+
+    log_cb(f"[INFO] Scanning {len(targets)} cleanup target(s)...")
+    with PROFILER.timer("cleanup.scan"):
+        plan = scan_cleanup_targets(targets, should_abort, background=background)
+
+    total = 0
+    for t in targets:
+        if should_abort():
+            log_cb("[INFO] Aborted cleanup.")
+            break
+        entries = plan.get(t.key) or []
+        if not entries:
+            log_cb(f"[INFO] Nothing to clean: {t.key}")
+            continue
+        found = sum(size for _, size in entries)
+        log_cb(f"[INFO] Cleaning {t.key}: {len(entries)} item(s), {format_bytes(found)}")
+        stats = DeleteStats()
+        with PROFILER.timer("fs.delete"):
+            freed = delete_cleanup_entries(entries, should_abort, stats, native=native, background=background)
+        PROFILER.count("fs.deletes", stats.removed)
+        PROFILER.count("fs.bytes_freed", freed)
+        total += freed
+        log_cb(f"[OK] Cleaned {t.key}: freed {format_bytes(freed)} of {format_bytes(found)}")
+        stats.report(log_cb, f"{t.key}: ")
+        if on_target:
+            on_target(t.key, found, freed, stats)
+    return total
+
+
+def start_services(names, log_cb):
+    # Always restart what we stopped, even after a cancel, so not routed through CommandRunner.
+    for name in names:
+        try:
+            r = subprocess.run(["net", "start", name], capture_output=True, text=True, timeout=60)
+            log_cb(f"[INFO] net start {name}: exit {r.returncode}")
+        except Exception as e:
+            log_cb(f"[WARN] Could not start service {name}: {e}")
+
+
+# ---------- Space analysis ----------
+class SpaceTree:
+    """Directory sizes aggregated bottom-up into flat arrays.
+
+    There is one slot per *directory*, never per file: files only add to the
+    ``own_bytes``/``own_files`` of the folder holding them, so memory follows
+    the directory count of a volume rather than its file count. A child slot
+    always has a higher index than its parent, which makes the bottom-up sum a
+    single reverse pass, and the children of a slot are contiguous.
+    """
+
+    def __init__(self):
+        self.parent = array("l")
+        self.first_child = array("l")
+        self.child_count = array("l")
+        self.own_bytes = array("q")
+        self.own_files = array("q")
+        self.total_bytes = array("q")
+        self.total_files = array("q")
+        self.names = []
+        self.roots = []
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, parent: int, name: str, nbytes: int, nfiles: int) -> int:
+        self.parent.append(parent)
+        self.first_child.append(-1)
+        self.child_count.append(0)
+        self.own_bytes.append(nbytes)
+        self.own_files.append(nfiles)
+        self.names.append(name)
+        if parent < 0:
+            self.roots.append(len(self.parent) - 1)
+        return len(self.parent) - 1
+
+    def aggregate(self):
+        self.total_bytes = array("q", self.own_bytes)
+        self.total_files = array("q", self.own_files)
+        parent, tb, tf = self.parent, self.total_bytes, self.total_files
+        for i in range(len(parent) - 1, -1, -1):
+            p = parent[i]
+            if p >= 0:
+                tb[p] += tb[i]
+                tf[p] += tf[i]
+
+    def children(self, idx: int):
+        first = self.first_child[idx]
+        return range(first, first + self.child_count[idx]) if first >= 0 else range(0)
+
+    def top_children(self, idx: int, n: int = 20):
+        kids = self.children(idx)
+        return heapq.nlargest(n, kids, key=self.total_bytes.__getitem__)
+
+
+def _scan_one_dir(path: str, cache: dict):
+    """List one directory: (mtime_ns, file_bytes, file_count, subdir_names).
+
+    The cache keeps the same aggregate per directory, keyed on its mtime, so
+    a hit costs one stat and memory follows the directory count. A file that
+    grows in place does not change its directory's mtime: its old size is
+    reported until something is added, removed or renamed in that folder, or
+    the cache is dropped.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return 0, 0, 0, ()
+    hit = cache.get(path)
+    if hit is not None and hit[0] == mtime:
+        return hit
+
+    nbytes = nfiles = 0
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                try:
+                    st = e.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(st.st_mode) and not _is_link(st):
+                    subdirs.append(e.name)
+                else:
+                    nbytes += st.st_size
+                    nfiles += 1
+    except OSError:
+        pass
+    res = cache[path] = (mtime, nbytes, nfiles, tuple(subdirs))
+    return res
+
+
+def scan_space(roots, should_abort=lambda: False, cache=None, max_workers=None, progress_cb=None):
+    """Walk ``roots`` with a pool of listers and return an aggregated SpaceTree.
+
+    ``cache`` maps directory path -> (mtime, bytes, files, subdir names) and
+    lets a rescan skip listing unchanged directories; pass the same dict again
+    to reuse it. It holds one entry per directory, never per file (see
+    ``_scan_one_dir`` for what a cached entry can miss).
+    """
+    cache = {} if cache is None else cache
+    workers = max_workers or min(32, (os.cpu_count() or 2) * 4)
+    tree = SpaceTree()
+    done = queue.Queue()
+    pending = 0
+
+    def _work(idx, path):
+        try:
+            done.put((idx, path, _scan_one_dir(path, cache)))
+        except BaseException as e:  # never leave the collector waiting
+            done.put((idx, path, e))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="space") as pool:
+        for root in roots:
+            root = os.path.abspath(root)
+            if os.path.isdir(root):
+                pool.submit(_work, tree.add(-1, root, 0, 0), root)
+                pending += 1
+
+        listed = 0
+        while pending:
+            idx, path, res = done.get()
+            pending -= 1
+            if isinstance(res, BaseException):
+                continue
+            _mtime, nbytes, nfiles, subdirs = res
+            tree.own_bytes[idx] = nbytes
+            tree.own_files[idx] = nfiles
+            listed += 1
+            if progress_cb and listed % 2000 == 0:
+                progress_cb(listed, path)
+            if should_abort() or not subdirs:
+                continue
+            tree.first_child[idx] = len(tree)
+            tree.child_count[idx] = len(subdirs)
+            for name in subdirs:
+                pool.submit(_work, tree.add(idx, name, 0, 0), os.path.join(path, name))
+                pending += 1
+
+    tree.aggregate()
+    return tree
+
+
+def clear_recycle_bin(log_cb):
+    try:
+        ctypes.windll.shell32.SHEmptyRecycleBinW(None, None, 0x1 | 0x2 | 0x4)
+        log_cb("[OK] Recycle Bin cleared (or already empty).")
+    except Exception as e:
+        log_cb(f"[WARN] Could not clear Recycle Bin: {e}")
@@ -0,0 +1,141 @@
+"""Command line modes that need no GUI.
+
+``python -m fixer --headless ...`` runs them without importing Tk;
+windows_fixer.py uses the same parser and falls back to the GUI. A profile
+is a JSON object with DEFAULT_PROFILE's keys, e.g.
+{"targets": ["temp", "browser"], "sfc": true}; missing keys keep their defaults.
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from .engine import StepEngine
+from .events import text_sink
+from .fleet import AGENT_DEFAULT_PORT, FleetAgent, run_fleet
+from .i18n import lang_report
+from .runner import CommandRunner, StubCommandRunner
+from .scheduler import Scheduler
+from .storage import load_settings
+
+
+def _print_log(msg: str):
+    print(msg, flush=True)
+
+
+def load_profile(path):
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_headless(profile: dict, stub: bool = False, log_cb=_print_log) -> int:
+    engine = StepEngine(None, runner_cls=StubCommandRunner if stub else CommandRunner, dry_run=stub)
+    engine.bus.subscribe(text_sink(log_cb, steps=True), policy="block")
+    steps = engine.build_steps(profile)
+    if not steps:
+        log_cb("[ERROR] Profile selects no steps.")
+        return 2
+    status = engine.run(steps)
+    return {"ok": 0, "cancel": 1}.get(status, 3)
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(
+        prog="windows_fixer", description="Windows repair & cleanup tool. Opens the GUI when no mode is given."
+    )
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--headless", action="store_true", help="run a profile without the GUI")
+    mode.add_argument("--agent", action="store_true", help="serve the step engine over JSON-RPC")
+    mode.add_argument("--controller", action="store_true", help="run a profile on several agents")
+    mode.add_argument("--scheduler", action="store_true", help="run the schedules from settings.json")
+    mode.add_argument("--lang-report", action="store_true", help="list untranslated keys per language catalog")
+    ap.add_argument("--profile", help="profile JSON file (default: built-in defaults)")
+    ap.add_argument("--stub", action="store_true", help="simulate commands; cleanup only scans")
+    ap.add_argument("--background", action="store_true", help="low priority, throttled run (overrides the profile)")
+    ap.add_argument("--bind", default="127.0.0.1", help="agent listen address")
+    ap.add_argument("--port", type=int, default=AGENT_DEFAULT_PORT, help="agent listen port")
+    ap.add_argument("--token", default=os.environ.get("WINDOWS_FIXER_AGENT_TOKEN"), help="shared agent token")
+    ap.add_argument("--agents", default="", help="controller: comma-separated host:port list")
+    ap.add_argument("--concurrency", type=int, default=4, help="controller: agents running at once")
+    ap.add_argument("--report", help="controller: write the aggregated result JSON here")
+    ap.add_argument("--once", action="store_true", help="scheduler: run what is due now, then exit")
+    ap.add_argument("--poll", type=float, default=60, help="scheduler: seconds between checks")
+    return ap.parse_args(argv)
+
+
+def run_cli(args) -> int | None:
+    """Run the engine mode selected in ``args``; None when no such mode was given."""
+    if args.headless or args.agent or args.controller or args.scheduler:
+        os.environ["WINDOWS_FIXER_HEADLESS"] = "1"
+
+    if args.headless:
+        profile = load_profile(args.profile)
+        if args.background:
+            profile["background"] = True
+        return run_headless(profile, stub=args.stub)
+
+    if args.agent:
+        if args.bind not in ("127.0.0.1", "localhost", "::1") and not args.token:
+            print("[ERROR] --token is required when the agent listens beyond localhost.", file=sys.stderr)
+            return 2
+        server = FleetAgent(stub=args.stub, token=args.token).make_server(args.bind, args.port)
+        _print_log(f"[INFO] Agent listening on http://{args.bind}:{server.server_address[1]}/rpc")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    if args.controller:
+        agents = [a.strip() for a in args.agents.split(",") if a.strip()]
+        if not agents:
+            print("[ERROR] --agents is required.", file=sys.stderr)
+            return 2
+        result = run_fleet(agents, load_profile(args.profile), concurrency=args.concurrency, token=args.token)
+        _print_log(f"[fleet] Summary: {json.dumps(result['summary'])}")
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        return 0 if set(result["summary"]) <= {"ok"} else 1
+
+    if args.scheduler:
+        sched = Scheduler(load_settings().get("schedules"), log_cb=_print_log)
+        if not sched.schedules:
+            print("[ERROR] No schedules in settings.json.", file=sys.stderr)
+            return 2
+        for sid, when in sched.next_times().items():
+            label = f"next at {datetime.fromtimestamp(when):%Y-%m-%d %H:%M}" if when else "when idle"
+            _print_log(f"[INFO] Schedule {sid}: {label}")
+
+        def launch(profile):
+            profile = dict(profile, background=profile.get("background", True) or args.background)
+            return {0: "ok", 1: "cancel", 2: "empty"}.get(run_headless(profile, stub=args.stub), "error")
+
+        if args.once:
+            sched.run_pending(launch)
+            return 0
+        try:
+            sched.run_forever(launch, poll=args.poll)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if args.lang_report:
+        return lang_report()
+
+    return None
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    rc = run_cli(args)
+    if rc is None:
+        print("[ERROR] Choose a mode: --headless, --agent, --controller, --scheduler or --lang-report.", file=sys.stderr)
+        return 2
+    return rc
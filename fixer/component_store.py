@@ -0,0 +1,92 @@
+"""Parsing DISM /AnalyzeComponentStore and the cleanup decision."""
+
+import re
+
+from .cleanup import format_bytes
+from .report import clean_output_line
+
+
+COMPONENT_STORE_CACHE = "component_store.json"
+
+_UNITS = {"bytes": 1, "kb": 1024, "mb": 1024**2, "gb": 1024**3, "tb": 1024**4}
+_SIZE_RE = re.compile(r"([\d.,]+)\s*(bytes|kb|mb|gb|tb)\b", re.I)
+# "<label> : <value>" lines of `DISM /Online /Cleanup-Image /AnalyzeComponentStore`
+_CS_FIELDS = {
+    "windows explorer reported size of component store": "explorer_size",
+    "actual size of component store": "actual_size",
+    "shared with windows": "shared",
+    "backups and disabled features": "backups",
+    "cache and temporary data": "cache",
+    "date of last cleanup": "last_cleanup",
+    "number of reclaimable packages": "reclaimable_packages",
+    "component store cleanup recommended": "recommended",
+}
+
+
+def _parse_number(num: str) -> float:
+    """"1,234.5" / "1.234,5" / "8,23" / "1.234.567" -> float.
+
+    With both separators the last one is the decimal point; a separator that
+    appears more than once groups thousands; a single one is a decimal point.
+    """
+    if "," in num and "." in num:
+        dec = "," if num.rindex(",") > num.rindex(".") else "."
+        group = "." if dec == "," else ","
+        return float(num.replace(group, "").replace(dec, "."))
+    for sep in (",", "."):
+        if num.count(sep) > 1:
+            return float(num.replace(sep, ""))
+    return float(num.replace(",", "."))
+
+
+def parse_size(text: str):
+    """``"8.23 GB"`` -> bytes, or None. Handles ``,`` decimals and thousands separators."""
+    m = _SIZE_RE.search(text)
+    if not m:
+        return None
+    try:
+        return int(_parse_number(m.group(1)) * _UNITS[m.group(2).lower()])
+    except ValueError:
+        return None
+
+
+def parse_component_store(lines):
+    """Parse /AnalyzeComponentStore output; None if it has no report in it.
+
+    ``reclaimable`` is backups + cache, the part StartComponentCleanup can free.
+    """
+    info = {}
+    for raw in lines:
+        line = clean_output_line(raw)
+        label, sep, value = line.partition(":")
+        key = _CS_FIELDS.get(label.strip().lower()) if sep else None
+        if not key:
+            continue
+        value = value.strip()
+        if key == "recommended":
+            info[key] = value.lower().startswith("yes")
+        elif key == "reclaimable_packages":
+            info[key] = int(value) if value.isdigit() else None
+        elif key == "last_cleanup":
+            info[key] = value
+        else:
+            info[key] = parse_size(value)
+    if "recommended" not in info and "backups" not in info:
+        return None
+    if info.get("backups") is not None or info.get("cache") is not None:
+        info["reclaimable"] = (info.get("backups") or 0) + (info.get("cache") or 0)
+    return info
+
+
+def component_cleanup_decision(info, min_bytes: int):
+    """(run?, reason) for StartComponentCleanup given an analysis (or None)."""
+    if not info:
+        return True, "component store analysis unavailable, running cleanup"
+    size = info.get("reclaimable")
+    recommended = info.get("recommended")
+    shown = format_bytes(size) if size is not None else "unknown size"
+    if recommended is False:
+        return False, f"cleanup not recommended ({shown} reclaimable)"
+    if size is not None and size < min_bytes:
+        return False, f"only {shown} reclaimable (threshold {format_bytes(min_bytes)})"
+    return True, f"{shown} reclaimable, cleanup recommended"
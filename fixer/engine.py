@@ -0,0 +1,806 @@
+"""The step engine: profiles, planning and the step implementations."""
+
+import os
+import time
+from typing import Callable, Literal, NamedTuple, TypedDict
+
+from .background import BackgroundMode
+from .cleanup import (
+    CLEANUP_TARGETS,
+    CLEANUP_TARGETS_BY_KEY,
+    clear_recycle_bin,
+    format_bytes,
+    format_duration,
+    run_cleanup_targets,
+    scan_cleanup_targets,
+    start_services,
+)
+from .component_store import COMPONENT_STORE_CACHE, component_cleanup_decision, parse_component_store
+from .events import (
+    BytesFreed,
+    EventBus,
+    Progress,
+    RunFinished,
+    StepFinished,
+    StepStarted,
+    log_line,
+    parse_progress,
+    text_sink,
+)
+from .journal import RunJournal
+from .meta import APP_VERSION
+from .network import format_network_delta, measure_network, network_deltas
+from .preflight import PREFLIGHT_PROBES, Preflight, _probe_data, preflight_findings, run_probes, system_disk_low
+from .profiling import PROFILER
+from .report import match_findings, write_run_report
+from .restore import RestorePointJob, StubRestorePoint, WindowsRestorePoint
+from .runner import BackgroundJob, CommandRunner
+from .storage import JsonStore
+from .system import is_admin
+
+
+DEFAULT_PROFILE = {
+    "targets": [t.key for t in CLEANUP_TARGETS if t.default],
+    "recycle_bin": True,
+    "flush_dns": False,
+    "component_cleanup": False,
+    "dism_scan": False,
+    "dism_restore": True,
+    "sfc": True,
+    "chkdsk": False,
+    "chkdsk_drive": "C:",
+    "chkdsk_mode": "scan",
+    "reset_network": False,
+    # Delete in batches through the Windows shell API before the per-file walk.
+    "native_delete": False,
+    # Low disk runs cleanup first (only a warning if none is selected, unless
+    # auto_clean_temp adds Temp); a pending reboot skips DISM RestoreHealth and
+    # Component Cleanup. auto_adjust=False only warns.
+    "preflight": True,
+    "auto_adjust": True,
+    "auto_clean_temp": False,
+    # Limits for background mode; 0 turns one off.
+    "background": False,
+    "bg_ops_per_sec": 500,
+    "bg_mb_per_sec": 20,
+    "bg_busy_cpu": 80,
+    "bg_busy_disk": 70,
+    "net_measure": True,
+    # Queries go to the configured resolver ("" = the system's own) and the
+    # TCP probe connects to that resolver, so the defaults stay on the local network.
+    "net_dns_names": ["www.msftconnecttest.com", "www.microsoft.com"],
+    "net_dns_server": "",
+    "net_tcp_targets": ["resolver:53"],
+    "net_samples": 3,
+    "net_timeout": 2.0,
+    # Created while cleanup runs; the NEEDS_RESTORE_POINT steps wait for it and
+    # run anyway if it fails, unless restore_point_required.
+    "restore_point": False,
+    "restore_point_required": False,
+    # /AnalyzeComponentStore first; skip the cleanup below component_min_mb.
+    "component_analyze": True,
+    "component_min_mb": 500,
+    "component_cache_hours": 24,
+    # Skip RestoreHealth after a recent healthy verdict and add it (plus a
+    # second SFC) when SFC cannot repair files.
+    "health_smart": True,
+    "health_max_age_hours": 24,
+}
+
+# Steps that change the system and should have a rollback point first
+# (CHKDSK only in fix mode, see StepEngine.needs_restore_point).
+NEEDS_RESTORE_POINT = (
+    "step_dism_component_cleanup",
+    "step_dism_restorehealth",
+    "step_sfc",
+    "step_chkdsk",
+    "step_reset_network",
+)
+
+
+HEALTH_STORE = "health.json"
+# Rough durations for "time saved" until a step has been timed on this machine.
+HEALTH_STEP_ESTIMATES = {"step_dism_scanhealth": 600, "step_dism_restorehealth": 1200, "step_sfc": 900}
+# The report finding for SFC output that means the component store is damaged
+# (as opposed to SFC failing to run, which is also an "error" verdict).
+SFC_UNREPAIRED = "Corrupt files found, some not repaired"
+
+
+def health_verdict(kinds):
+    """Worst finding kind of a DISM/SFC run ("error" > "problem" > "fixed" > "ok"), or None."""
+    for kind in ("error", "problem", "fixed", "ok"):
+        if kind in kinds:
+            return kind
+    return None
+
+
+StepStatus = Literal["ok", "skip", "cancel", "error"]
+
+
+class Step(NamedTuple):
+    """A planned step: its display name and the engine method that runs it."""
+
+    name: str
+    fn: Callable[[], StepStatus]
+
+    @property
+    def id(self) -> str:
+        return _step_id(self)
+
+
+class StepResult(TypedDict):
+    step: str
+    result: StepStatus
+    secs: float
+
+
+def _step_id(step) -> str:
+    return getattr(step[1], "__name__", step[0])
+
+
+def normalize_profile(profile) -> dict:
+    out = dict(DEFAULT_PROFILE)
+    out.update({k: v for k, v in (profile or {}).items() if k in DEFAULT_PROFILE})
+    out["targets"] = [k for k in out["targets"] if k in CLEANUP_TARGETS_BY_KEY]
+    out["chkdsk_drive"] = str(out["chkdsk_drive"]).strip().upper() or "C:"
+    if out["chkdsk_mode"] not in ("scan", "fix"):
+        out["chkdsk_mode"] = "scan"
+    for k in ("bg_ops_per_sec", "bg_mb_per_sec", "bg_busy_cpu", "bg_busy_disk"):
+        try:
+            out[k] = max(0.0, float(out[k]))
+        except (TypeError, ValueError):
+            out[k] = DEFAULT_PROFILE[k]
+    for k in ("component_min_mb", "component_cache_hours", "health_max_age_hours"):
+        try:
+            out[k] = max(0.0, float(out[k]))
+        except (TypeError, ValueError):
+            out[k] = DEFAULT_PROFILE[k]
+    for k in ("net_dns_names", "net_tcp_targets"):
+        out[k] = [str(x) for x in out[k]] if isinstance(out[k], (list, tuple)) else DEFAULT_PROFILE[k]
+    out["net_dns_server"] = str(out["net_dns_server"] or "")
+    try:
+        out["net_samples"] = max(1, int(out["net_samples"]))
+        out["net_timeout"] = max(0.1, float(out["net_timeout"]))
+    except (TypeError, ValueError):
+        out["net_samples"], out["net_timeout"] = DEFAULT_PROFILE["net_samples"], DEFAULT_PROFILE["net_timeout"]
+    return out
+
+
+class StepEngine:
+    """Builds and runs the steps of a profile, with no UI attached.
+
+    The GUI, headless runs and the fleet agent all drive this. Steps return
+    "ok", "skip", "cancel" or "error". With ``dry_run`` cleanup only scans and
+    reports sizes; nothing is deleted and no services are touched.
+
+    Progress and output are published on ``bus`` as typed events; a
+    ``log_cb`` is attached to it as a text subscriber that never loses lines.
+    """
+
+    def __init__(
+        self,
+        log_cb,
+        runner_cls=CommandRunner,
+        dry_run: bool = False,
+        journal: bool = True,
+        probes=None,
+        restore_backend=None,
+    ):
+        self.bus = EventBus()
+        if log_cb is not None:
+            self.bus.subscribe(text_sink(log_cb), policy="block")
+        self.runner_cls = runner_cls
+        self.runner = runner_cls(self.log, output_cb=self.output)
+        self._step = None
+        self.dry_run = dry_run
+        self.preflight = Preflight(probes)
+        self.last_report = None
+        self.background = None
+        self._net_last = None
+        if restore_backend is None:
+            restore_backend = StubRestorePoint() if dry_run or os.name != "nt" else WindowsRestorePoint()
+        self.restore_backend = restore_backend
+        self.restore_job = None
+        self._restore_reported = False
+        self.analysis_job = None
+        self.health = {}
+        self._health_ran = set()
+        self._health_saved = 0.0
+        self._followups = []
+        self._planned = set()
+        self.use_journal = journal
+        self.profile = normalize_profile({})
+        self.journal = None
+        self.results: list[StepResult] = []
+
+    def log(self, msg: str):
+        journal = self.journal
+        if journal:
+            journal.write("log", msg=msg)
+        self.bus.publish(log_line(msg))
+
+    def output(self, line: str):
+        """A line of command output: journalled like a message, published as output."""
+        journal = self.journal
+        if journal:
+            journal.write("log", msg=line)
+        self.bus.publish_output(line)
+        if self._step and "%" in line:
+            fraction = parse_progress(line)
+            if fraction is not None:
+                self.bus.publish(Progress(self._step, fraction))
+
+    def should_abort_now(self):
+        return self.runner.cancel_all_requested() or self.runner.skip_requested()
+
+    def run_command_step(self, cmd):
+        self.runner.reset_flags_for_step()
+        return self.runner.run_cmd(cmd)
+
+    def build_steps(self, profile: dict) -> list[Step]:
+        p = self.profile = normalize_profile(profile)
+        steps = []
+        if p["targets"]:
+            steps.append(Step("Cleanup", self.step_cleanup_targets))
+        if p["recycle_bin"]:
+            steps.append(Step("Empty Recycle Bin", self.step_clear_recycle))
+        if p["flush_dns"]:
+            steps.append(Step("Flush DNS Cache", self.step_flush_dns))
+        if p["component_cleanup"]:
+            steps.append(Step("DISM Component Cleanup", self.step_dism_component_cleanup))
+
+        if p["dism_scan"]:
+            steps.append(Step("DISM ScanHealth", self.step_dism_scanhealth))
+        if p["dism_restore"]:
+            steps.append(Step("DISM RestoreHealth", self.step_dism_restorehealth))
+        if p["sfc"]:
+            steps.append(Step("SFC ScanNow", self.step_sfc))
+        if p["chkdsk"]:
+            steps.append(Step(f"CHKDSK ({p['chkdsk_drive']}, {p['chkdsk_mode']})", self.step_chkdsk))
+        if p["reset_network"]:
+            steps.append(Step("Reset Network Stack", self.step_reset_network))
+
+        return steps
+
+    def adjust_plan(self, steps, snapshot: dict):
+        """Log pre-flight findings and, with ``auto_adjust``, reshape the plan."""
+        for note in preflight_findings(snapshot):
+            self.log(note)
+        if not self.profile["auto_adjust"]:
+            return steps
+
+        out = list(steps)
+        if _probe_data(snapshot, "pending_reboot").get("pending"):
+            for sid in ("step_dism_restorehealth", "step_dism_component_cleanup"):
+                for step in [s for s in out if _step_id(s) == sid]:
+                    out.remove(step)
+                    self.log(f"[PLAN] Skipping {step[0]}: a reboot is pending. Restart, then run it again.")
+
+        if system_disk_low(snapshot):
+            freeing = [s for s in out if _step_id(s) in ("step_cleanup_targets", "step_clear_recycle")]
+            rest = [s for s in out if s not in freeing]
+            has_cleanup = any(_step_id(s) == "step_cleanup_targets" for s in freeing)
+            if not has_cleanup and self.profile["auto_clean_temp"]:
+                # deleting files the user did not select needs the explicit opt-in
+                self.profile["targets"] = ["temp"]
+                freeing.insert(0, Step("Cleanup", self.step_cleanup_targets))
+                self.log("[PLAN] Low disk space: adding Temp cleanup before the other steps.")
+            elif not has_cleanup:
+                self.log("[WARN] Low disk space: consider selecting Cleanup (Temp files) before running repairs.")
+            elif out[: len(freeing)] != freeing:
+                self.log("[PLAN] Low disk space: running cleanup first.")
+            out = freeing + rest
+
+        if [s[0] for s in out] != [s[0] for s in steps]:
+            self.journal_write("plan", steps=[s[0] for s in out])
+        return out
+
+    # ----- running -----
+    def journal_write(self, kind: str, **fields):
+        if self.journal:
+            self.journal.write(kind, **fields)
+
+    def _open_journal(self, steps):
+        if not self.use_journal:
+            return
+        try:
+            self.journal = RunJournal.create()
+        except OSError:
+            self.journal = None
+            return
+        self.journal_write(
+            "run_start", version=APP_VERSION, admin=is_admin(), profile=self.profile, steps=[n for n, _ in steps]
+        )
+
+    def _on_target(self, key, found, freed, stats):
+        self.bus.publish(BytesFreed(key, freed, found))
+        self.journal_write(
+            "cleanup_target", target=key, found=found, freed=freed, failed=stats.failed, errors=stats.errors
+        )
+
+    def _close_journal(self, status: str):
+        journal, self.journal = self.journal, None
+        if not journal:
+            return
+        if self.profile["preflight"]:
+            probes = PREFLIGHT_PROBES if self.preflight.probes is None else self.preflight.probes
+            post = run_probes([p for p in probes if p.name == "free_space"])
+            self.preflight.update(post)
+            journal.write("post_state", snapshot=post)
+        if PROFILER.enabled:
+            journal.write("metrics", **PROFILER.snapshot())
+        journal.write("run_end", status=status)
+        journal.close()
+        try:
+            self.last_report = write_run_report(journal.path)
+            self.bus.publish(log_line(f"[INFO] Report: {self.last_report['html']}"))
+        except Exception as e:
+            self.bus.publish(log_line(f"[WARN] Could not write the run report: {e}"))
+
+    def run(self, steps: list[Step], on_step: Callable[[int, int, str], None] | None = None) -> StepStatus:
+        """Run ``steps`` in order; returns "ok", "cancel" or "error".
+
+        ``on_step(index, total, name)`` is called before each step.
+        """
+        self.runner.reset_all()
+        self.results = []
+        self.last_report = None
+        self._net_last = None
+        PROFILER.reset()
+        self._open_journal(steps)
+        self.log(f"--- Windows Fixer {APP_VERSION} ---")
+        self.log("Starting...")
+
+        self.background = BackgroundMode.from_profile(self.profile, self.log) if self.profile["background"] else None
+        self.runner.background = self.background
+        if self.background:
+            p = self.profile
+            self.log(
+                f"[INFO] Background mode: low priority, up to {p['bg_ops_per_sec']:g} deletes/s and "
+                f"{p['bg_mb_per_sec']:g} MB/s, pausing above CPU {p['bg_busy_cpu']:g}% / disk {p['bg_busy_disk']:g}%."
+            )
+        status = "error"
+        try:
+            if self.background:
+                status = self.background.run_lowered(
+                    self._run_steps, steps, on_step, cancel=self.runner.request_cancel_all
+                )
+            else:
+                status = self._run_steps(steps, on_step)
+        except Exception as e:
+            self.log(f"[ERROR] {e}")
+        finally:
+            if self.background:
+                self.log(f"[INFO] Background mode: {self.background.summary()}.")
+                self.journal_write(
+                    "background", paused_secs=self.background.paused_secs, throttled_secs=self.background.throttled_secs
+                )
+            self._report_restore_point()
+            if self.analysis_job and not self.analysis_job.done():
+                self.analysis_job.cancel()
+            self._close_journal(status)
+            self.bus.publish(RunFinished(status))
+            self.bus.flush()
+        return status
+
+    def _run_steps(self, steps, on_step) -> str:
+        if self.profile["preflight"]:
+            snapshot = self.preflight.snapshot()
+            self.journal_write("preflight", snapshot=snapshot)
+            steps = self.adjust_plan(steps, snapshot)
+
+        self.restore_job = None
+        self._restore_reported = False
+        if self.profile["restore_point"] and any(self.needs_restore_point(s) for s in steps):
+            self.start_restore_point()
+        self.analysis_job = None
+        if self.profile["component_analyze"] and any(_step_id(s) == "step_dism_component_cleanup" for s in steps):
+            if self.cached_component_store() is None:
+                self.start_component_analysis()
+
+        self.health = JsonStore(HEALTH_STORE).load({})
+        self._health_ran = set()
+        self._health_saved = 0.0
+        self._followups = []
+        self._planned = {_step_id(s) for s in steps}
+        steps = list(steps)
+        idx = 0
+        while idx < len(steps):
+            name, fn = steps[idx]
+            idx += 1
+            if self.background:
+                self.background.wait_until_idle(self.runner.cancel_all_requested)
+            if self.runner.cancel_all_requested():
+                self.log("[INFO] Cancelled. Stopping all steps.")
+                return "cancel"
+
+            if on_step:
+                on_step(idx, len(steps), name)
+            self.bus.publish(StepStarted(idx, len(steps), name))
+            self.journal_write("step_start", step=name, index=idx)
+            if self.needs_restore_point((name, fn)) and not self.await_restore_point(name):
+                # the wait and the skip are reported under this step's header
+                result, secs = "cancel" if self.runner.cancel_all_requested() else "skip", 0.0
+            else:
+                self._step = name
+                t0 = time.perf_counter()
+                try:
+                    result = fn()
+                finally:
+                    self._step = None
+                secs = time.perf_counter() - t0
+                PROFILER.record(f"step.{name}", secs)
+            self.bus.publish(StepFinished(idx, name, result, round(secs, 3)))
+            self.results.append({"step": name, "result": result, "secs": round(secs, 3)})
+            self.journal_write("step_end", step=name, index=idx, result=result, secs=round(secs, 3))
+            if self._followups:
+                # steps queued by the one that just ran go right after it
+                steps[idx:idx] = self._followups
+                self._followups = []
+
+            if result == "cancel":
+                self.log("[INFO] Cancelled. Stopping all steps.")
+                return "cancel"
+
+            if result == "skip":
+                self.log(f"[INFO] Step skipped: {name}")
+                continue
+
+        if self._health_saved > 0:
+            self.log(f"[PLAN] Health verdicts saved about {format_duration(self._health_saved)} this run.")
+        self.log("All selected tasks finished.")
+        return "ok"
+
+    # ----- restore point -----
+    def start_restore_point(self):
+        if not is_admin() and not self.dry_run:
+            self.log("[WARN] A restore point needs Admin. Continuing without one.")
+            return
+        self.log(f"[INFO] Creating a restore point in the background ({self.restore_backend.name})...")
+        self.restore_job = RestorePointJob(
+            self.restore_backend, f"Windows Fixer {APP_VERSION}", self.runner.cancel_all_requested
+        ).start()
+
+    def needs_restore_point(self, step) -> bool:
+        sid = _step_id(step)
+        if sid == "step_chkdsk":
+            return self.profile["chkdsk_mode"] != "scan"
+        return sid in NEEDS_RESTORE_POINT
+
+    def await_restore_point(self, name: str) -> bool:
+        """Wait for the restore point before ``name``; False means skip the step."""
+        job = self.restore_job
+        if job is None:
+            if self.profile["restore_point"] and self.profile["restore_point_required"]:
+                self.log(f"[WARN] Skipping {name}: no restore point.")
+                return False
+            return True
+        if not job.done():
+            self.log(f"[INFO] {name} waits for the restore point...")
+            if not job.wait(self.runner.cancel_all_requested):
+                return False
+        self._report_restore_point()
+        if job.status in ("ok", "skipped"):
+            return True
+        if self.profile["restore_point_required"]:
+            self.log(f"[WARN] Skipping {name}: no restore point.")
+            return False
+        return True
+
+    def _report_restore_point(self):
+        """Log and journal the finished restore point once per run."""
+        job = self.restore_job
+        if job is None or not job.done() or self._restore_reported:
+            return
+        self._restore_reported = True
+        if job.status == "ok":
+            self.log(f"[OK] Restore point created in {job.secs:.1f}s (steps waited {job.waited:.1f}s).")
+        elif job.status == "skipped":
+            self.log(f"[INFO] Restore point: {job.detail}.")
+        elif job.status != "cancel":
+            self.log(f"[WARN] Restore point failed after {job.secs:.1f}s: {job.detail}")
+        self.journal_write(
+            "restore_point", status=job.status, detail=job.detail, secs=round(job.secs, 3), waited=round(job.waited, 3)
+        )
+
+    # ----- component store analysis -----
+    def cached_component_store(self):
+        """The last analysis if younger than ``component_cache_hours``, else None."""
+        data = JsonStore(COMPONENT_STORE_CACHE).load({})
+        if not isinstance(data, dict) or not isinstance(data.get("info"), dict):
+            return None
+        try:
+            age = time.time() - float(data.get("t") or 0)
+        except (TypeError, ValueError):
+            return None
+        if 0 <= age < self.profile["component_cache_hours"] * 3600:
+            return dict(data["info"], age=age)
+        return None
+
+    def start_component_analysis(self):
+        lines = []
+        runner = self.runner_cls(lines.append)
+        runner.background = self.background
+        self.log("[INFO] Analyzing the component store in the background...")
+        self.analysis_job = BackgroundJob(self._analyze_component_store, runner, lines, cancel=runner.request_cancel_all)
+        self.analysis_job.start()
+
+    def _analyze_component_store(self, runner, lines):
+        result = runner.run_cmd(["DISM", "/Online", "/Cleanup-Image", "/AnalyzeComponentStore"])
+        info = parse_component_store(lines) if result == "ok" else None
+        if info and not self.dry_run:
+            JsonStore(COMPONENT_STORE_CACHE).save({"t": time.time(), "info": info})
+        return info
+
+    def component_store_info(self):
+        """Cached or fresh analysis for the cleanup step; None if unavailable."""
+        info = self.cached_component_store()
+        if info is not None:
+            self.log(f"[INFO] Component store analysis from cache ({info['age'] / 3600:.1f} h old).")
+            return info
+        job = self.analysis_job
+        if job is None:
+            self.start_component_analysis()
+            job = self.analysis_job
+        if not job.done():
+            self.log("[INFO] Waiting for the component store analysis...")
+        if not job.wait(self.runner.cancel_all_requested):
+            return None
+        if job.error:
+            self.log(f"[WARN] Component store analysis failed: {job.error}")
+        else:
+            self.log(f"[INFO] Component store analyzed in {job.secs:.1f}s (waited {job.waited:.1f}s).")
+        return job.result
+
+    # ----- health verdicts -----
+    def run_health_step(self, key: str, tool: str, cmd):
+        """Run a DISM/SFC command; returns (result, verdict, findings) and records the verdict."""
+        found = set()
+
+        def tee(line):
+            found.update(match_findings(tool, line))
+            self.output(line)
+
+        self.runner.output_cb = tee
+        t0 = time.perf_counter()
+        try:
+            result = self.run_command_step(cmd)
+        finally:
+            self.runner.output_cb = self.output
+        verdict = health_verdict({kind for kind, _ in found}) if result == "ok" else None
+        self._health_ran.add(key)
+        if verdict:
+            self.health.setdefault("secs", {})[key] = round(time.perf_counter() - t0, 1)
+            self.health[key] = {"t": time.time(), "verdict": verdict}
+            self._save_health()
+        return result, verdict, {text for _, text in found}
+
+    def record_image_health(self, verdict: str, source: str):
+        self.health["image"] = {"t": time.time(), "verdict": verdict, "source": source}
+        self._save_health()
+
+    def _save_health(self):
+        # Dry runs see stub output; their verdicts only live for the run.
+        if not self.dry_run:
+            JsonStore(HEALTH_STORE).save(self.health)
+
+    def fresh_image_health(self):
+        """The last image verdict if younger than ``health_max_age_hours``, else None."""
+        entry = self.health.get("image") or {}
+        age = (time.time() - (entry.get("t") or 0)) / 3600
+        if entry.get("verdict") and 0 <= age <= self.profile["health_max_age_hours"]:
+            return dict(entry, age=age)
+        return None
+
+    def health_decision(self, step: str, action: str, reason: str, saved: float = 0.0):
+        if saved > 0:
+            note = f" (saves about {format_duration(saved)})"
+        elif saved < 0:
+            note = f" (costs about {format_duration(saved)})"
+        else:
+            note = ""
+        self.log(f"[PLAN] {action} {step}: {reason}{note}.")
+        self._health_saved += saved
+        self.journal_write("health_decision", step=step, action=action, reason=reason, saved_secs=round(saved, 1))
+
+    def _estimate(self, key: str) -> float:
+        return (self.health.get("secs") or {}).get(key) or HEALTH_STEP_ESTIMATES[key]
+
+    # ----- step implementations -----
+    def step_cleanup_targets(self):
+        self.runner.reset_flags_for_step()
+        targets = []
+        for key in self.profile["targets"]:
+            t = CLEANUP_TARGETS_BY_KEY[key]
+            if t.requires_admin and not is_admin() and not self.dry_run:
+                self.log(f"[WARN] {t.key} cleanup needs Admin. Skipping.")
+                continue
+            targets.append(t)
+
+        if self.dry_run:
+            plan = scan_cleanup_targets(targets, self.should_abort_now, background=self.background)
+            for t in targets:
+                entries = plan.get(t.key) or []
+                found = sum(size for _, size in entries)
+                self.log(f"[INFO] (dry run) {t.key}: {len(entries)} item(s), {format_bytes(found)}")
+                self.journal_write("cleanup_target", target=t.key, found=found, freed=0, failed=0, errors={})
+            return "cancel" if self.runner.cancel_all_requested() else "ok"
+
+        services = []
+        for t in targets:
+            services.extend(s for s in t.stop_services if s not in services)
+
+        stopped = []
+        result = "ok"
+        try:
+            for name in services:
+                result = self.run_command_step(["net", "stop", name])
+                if result in ("cancel", "skip"):
+                    return result
+                stopped.append(name)
+
+            run_cleanup_targets(
+                targets,
+                self.log,
+                self.should_abort_now,
+                native=self.profile["native_delete"],
+                on_target=self._on_target,
+                background=self.background,
+            )
+        finally:
+            start_services(reversed(stopped), self.log)
+
+        if self.runner.cancel_all_requested():
+            return "cancel"
+        if self.runner.skip_requested():
+            return "skip"
+        return result
+
+    def step_clear_recycle(self):
+        self.runner.reset_flags_for_step()
+        if self.dry_run:
+            self.log("[INFO] (dry run) Recycle Bin left untouched.")
+            return "ok"
+        clear_recycle_bin(self.log)
+        return "ok"
+
+    def step_flush_dns(self):
+        return self.run_network_step("Flush DNS Cache", [["ipconfig", "/flushdns"]])
+
+    def step_dism_component_cleanup(self):
+        self.runner.reset_flags_for_step()
+        if self.profile["component_analyze"]:
+            info = self.component_store_info()
+            if self.runner.cancel_all_requested():
+                return "cancel"
+            run, reason = component_cleanup_decision(info, int(self.profile["component_min_mb"] * 1024 * 1024))
+            self.journal_write("component_store", info=info, run=run, reason=reason)
+            if not run:
+                self.log(f"[OK] Component Cleanup not needed: {reason}.")
+                return "skip"
+            self.log(f"[INFO] Component store: {reason}.")
+        result = self.run_command_step(["DISM", "/Online", "/Cleanup-Image", "/StartComponentCleanup"])
+        if result == "ok" and not self.dry_run:
+            JsonStore(COMPONENT_STORE_CACHE).save({})
+        return result
+
+    def step_dism_scanhealth(self):
+        result, verdict, _ = self.run_health_step(
+            "step_dism_scanhealth", "DISM", ["DISM", "/Online", "/Cleanup-Image", "/ScanHealth"]
+        )
+        if verdict:
+            self.record_image_health(verdict, "ScanHealth")
+        return result
+
+    def step_dism_restorehealth(self):
+        smart = self.profile["health_smart"]
+        if smart:
+            fresh = self.fresh_image_health()
+            if fresh and fresh["verdict"] == "ok":
+                self.health_decision(
+                    "DISM RestoreHealth",
+                    "Skipping",
+                    f"{fresh['source']} {fresh['age']:.1f} h ago found no corruption",
+                    self._estimate("step_dism_restorehealth"),
+                )
+                return "skip"
+            if fresh:
+                said = "found corruption" if fresh["verdict"] == "problem" else f"reported '{fresh['verdict']}'"
+                reason = f"{fresh['source']} {fresh['age']:.1f} h ago {said}"
+            else:
+                reason = f"no health verdict from the last {self.profile['health_max_age_hours']:g} h"
+            self.health_decision("DISM RestoreHealth", "Running", reason)
+        result, verdict, _ = self.run_health_step(
+            "step_dism_restorehealth", "DISM", ["DISM", "/Online", "/Cleanup-Image", "/RestoreHealth"]
+        )
+        if verdict:
+            self.record_image_health("ok" if verdict == "fixed" else verdict, "RestoreHealth")
+        if smart and verdict == "fixed" and self.profile["sfc"] and "step_sfc" in self._health_ran:
+            self.health_decision(
+                "SFC ScanNow",
+                "Re-running",
+                "RestoreHealth repaired the image after SFC had already used it",
+                -self._estimate("step_sfc"),
+            )
+            self._followups.append(Step("SFC ScanNow (after repair)", self.step_sfc))
+        return result
+
+    def step_sfc(self):
+        result, _, findings = self.run_health_step("step_sfc", "SFC", ["sfc", "/scannow"])
+        if not self.profile["health_smart"] or SFC_UNREPAIRED not in findings:
+            return result
+        # SFC found damage it could not repair from the component store: the
+        # image itself is bad, whatever an earlier verdict said.
+        self.record_image_health("problem", "SFC")
+        repaired_since = "step_dism_restorehealth" in self._health_ran
+        # only if RestoreHealth is part of this run's plan (pre-flight may have dropped it)
+        if "step_dism_restorehealth" in self._planned and not repaired_since:
+            self.health_decision(
+                "DISM RestoreHealth",
+                "Adding",
+                "SFC could not repair files from the component store",
+                -self._estimate("step_dism_restorehealth"),
+            )
+            self._followups.append(Step("DISM RestoreHealth", self.step_dism_restorehealth))
+        return result
+
+    def step_chkdsk(self):
+        drive = self.profile["chkdsk_drive"]
+        if self.profile["chkdsk_mode"] == "scan":
+            return self.run_command_step(["chkdsk", drive])
+        self.log("[INFO] Fix mode may require restart (Windows may ask to schedule it).")
+        return self.run_command_step(["cmd", "/c", f"chkdsk {drive} /f"])
+
+    def step_reset_network(self):
+        r = self.run_network_step(
+            "Reset Network Stack", [["netsh", "winsock", "reset"], ["netsh", "int", "ip", "reset"]]
+        )
+        if r == "ok" and self.profile["net_measure"] and not self.dry_run:
+            self.log("[INFO] Winsock and TCP/IP resets take full effect after a restart.")
+        return r
+
+    # ----- network measurement -----
+    def _measure_network(self) -> dict:
+        p = self.profile
+        with PROFILER.timer("net.measure"):
+            return measure_network(
+                p["net_dns_names"], p["net_tcp_targets"], p["net_dns_server"], p["net_samples"], p["net_timeout"]
+            )
+
+    def run_network_step(self, name: str, cmds) -> str:
+        """Run ``cmds`` between two network measurements and log the deltas.
+
+        A measurement taken after a previous network step in the last 30s
+        serves as this step's "before".
+        """
+        if not self.profile["net_measure"]:
+            result = "ok"
+            for cmd in cmds:
+                result = self.run_command_step(cmd)
+                if result in ("cancel", "skip"):
+                    break
+            return result
+
+        if self._net_last and time.monotonic() - self._net_last[0] < 30:
+            before = self._net_last[1]
+        else:
+            self.log("[NET] Measuring DNS and connection times...")
+            before = self._measure_network()
+            if before["dns_server"]:
+                self.log(f"[NET] DNS queries go to {before['dns_server']} directly.")
+            else:
+                self.log("[NET] No DNS server found; timing the system resolver, first lookups only.")
+
+        result = "ok"
+        for cmd in cmds:
+            result = self.run_command_step(cmd)
+            if result in ("cancel", "skip"):
+                return result
+
+        after = self._measure_network()
+        self._net_last = (time.monotonic(), after)
+        rows = network_deltas(before, after)
+        for row in rows:
+            self.log(format_network_delta(row))
+        self.journal_write("network", step=name, rows=rows, before_secs=before["secs"], after_secs=after["secs"])
+        return result
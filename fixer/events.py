@@ -0,0 +1,332 @@
+"""Typed run events and the bus that fans them out to subscribers.
+
+The engine publishes events instead of calling one ``log_cb(str)`` per
+line. Every subscriber gets its own bounded queue: progress is coalesced
+per step (only the latest fraction is kept until the subscriber drains),
+consecutive output lines are merged into one chunk, and a subscriber that
+falls behind either loses events (``policy="drop"``, reported as one
+``Dropped`` event) or makes the producer wait (``policy="block"``, for
+sinks that must see everything). Only plain messages, output and progress
+count against those limits; step/run boundaries, bytes freed and warnings
+are always queued, since their number is bounded by the plan. Publishing
+never calls subscriber code.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class StepStarted:
+    index: int
+    total: int
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class StepFinished:
+    index: int
+    name: str
+    result: str
+    secs: float
+
+
+@dataclass(frozen=True, slots=True)
+class RunFinished:
+    status: str
+
+
+@dataclass(frozen=True, slots=True)
+class Progress:
+    step: str
+    fraction: float
+
+
+@dataclass(frozen=True, slots=True)
+class BytesFreed:
+    target: str
+    freed: int
+    found: int
+
+
+@dataclass(frozen=True, slots=True)
+class LogLine:
+    """An engine message; ``level`` comes from its prefix ("warn" for [WARN] ...)."""
+
+    text: str
+    level: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class WarningLogged(LogLine):
+    """A [WARN] or [ERROR] message."""
+
+
+@dataclass(frozen=True, slots=True)
+class OutputChunk:
+    lines: tuple
+
+
+@dataclass(frozen=True, slots=True)
+class Dropped:
+    count: int
+
+
+LEVEL_PREFIXES = (
+    ("[ERROR]", "error"),
+    ("[WARN]", "warn"),
+    ("[OK]", "ok"),
+    ("[INFO]", "info"),
+    ("[PLAN]", "plan"),
+    ("[NET]", "net"),
+    ("===", "header"),
+    ("---", "header"),
+)
+
+_PERCENT_RE = re.compile(r"(\d{1,3}(?:\.\d+)?)\s?%")
+
+
+def log_line(msg: str) -> LogLine:
+    head = msg.lstrip()[:8]
+    for prefix, level in LEVEL_PREFIXES:
+        if head.startswith(prefix):
+            return (WarningLogged if level in ("warn", "error") else LogLine)(msg, level)
+    return LogLine(msg)
+
+
+def parse_progress(line: str):
+    """Fraction from DISM/SFC/CHKDSK style "45.3%" output, or None."""
+    m = _PERCENT_RE.search(line)
+    if not m:
+        return None
+    value = float(m.group(1))
+    return value / 100 if value <= 100 else None
+
+
+# Events a lagging "drop" subscriber may lose (output lines are droppable too).
+DROPPABLE = (LogLine, Progress)
+
+
+class Subscription:
+    """One subscriber's pending events.
+
+    Pull subscribers call ``drain()`` on their own tick; with a ``callback``
+    a delivery thread calls it with each batch every ``interval`` seconds
+    (the thread exits after a few idle seconds and restarts on demand).
+    """
+
+    IDLE_EXIT = 2.0
+
+    def __init__(
+        self, bus, callback=None, max_events=1000, max_lines=20000, policy="drop", interval=0.05, timeout=5.0
+    ):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"unknown policy {policy!r}")
+        self.bus = bus
+        self.callback = callback
+        self.max_events = max_events
+        self.max_lines = max_lines
+        self.policy = policy
+        self.interval = interval
+        self.timeout = timeout
+        self.dropped = 0
+        self.closed = False
+        self._cond = threading.Condition()
+        self._queue = deque()  # [event] or [list of output lines]
+        self._events = 0  # queued entries that count against max_events
+        self._lines = 0
+        self._progress = {}  # step -> its queued entry
+        self._thread = None
+        self._delivering = False
+
+    # ----- producer side -----
+    def _room(self, lines: int) -> bool:
+        if lines:
+            return self._lines + lines <= self.max_lines
+        return self._events < self.max_events
+
+    def _wait_for_room(self, lines: int) -> bool:
+        if self._room(lines):
+            return True
+        if self.policy == "block":
+            self._wake()  # a parked delivery thread has to be running to make room
+            deadline = time.monotonic() + self.timeout
+            while not self._room(lines) and not self.closed:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self._cond.wait(left)
+            if self._room(lines):
+                return True
+        self.dropped += lines or 1
+        return False
+
+    def offer(self, ev):
+        kind = type(ev)
+        with self._cond:
+            if self.closed:
+                return
+            if kind is Progress:
+                entry = self._progress.get(ev.step)
+                if entry is not None:
+                    entry[0] = ev
+                    return
+            elif kind is StepFinished:
+                self._progress.pop(ev.name, None)
+            if kind in DROPPABLE:
+                if not self._wait_for_room(0):
+                    return
+                self._events += 1
+            entry = [ev]
+            self._queue.append(entry)
+            if kind is Progress:
+                self._progress[ev.step] = entry
+            self._wake()
+
+    def offer_lines(self, lines):
+        with self._cond:
+            if self.closed or not self._wait_for_room(len(lines)):
+                return
+            tail = self._queue[-1] if self._queue else None
+            if tail is not None and type(tail[0]) is list:
+                tail[0].extend(lines)
+            else:
+                if not self._wait_for_room(0):
+                    self.dropped += len(lines) - 1
+                    return
+                self._queue.append([list(lines)])
+                self._events += 1
+            self._lines += len(lines)
+            self._wake()
+
+    def _wake(self):
+        if self.callback is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._deliver_loop, daemon=True)
+            self._thread.start()
+        self._cond.notify_all()
+
+    # ----- consumer side -----
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def _take(self):
+        out = []
+        for (item,) in self._queue:
+            out.append(OutputChunk(tuple(item)) if type(item) is list else item)
+        if self.dropped:
+            out.append(Dropped(self.dropped))
+            self.dropped = 0
+        self._queue.clear()
+        self._progress.clear()
+        self._events = 0
+        self._lines = 0
+        self._cond.notify_all()
+        return out
+
+    def drain(self, wait: float = 0) -> list:
+        """Everything queued so far, coalesced, optionally waiting up to ``wait`` for something."""
+        with self._cond:
+            if wait and not self._queue and not self.dropped:
+                self._cond.wait(wait)
+            return self._take()
+
+    def _deliver_loop(self):
+        idle_since = time.monotonic()
+        while True:
+            with self._cond:
+                if not self._queue and not self.dropped:
+                    self._cond.wait(self.interval)
+                idle = not self._queue and not self.dropped
+                if self.closed or (idle and time.monotonic() - idle_since > self.IDLE_EXIT):
+                    self._thread = None
+                    self._cond.notify_all()
+                    return
+                batch = self._take()
+                self._delivering = bool(batch)
+            if batch:
+                try:
+                    self.callback(batch)
+                except Exception:
+                    pass
+                idle_since = time.monotonic()
+                with self._cond:
+                    self._delivering = False
+                    self._cond.notify_all()
+            time.sleep(self.interval)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until a callback subscriber has delivered everything queued."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.callback is not None and (self._queue or self.dropped or self._delivering):
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                if self._thread is None:
+                    self._wake()
+                self._cond.wait(min(left, self.interval))
+            return True
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    def __init__(self):
+        self._subs = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback=None, **kw) -> Subscription:
+        sub = Subscription(self, callback, **kw)
+        with self._lock:
+            self._subs = self._subs + (sub,)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subs = tuple(s for s in self._subs if s is not sub)
+
+    def publish(self, ev):
+        for sub in self._subs:
+            sub.offer(ev)
+
+    def publish_output(self, *lines: str):
+        for sub in self._subs:
+            sub.offer_lines(lines)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait for the "block" subscribers; dropping ones are never waited on."""
+        deadline = time.monotonic() + timeout
+        subs = [sub for sub in self._subs if sub.policy == "block"]
+        return all(sub.flush(max(0.0, deadline - time.monotonic())) for sub in subs)
+
+
+def text_sink(log_cb, steps: bool = False):
+    """Adapt a ``log_cb(str)`` to a subscriber callback: text events, one call per batch.
+
+    With ``steps`` each StepStarted becomes a "--- Step i/n: name ---" line.
+    """
+
+    def deliver(events):
+        text = []
+        for ev in events:
+            kind = type(ev)
+            if kind is StepStarted and steps:
+                text.append(f"--- Step {ev.index}/{ev.total}: {ev.name} ---")
+            elif kind is LogLine or kind is WarningLogged:
+                text.append(ev.text)
+            elif kind is OutputChunk:
+                text.extend(ev.lines)
+            elif kind is Dropped:
+                text.append(f"[WARN] {ev.count} log line(s) dropped (output fell behind).")
+        if text:
+            log_cb("\n".join(text))
+
+    return deliver
@@ -0,0 +1,298 @@
+"""Fleet agent (JSON-RPC over HTTP) and controller."""
+
+import os
+import json
+import time
+import threading
+import platform
+import http.server
+from datetime import datetime
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from .engine import StepEngine
+from .runner import StubCommandRunner
+
+
+AGENT_DEFAULT_PORT = 8765
+
+
+class AgentError(Exception):
+    pass
+
+
+class FleetAgent:
+    """Exposes one StepEngine over a small JSON-RPC 2.0 API (POST /rpc).
+
+    Methods: start(profile), status(), logs(since, wait, limit), skip(),
+    cancel(), report(). Log lines are numbered so a controller can stream
+    them by long-polling ``logs`` with the last number it saw; only the most
+    recent ``max_lines`` are kept.
+    """
+
+    def __init__(self, stub: bool = False, token=None, max_lines: int = 20000):
+        self.stub = stub
+        self.token = token
+        self.max_lines = max_lines
+        self._cond = threading.Condition()
+        self._lines = []
+        self._base = 0
+        self._run = None
+        self._thread = None
+        self.engine = None
+        self._new_engine()
+
+    def _new_engine(self):
+        if self.stub:
+            self.engine = StepEngine(self._log, runner_cls=StubCommandRunner, dry_run=True)
+        else:
+            self.engine = StepEngine(self._log)
+
+    def _log(self, msg: str):
+        with self._cond:
+            self._lines.extend(str(msg).split("\n"))
+            overflow = len(self._lines) - self.max_lines
+            if overflow > 0:
+                del self._lines[:overflow]
+                self._base += overflow
+            self._cond.notify_all()
+
+    def _running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ----- RPC methods -----
+    def start(self, profile=None):
+        if profile is not None and not isinstance(profile, dict):
+            raise TypeError("profile must be an object")
+        with self._cond:
+            if self._running():
+                raise AgentError("a run is already in progress")
+            self._new_engine()
+            steps = self.engine.build_steps(profile or {})
+            if not steps:
+                raise AgentError("profile selects no steps")
+            self._lines = []
+            self._base = 0
+            self._run = {
+                "run_id": datetime.now().strftime("%Y%m%d-%H%M%S-") + f"{os.getpid()}",
+                "state": "running",
+                "status": None,
+                "started": time.time(),
+                "finished": None,
+                "total": len(steps),
+                "index": 0,
+                "step": None,
+                "profile": self.engine.profile,
+            }
+            self._thread = threading.Thread(target=self._worker, args=(steps,), daemon=True)
+            self._thread.start()
+            return {"run_id": self._run["run_id"], "steps": [n for n, _ in steps]}
+
+    def _worker(self, steps):
+        def _on_step(idx, total, name):
+            with self._cond:
+                self._run.update(index=idx, total=total, step=name)
+                self._cond.notify_all()
+
+        status = self.engine.run(steps, on_step=_on_step)
+        with self._cond:
+            self._run.update(state="finished", status=status, finished=time.time())
+            self._cond.notify_all()
+
+    def status(self):
+        with self._cond:
+            if not self._run:
+                return {"state": "idle"}
+            return {k: v for k, v in self._run.items() if k != "profile"}
+
+    def logs(self, since: int = 0, wait: float = 0, limit: int = 5000):
+        since, limit = int(since), int(limit)
+        deadline = time.time() + min(float(wait), 30.0)
+        with self._cond:
+            while True:
+                end = self._base + len(self._lines)
+                finished = not self._run or self._run["state"] == "finished"
+                if since < end or finished:
+                    break
+                left = deadline - time.time()
+                if left <= 0:
+                    break
+                self._cond.wait(left)
+            start = max(since, self._base)
+            lines = self._lines[start - self._base : start - self._base + int(limit)]
+            nxt = start + len(lines)
+            return {
+                "lines": lines,
+                "next": nxt,
+                "dropped": start - since if since < self._base else 0,
+                "finished": finished and nxt >= self._base + len(self._lines),
+                "index": self._run["index"] if self._run else 0,
+                "total": self._run["total"] if self._run else 0,
+                "step": self._run["step"] if self._run else None,
+            }
+
+    def skip(self):
+        if self._running():
+            self.engine.runner.request_skip_step()
+        return {"ok": True}
+
+    def cancel(self):
+        if self._running():
+            self.engine.runner.request_cancel_all()
+        return {"ok": True}
+
+    def report(self):
+        with self._cond:
+            if not self._run:
+                raise AgentError("no run yet")
+            rep = dict(self._run)
+            rep["steps"] = list(self.engine.results)
+            rep["host"] = platform.node()
+            rep["log_lines"] = self._base + len(self._lines)
+            last = self.engine.last_report
+            if last and rep.get("state") != "running":
+                data = last["data"]
+                rep["summary"] = {k: data[k] for k in ("drives", "reclaimed", "findings", "failures")}
+            return rep
+
+    METHODS = ("start", "status", "logs", "skip", "cancel", "report")
+
+    def dispatch(self, method: str, params):
+        if method not in self.METHODS:
+            return None, {"code": -32601, "message": f"unknown method: {method}"}
+        try:
+            if isinstance(params, dict):
+                return getattr(self, method)(**params), None
+            return getattr(self, method)(*(params or [])), None
+        except (TypeError, ValueError) as e:
+            return None, {"code": -32602, "message": f"invalid params: {e}"}
+        except AgentError as e:
+            return None, {"code": -32000, "message": str(e)}
+        except Exception as e:
+            return None, {"code": -32603, "message": f"internal error: {type(e).__name__}: {e}"}
+
+    def make_server(self, host: str = "127.0.0.1", port: int = AGENT_DEFAULT_PORT):
+        agent = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, code, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if self.path != "/rpc":
+                    return self._reply(404, {"error": "not found"})
+                if agent.token and self.headers.get("Authorization") != f"Bearer {agent.token}":
+                    return self._reply(401, {"error": "unauthorized"})
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    req = json.loads(self.rfile.read(length).decode("utf-8"))
+                except Exception:
+                    return self._reply(400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "parse error"}})
+                if not isinstance(req, dict):
+                    return self._reply(
+                        400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "invalid request"}}
+                    )
+                result, error = agent.dispatch(req.get("method"), req.get("params"))
+                resp = {"jsonrpc": "2.0", "id": req.get("id")}
+                if error:
+                    resp["error"] = error
+                else:
+                    resp["result"] = result
+                self._reply(200, resp)
+
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        return server
+
+
+class AgentClient:
+    def __init__(self, address: str, token=None, timeout: float = 45):
+        if "://" not in address:
+            address = f"http://{address}"
+        self.url = address.rstrip("/") + "/rpc"
+        self.token = token
+        self.timeout = timeout
+        self._id = 0
+
+    def call(self, method: str, **params):
+        self._id += 1
+        body = json.dumps({"jsonrpc": "2.0", "id": self._id, "method": method, "params": params}).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        req = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        with urllib.request.urlopen(req, timeout=self.timeout) as r:
+            resp = json.loads(r.read().decode("utf-8"))
+        if resp.get("error"):
+            raise AgentError(resp["error"].get("message", "agent error"))
+        return resp.get("result")
+
+
+def run_fleet(agents, profile, concurrency: int = 4, token=None, log_cb=print, poll_wait: float = 5.0):
+    """Run ``profile`` on every agent, at most ``concurrency`` at a time.
+
+    Agent log lines are forwarded to ``log_cb`` prefixed with the agent
+    address. Returns {"agents": {address: report-or-error}, "summary": {...}}.
+    """
+    results = {}
+    active = {}
+    lock = threading.Lock()
+    done = [0]
+
+    def _one(address):
+        client = AgentClient(address, token=token, timeout=poll_wait + 30)
+        try:
+            client.call("start", profile=profile)
+            with lock:
+                active[address] = client
+            since = 0
+            while True:
+                r = client.call("logs", since=since, wait=poll_wait)
+                for line in r["lines"]:
+                    log_cb(f"[{address}] {line}")
+                if r.get("dropped"):
+                    log_cb(f"[{address}] ... {r['dropped']} line(s) dropped ...")
+                since = r["next"]
+                if r["finished"]:
+                    break
+            rep = client.call("report")
+        except Exception as e:
+            rep = {"status": "unreachable" if isinstance(e, OSError) else "error", "error": str(e)}
+        with lock:
+            active.pop(address, None)
+            results[address] = rep
+            done[0] += 1
+            log_cb(f"[fleet] {address}: {rep.get('status')} ({done[0]}/{len(agents)} done)")
+        return rep
+
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="fleet")
+    try:
+        for f in [pool.submit(_one, a) for a in agents]:
+            f.result()
+    except KeyboardInterrupt:
+        log_cb("[fleet] Interrupted: cancelling active agents...")
+        with lock:
+            clients = list(active.values())
+        for c in clients:
+            try:
+                c.call("cancel")
+            except Exception:
+                pass
+        raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    summary = {}
+    for rep in results.values():
+        key = rep.get("status") or "unknown"
+        summary[key] = summary.get(key, 0) + 1
+    return {"agents": results, "summary": summary}
@@ -0,0 +1,90 @@
+"""Translation catalogs (lang/<code>.json) and their fallback chains."""
+
+import os
+import json
+import glob
+
+from .storage import app_data_path, resource_path
+
+
+LANG_DIR = "lang"
+BASE_LANGUAGE = "en"
+
+
+class Catalog:
+    """Translation catalogs compiled into one flat dict per language.
+
+    Catalogs are ``lang/<code>.json`` next to the app plus any in
+    %APPDATA%\\WindowsFixer\\lang (which may add languages or override
+    strings). Each is a flat {key: text} object; ``_meta`` holds the display
+    "name" and an optional "fallback" code. Lookups walk
+    code -> fallback(s) -> region parent ("pt-BR" -> "pt") -> English once,
+    at compile time; keys missing everywhere are recorded in ``missing``.
+    """
+
+    def __init__(self, dirs=None):
+        self.dirs = dirs if dirs is not None else [resource_path(LANG_DIR), app_data_path(LANG_DIR)]
+        self._files = {}
+        self._compiled = {}
+        self.missing = {}
+        for folder in self.dirs:
+            for path in sorted(glob.glob(os.path.join(folder, "*.json"))):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if isinstance(data, dict):
+                    code = os.path.splitext(os.path.basename(path))[0]
+                    self._files.setdefault(code, {}).update(data)
+
+    def languages(self) -> dict:
+        """{code: display name} of every catalog found."""
+        return {code: (data.get("_meta") or {}).get("name", code) for code, data in sorted(self._files.items())}
+
+    def chain(self, code: str) -> list:
+        out = []
+        while code and code not in out:
+            out.append(code)
+            meta = (self._files.get(code) or {}).get("_meta") or {}
+            code = meta.get("fallback") or (code.rsplit("-", 1)[0] if "-" in code else None)
+        if BASE_LANGUAGE not in out:
+            out.append(BASE_LANGUAGE)
+        return out
+
+    def compile(self, code: str) -> dict:
+        strings = self._compiled.get(code)
+        if strings is None:
+            strings = {}
+            for c in reversed(self.chain(code)):
+                strings.update(self._files.get(c) or {})
+            strings.pop("_meta", None)
+            self._compiled[code] = strings
+        return strings
+
+    def note_missing(self, code: str, key: str) -> bool:
+        """Record a key with no text in any catalog; True the first time."""
+        seen = self.missing.setdefault(code, set())
+        if key in seen:
+            return False
+        seen.add(key)
+        return True
+
+    def report(self) -> dict:
+        """{code: keys that exist in English but not in that catalog's own chain}."""
+        base = set(self._files.get(BASE_LANGUAGE) or {}) - {"_meta"}
+        out = {}
+        for code in self._files:
+            own = set()
+            for c in [c for c in self.chain(code) if c != BASE_LANGUAGE] or [code]:
+                own.update(self._files.get(c) or {})
+            out[code] = sorted(base - own)
+        return out
+
+
+def lang_report(catalog=None, out=print) -> int:
+    """Print the untranslated keys per catalog; 1 if any are missing."""
+    gaps = (catalog or Catalog()).report()
+    for code, keys in gaps.items():
+        out(f"{code}: {len(keys)} missing" + "".join(f"\n  {k}" for k in keys))
+    return 1 if any(gaps.values()) else 0
@@ -0,0 +1,63 @@
+"""Per-run JSON-lines journal."""
+
+import os
+import json
+import glob
+import time
+import threading
+from datetime import datetime
+
+from .storage import app_data_path
+
+
+class RunJournal:
+    """Append-only JSON-lines record of one run (steps, results, metrics)."""
+
+    KEEP = 20
+
+    def __init__(self, path: str, mode: str = "a"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fh = open(path, mode, encoding="utf-8")
+
+    @classmethod
+    def create(cls):
+        folder = app_data_path("journal")
+        os.makedirs(folder, exist_ok=True)
+        old = sorted(glob.glob(os.path.join(folder, "run-*.jsonl")))
+        for f in old[: max(0, len(old) - cls.KEEP + 1)]:
+            base = f[: -len(".jsonl")]
+            # run reports are written next to their journal
+            for path in (f, base + ".html", base + ".json"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        base = os.path.join(folder, datetime.now().strftime("run-%Y%m%d-%H%M%S"))
+        # Runs started in the same second get run-<time>_01, _02...: "_" sorts
+        # after ".", so name order stays run order for the report lookup.
+        n = 0
+        while True:
+            try:
+                return cls(base + (f"_{n:02d}" if n else "") + ".jsonl", mode="x")
+            except FileExistsError:
+                n += 1
+
+    def write(self, kind: str, **fields):
+        rec = {"t": round(time.time(), 3), "type": kind}
+        rec.update(fields)
+        line = json.dumps(rec, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            if self._fh:
+                self._fh.write(line + "\n")
+
+    def flush(self):
+        with self._lock:
+            if self._fh:
+                self._fh.flush()
+
+    def close(self):
+        with self._lock:
+            if self._fh:
+                self._fh.close()
+                self._fh = None
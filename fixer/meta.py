@@ -0,0 +1,4 @@
+"""Application identity shared by the engine and the GUI."""
+
+APP_ID = "WindowsFixer"
+APP_VERSION = "v1.0.0"
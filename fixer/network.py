@@ -0,0 +1,241 @@
+"""DNS and TCP latency probes around the network steps."""
+
+import os
+import time
+import ctypes
+import socket
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# A target host of "resolver" stands for the DNS server the probes query.
+RESOLVER_HOST = "resolver"
+
+
+def _split_hostport(text: str, default_port: int):
+    """"host", "host:port", "[v6]:port" -> (host, port)."""
+    text = text.strip()
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        return host, int(rest[1:]) if rest.startswith(":") else default_port
+    if text.count(":") == 1:
+        host, port = text.split(":")
+        return host, int(port)
+    return text, default_port
+
+
+def _dns_packet(name: str):
+    qid = int.from_bytes(os.urandom(2), "big")
+    labels = b"".join(bytes([len(p)]) + p for p in name.rstrip(".").encode("idna").split(b"."))
+    # header: id, RD flag, 1 question; then QNAME, QTYPE=A, QCLASS=IN
+    return qid, struct.pack(">HHHHHH", qid, 0x0100, 1, 0, 0, 0) + labels + b"\0" + struct.pack(">HH", 1, 1)
+
+
+def _windows_dns_servers():
+    """DnsServerList from GetNetworkParams (the servers Windows itself queries)."""
+
+    class IP_ADDR_STRING(ctypes.Structure):
+        pass
+
+    IP_ADDR_STRING._fields_ = [
+        ("Next", ctypes.POINTER(IP_ADDR_STRING)),
+        ("IpAddress", ctypes.c_char * 16),
+        ("IpMask", ctypes.c_char * 16),
+        ("Context", ctypes.c_ulong),
+    ]
+
+    class FIXED_INFO(ctypes.Structure):
+        _fields_ = [
+            ("HostName", ctypes.c_char * 132),
+            ("DomainName", ctypes.c_char * 132),
+            ("CurrentDnsServer", ctypes.POINTER(IP_ADDR_STRING)),
+            ("DnsServerList", IP_ADDR_STRING),
+            ("NodeType", ctypes.c_uint),
+            ("ScopeId", ctypes.c_char * 260),
+            ("EnableRouting", ctypes.c_uint),
+            ("EnableProxy", ctypes.c_uint),
+            ("EnableDns", ctypes.c_uint),
+        ]
+
+    size = ctypes.c_ulong(0)
+    get = ctypes.windll.iphlpapi.GetNetworkParams
+    get(None, ctypes.byref(size))  # ERROR_BUFFER_OVERFLOW, fills in the size
+    buf = ctypes.create_string_buffer(max(size.value, ctypes.sizeof(FIXED_INFO)))
+    if get(buf, ctypes.byref(size)) != 0:
+        return []
+    info = ctypes.cast(buf, ctypes.POINTER(FIXED_INFO)).contents
+    out, node = [], info.DnsServerList
+    while True:
+        addr = node.IpAddress.decode("ascii", "replace").strip()
+        if addr and addr != "0.0.0.0":
+            out.append(addr)
+        if not node.Next:
+            return out
+        node = node.Next.contents
+
+
+def system_dns_servers() -> list:
+    """The resolvers this machine is configured to use, best first; [] if unknown."""
+    try:
+        if os.name == "nt":
+            return _windows_dns_servers()
+        with open("/etc/resolv.conf", encoding="utf-8", errors="replace") as f:
+            return [p[1] for p in (line.split() for line in f) if len(p) >= 2 and p[0] == "nameserver"]
+    except (OSError, AttributeError, ValueError):
+        return []
+
+
+def _getaddrinfo_timed(name: str, timeout: float) -> float:
+    """System resolver lookup in ms; getaddrinfo has no timeout, so it runs in a helper thread."""
+    out = {}
+
+    def _lookup():
+        try:
+            socket.getaddrinfo(name, None)
+            out["ms"] = (time.perf_counter() - t0) * 1000
+        except OSError as e:
+            out["error"] = e
+
+    t0 = time.perf_counter()
+    th = threading.Thread(target=_lookup, daemon=True)
+    th.start()
+    th.join(timeout)
+    if "error" in out:
+        raise out["error"]
+    if "ms" not in out:
+        raise TimeoutError(f"no answer in {timeout:g}s")
+    return out["ms"]
+
+
+def probe_dns(name: str, server: str = "", timeout: float = 2.0) -> float:
+    """Resolve ``name`` and return the time taken in ms.
+
+    With ``server`` ("ip" or "ip:port") one A query goes straight to it over
+    UDP; otherwise the system resolver is used, cache included.
+    """
+    if not server:
+        return _getaddrinfo_timed(name, timeout)
+
+    host, port = _split_hostport(server, 53)
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    qid, packet = _dns_packet(name)
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        t0 = time.perf_counter()
+        sock.sendto(packet, (host, port))
+        while True:
+            data, _ = sock.recvfrom(4096)
+            if len(data) >= 12 and struct.unpack(">H", data[:2])[0] == qid:
+                break
+        ms = (time.perf_counter() - t0) * 1000
+    rcode = data[3] & 0x0F
+    if rcode:
+        raise OSError(f"DNS rcode {rcode}")
+    return ms
+
+
+def probe_tcp(target: str, timeout: float = 2.0) -> float:
+    """Time a TCP handshake to ``target`` ("host:port") in ms, DNS excluded."""
+    host, port = _split_hostport(target, 443)
+    family, kind, proto, _, addr = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+    with socket.socket(family, kind, proto) as sock:
+        sock.settimeout(timeout)
+        t0 = time.perf_counter()
+        sock.connect(addr)
+        return (time.perf_counter() - t0) * 1000
+
+
+def _probe_series(fn, samples: int) -> dict:
+    times, error = [], None
+    for _ in range(samples):
+        try:
+            times.append(fn())
+        except (OSError, ValueError, UnicodeError) as e:
+            error = str(e) or type(e).__name__
+    out = {"ok": len(times), "fail": samples - len(times)}
+    if times:
+        out.update(first_ms=round(times[0], 2), median_ms=round(sorted(times)[len(times) // 2], 2))
+    if error:
+        out["error"] = error
+    return out
+
+
+def measure_network(dns_names, tcp_targets, dns_server: str = "", samples: int = 3, timeout: float = 2.0) -> dict:
+    """Probe every target concurrently; samples of one target run back to back.
+
+    DNS queries go straight to ``dns_server``, or to the first configured
+    system resolver when it is empty, so the OS resolver cache (which a DNS
+    flush empties) does not skew before/after numbers. Only when no resolver
+    can be found is the system resolver used. A TCP target host of
+    "resolver" is replaced by the DNS server in use.
+
+    Returns {"dns": {name: stats}, "tcp": {target: stats}, "dns_server": server
+    queried ("" for the system resolver), "secs": wall time} where stats has
+    ok/fail counts, first_ms, median_ms and the last error.
+    """
+    if not dns_server:
+        dns_server = next(iter(system_dns_servers()), "")
+    resolver = _split_hostport(dns_server, 53)[0] if dns_server else ""
+    targets = []
+    for t in tcp_targets:
+        host, port = _split_hostport(t, 53 if t.strip().startswith(RESOLVER_HOST) else 443)
+        if host == RESOLVER_HOST:
+            if not resolver:
+                continue
+            t = f"[{resolver}]:{port}" if ":" in resolver else f"{resolver}:{port}"
+        targets.append(t)
+    tcp_targets = targets
+    jobs = [("dns", n, lambda n=n: probe_dns(n, dns_server, timeout)) for n in dns_names]
+    jobs += [("tcp", t, lambda t=t: probe_tcp(t, timeout)) for t in tcp_targets]
+    out = {"dns": {}, "tcp": {}, "dns_server": dns_server}
+    t0 = time.perf_counter()
+    if jobs:
+        with ThreadPoolExecutor(max_workers=min(16, len(jobs))) as pool:
+            futures = [(kind, key, pool.submit(_probe_series, fn, samples)) for kind, key, fn in jobs]
+            for kind, key, fut in futures:
+                out[kind][key] = fut.result()
+    out["secs"] = round(time.perf_counter() - t0, 3)
+    return out
+
+
+def network_deltas(before: dict, after: dict) -> list:
+    """One row per target: {kind, target, before_ms, after_ms, delta_ms, before_fail, after_fail, basis}.
+
+    Medians are compared, except for DNS through the system resolver: its
+    later samples come from the OS cache, so only first lookups are compared
+    there (``basis`` "first").
+    """
+    rows = []
+    for kind in ("dns", "tcp"):
+        basis = "first" if kind == "dns" and not after.get("dns_server") else "median"
+        for key, a in after.get(kind, {}).items():
+            b = before.get(kind, {}).get(key, {})
+            bm, am = b.get(f"{basis}_ms"), a.get(f"{basis}_ms")
+            rows.append({
+                "kind": kind,
+                "target": key,
+                "basis": basis,
+                "before_ms": bm,
+                "after_ms": am,
+                "delta_ms": round(am - bm, 2) if bm is not None and am is not None else None,
+                "before_fail": b.get("fail", 0),
+                "after_fail": a.get("fail", 0),
+                "error": a.get("error"),
+            })
+    return rows
+
+
+def format_network_delta(row: dict) -> str:
+    def ms(v):
+        return "failed" if v is None else f"{v:.1f} ms"
+
+    line = f"[NET] {row['kind'].upper()} {row['target']}: {ms(row['before_ms'])} -> {ms(row['after_ms'])}"
+    if row["delta_ms"] is not None:
+        line += f" ({row['delta_ms']:+.1f} ms)"
+    if row.get("basis") == "first":
+        line += " [first lookup via the system resolver]"
+    if row["before_fail"] != row["after_fail"]:
+        line += f", failures {row['before_fail']} -> {row['after_fail']}"
+    if row["after_ms"] is None and row.get("error"):
+        line += f" ({row['error']})"
+    return line
@@ -0,0 +1,189 @@
+"""Pre-flight probes collected before a run."""
+
+import os
+import sys
+import time
+import shutil
+import subprocess
+import re
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+from .cleanup import format_bytes
+from .profiling import PROFILER
+from .system import list_drives
+
+
+LOW_DISK_BYTES = 5 * 1024**3
+LOW_DISK_RATIO = 0.05
+
+
+class Probe:
+    """One pre-flight check. ``fn()`` returns a JSON-able dict of findings."""
+
+    def __init__(self, name: str, fn, timeout: float = 10.0):
+        self.name = name
+        self.fn = fn
+        self.timeout = timeout
+
+
+def _service_info(name: str, timeout: float = 5.0) -> dict:
+    info = {}
+    for verb, field, key in (("query", "STATE", "state"), ("qc", "START_TYPE", "start")):
+        r = subprocess.run(["sc", verb, name], capture_output=True, text=True, timeout=timeout)
+        m = re.search(rf"{field}\s*:\s*\d+\s+(\w+)", r.stdout)
+        info[key] = m.group(1) if m else None
+    return info
+
+
+def _reg_key_exists(root, path: str) -> bool:
+    import winreg
+
+    try:
+        winreg.CloseKey(winreg.OpenKey(root, path))
+        return True
+    except OSError:
+        return False
+
+
+def probe_free_space() -> dict:
+    drives = {}
+    roots = [d + "\\" for d in list_drives()] if sys.platform == "win32" else ["/"]
+    for root in roots:
+        try:
+            u = shutil.disk_usage(root)
+        except OSError:
+            continue
+        drives[root.rstrip("\\")] = {"total": u.total, "free": u.free}
+    system = (os.environ.get("SystemDrive") or "C:") if sys.platform == "win32" else "/"
+    return {"drives": drives, "system": system}
+
+
+def probe_pending_reboot() -> dict:
+    if sys.platform != "win32":
+        return {"supported": False, "pending": False, "reasons": []}
+    import winreg
+
+    hklm = winreg.HKEY_LOCAL_MACHINE
+    reasons = []
+    if _reg_key_exists(hklm, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Component Based Servicing\RebootPending"):
+        reasons.append("CBS RebootPending")
+    if _reg_key_exists(hklm, r"SOFTWARE\Microsoft\Windows\CurrentVersion\WindowsUpdate\Auto Update\RebootRequired"):
+        reasons.append("Windows Update RebootRequired")
+    try:
+        with winreg.OpenKey(hklm, r"SYSTEM\CurrentControlSet\Control\Session Manager") as k:
+            if winreg.QueryValueEx(k, "PendingFileRenameOperations")[0]:
+                reasons.append("PendingFileRenameOperations")
+    except OSError:
+        pass
+    return {"supported": True, "pending": bool(reasons), "reasons": reasons}
+
+
+def probe_servicing_stack() -> dict:
+    if sys.platform != "win32":
+        return {"supported": False}
+    import winreg
+
+    return {
+        "supported": True,
+        "trustedinstaller": _service_info("TrustedInstaller"),
+        "packages_pending": _reg_key_exists(
+            winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Component Based Servicing\PackagesPending"
+        ),
+    }
+
+
+def probe_wu_services() -> dict:
+    if sys.platform != "win32":
+        return {"supported": False, "services": {}}
+    return {"supported": True, "services": {name: _service_info(name) for name in ("wuauserv", "bits", "cryptsvc")}}
+
+
+PREFLIGHT_PROBES = [
+    Probe("free_space", probe_free_space, timeout=5),
+    Probe("pending_reboot", probe_pending_reboot, timeout=5),
+    Probe("servicing_stack", probe_servicing_stack, timeout=15),
+    Probe("wu_services", probe_wu_services, timeout=15),
+]
+
+
+def run_probes(probes) -> dict:
+    """Run all probes at once; each gets its own timeout.
+
+    A probe that times out is reported as such and left to finish in the
+    background, so one hung ``sc`` call cannot hold up the run.
+    """
+    out = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, len(probes)), thread_name_prefix="probe")
+    try:
+        started = time.perf_counter()
+        futures = [(p, pool.submit(p.fn)) for p in probes]
+        for p, fut in futures:
+            left = p.timeout - (time.perf_counter() - started)
+            try:
+                out[p.name] = {"ok": True, "data": fut.result(timeout=max(0.0, left))}
+            except FuturesTimeout:
+                out[p.name] = {"ok": False, "error": f"timed out after {p.timeout:g}s"}
+            except Exception as e:
+                out[p.name] = {"ok": False, "error": str(e)}
+    finally:
+        pool.shutdown(wait=False)
+    return out
+
+
+class Preflight:
+    """Pre-flight snapshot, collected once per session (or after ``max_age``)."""
+
+    def __init__(self, probes=None, max_age: float = 900):
+        self.probes = probes
+        self.max_age = max_age
+        self._snapshot = None
+        self._taken = 0.0
+
+    def snapshot(self, force: bool = False) -> dict:
+        if force or self._snapshot is None or time.time() - self._taken > self.max_age:
+            with PROFILER.timer("preflight"):
+                self._snapshot = run_probes(PREFLIGHT_PROBES if self.probes is None else self.probes)
+            self._taken = time.time()
+        return self._snapshot
+
+    def update(self, results: dict):
+        """Merge fresh probe results into the cached snapshot."""
+        if self._snapshot is not None:
+            self._snapshot.update(results)
+
+
+def _probe_data(snapshot: dict, name: str) -> dict:
+    r = snapshot.get(name) or {}
+    if not r.get("ok"):
+        return {}
+    return r.get("data") or {}
+
+
+def system_disk_low(snapshot: dict) -> bool:
+    data = _probe_data(snapshot, "free_space")
+    d = (data.get("drives") or {}).get(data.get("system"))
+    if not d:
+        return False
+    return d["free"] < LOW_DISK_BYTES or d["free"] < d["total"] * LOW_DISK_RATIO
+
+
+def preflight_findings(snapshot: dict):
+    """Human-readable warnings for the log, one per problem found."""
+    notes = []
+    for name, r in snapshot.items():
+        if not r.get("ok"):
+            notes.append(f"[WARN] Pre-flight {name}: {r.get('error')}")
+    if _probe_data(snapshot, "pending_reboot").get("pending"):
+        reasons = ", ".join(_probe_data(snapshot, "pending_reboot").get("reasons") or [])
+        notes.append(f"[WARN] A reboot is pending ({reasons}).")
+    if system_disk_low(snapshot):
+        data = _probe_data(snapshot, "free_space")
+        free = data["drives"][data["system"]]["free"]
+        notes.append(f"[WARN] Low disk space on {data['system']} ({format_bytes(free)} free).")
+    stack = _probe_data(snapshot, "servicing_stack")
+    if stack.get("packages_pending"):
+        notes.append("[WARN] Servicing stack has packages pending; DISM may wait or fail.")
+    for name, info in (_probe_data(snapshot, "wu_services").get("services") or {}).items():
+        if info.get("start") == "DISABLED":
+            notes.append(f"[WARN] Service {name} is disabled; DISM RestoreHealth cannot use Windows Update.")
+    return notes
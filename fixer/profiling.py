@@ -0,0 +1,104 @@
+"""Opt-in timers and counters (the Diagnostics panel)."""
+
+import time
+import threading
+import contextlib
+
+
+class _Timer:
+    __slots__ = ("inst", "name", "t0")
+
+    def __init__(self, inst, name):
+        self.inst = inst
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.inst.record(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class Instrumentation:
+    """Opt-in timers, counters and gauges for the hot paths.
+
+    Disabled by default. Hot loops should fetch ``PROFILER.active()`` once and
+    test the result, so the disabled cost is one attribute check per call site;
+    ``timer()`` hands back a shared no-op context manager when disabled.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.timings = {}  # name -> [count, total_secs, max_secs]
+            self.gauges = {}
+            self.started = time.perf_counter()
+
+    def active(self):
+        return self if self.enabled else None
+
+    def count(self, name: str, n: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name: str, value):
+        if self.enabled:
+            self.gauges[name] = value
+
+    def record(self, name: str, secs: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            t = self.timings.get(name)
+            if t is None:
+                self.timings[name] = [1, secs, secs]
+            else:
+                t[0] += 1
+                t[1] += secs
+                if secs > t[2]:
+                    t[2] = secs
+
+    def timer(self, name: str):
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            timings = {k: list(v) for k, v in self.timings.items()}
+            gauges = dict(self.gauges)
+            elapsed = time.perf_counter() - self.started
+
+        def _rate(counter, timing):
+            busy = timings.get(timing, [0, 0.0])[1]
+            return round(counters.get(counter, 0) / busy, 1) if busy else None
+
+        return {
+            "enabled": self.enabled,
+            "elapsed_secs": round(elapsed, 3),
+            "counters": counters,
+            "gauges": gauges,
+            "timings": {
+                k: {"count": c, "total_secs": round(tot, 4), "avg_ms": round(tot * 1000 / c, 3), "max_ms": round(mx * 1000, 3)}
+                for k, (c, tot, mx) in sorted(timings.items())
+            },
+            "rates": {
+                "cmd_lines_per_sec": _rate("cmd.lines", "cmd.total"),
+                "log_lines_per_sec": round(counters.get("log.lines", 0) / elapsed, 1) if elapsed else None,
+                "deletes_per_sec": _rate("fs.deletes", "fs.delete"),
+            },
+        }
+
+
+PROFILER = Instrumentation()
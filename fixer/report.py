@@ -0,0 +1,259 @@
+"""Run report built from the journal (HTML and JSON)."""
+
+import os
+import json
+from datetime import datetime
+import re
+import html
+
+from .cleanup import format_bytes
+from .preflight import _probe_data
+
+
+# (step id prefix, regex, kind, summary) matched against command output.
+FINDING_PATTERNS = [
+    ("DISM", re.compile(r"No component store corruption detected", re.I), "ok", "No component store corruption detected"),
+    ("DISM", re.compile(r"The component store is repairable", re.I), "problem", "Component store corruption found (repairable)"),
+    ("DISM", re.compile(r"The component store cannot be repaired", re.I), "error", "Component store cannot be repaired"),
+    ("DISM", re.compile(r"component store corruption was repaired", re.I), "fixed", "Component store corruption repaired"),
+    ("DISM", re.compile(r"The restore operation completed successfully", re.I), "ok", "Restore operation completed"),
+    ("DISM", re.compile(r"The source files could not be (found|downloaded)", re.I), "error", "Repair source files not found"),
+    ("DISM", re.compile(r"Error:\s*(0x[0-9a-f]+|\d+)", re.I), "error", "DISM error {0}"),
+    ("SFC", re.compile(r"did not find any integrity violations", re.I), "ok", "No integrity violations"),
+    ("SFC", re.compile(r"found corrupt files and successfully repaired", re.I), "fixed", "Corrupt files found and repaired"),
+    ("SFC", re.compile(r"found corrupt files but was unable to fix", re.I), "error", "Corrupt files found, some not repaired"),
+    ("SFC", re.compile(r"could not perform the requested operation", re.I), "error", "SFC could not perform the operation"),
+    ("CHKDSK", re.compile(r"found no problems", re.I), "ok", "No file system problems"),
+    ("CHKDSK", re.compile(r"found problems", re.I), "problem", "File system problems found"),
+]
+
+REPORT_MAX_ITEMS = 200
+
+
+def clean_output_line(line: str) -> str:
+    # sfc writes UTF-16 into the pipe; read as ANSI every other char is NUL.
+    return line.replace("\x00", "").strip()
+
+
+def match_findings(step: str, line: str):
+    line = clean_output_line(line)
+    for prefix, rx, kind, text in FINDING_PATTERNS:
+        if step.upper().startswith(prefix):
+            m = rx.search(line)
+            if m:
+                yield kind, text.format(*m.groups())
+
+
+def _free_by_drive(snapshot: dict) -> dict:
+    data = _probe_data(snapshot, "free_space")
+    return {k: v.get("free") for k, v in (data.get("drives") or {}).items()}
+
+
+def build_run_report(journal_path: str) -> dict:
+    """Aggregate a run journal into the report dict, one line at a time."""
+    rep = {
+        "journal": journal_path,
+        "run_id": os.path.splitext(os.path.basename(journal_path))[0],
+        "version": None,
+        "status": "unknown",
+        "started": None,
+        "finished": None,
+        "admin": None,
+        "profile": {},
+        "plan": None,
+        "drives": {},
+        "reclaimed": {"total": 0, "targets": {}},
+        "steps": [],
+        "findings": [],
+        "failures": [],
+        "network": [],
+        "restore_point": None,
+        "warnings": 0,
+        "errors": 0,
+        "log_lines": 0,
+    }
+    before, after = {}, {}
+    step = ""
+    seen = set()
+
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for raw in f:
+            try:
+                ev = json.loads(raw)
+            except ValueError:
+                continue
+            kind = ev.get("type")
+            if kind == "log":
+                rep["log_lines"] += 1
+                msg = ev.get("msg") or ""
+                if msg.startswith("[WARN]"):
+                    rep["warnings"] += 1
+                elif msg.startswith("[ERROR]"):
+                    rep["errors"] += 1
+                    if len(rep["failures"]) < REPORT_MAX_ITEMS:
+                        rep["failures"].append({"step": step, "detail": msg})
+                if step:
+                    for fkind, text in match_findings(step, msg):
+                        key = (step, text)
+                        if key not in seen and len(rep["findings"]) < REPORT_MAX_ITEMS:
+                            seen.add(key)
+                            rep["findings"].append({"step": step, "kind": fkind, "text": text})
+            elif kind == "step_start":
+                step = ev.get("step") or ""
+            elif kind == "step_end":
+                rep["steps"].append({"step": ev.get("step"), "result": ev.get("result"), "secs": ev.get("secs")})
+                if ev.get("result") not in ("ok", "skip") and len(rep["failures"]) < REPORT_MAX_ITEMS:
+                    rep["failures"].append({"step": ev.get("step"), "detail": f"result: {ev.get('result')}"})
+                step = ""
+            elif kind == "cleanup_target":
+                rep["reclaimed"]["targets"][ev.get("target")] = {
+                    k: ev.get(k) for k in ("found", "freed", "failed", "errors")
+                }
+                rep["reclaimed"]["total"] += ev.get("freed") or 0
+            elif kind == "network":
+                rep["network"] += [dict(row, step=ev.get("step")) for row in ev.get("rows") or []]
+            elif kind == "component_store" and len(rep["findings"]) < REPORT_MAX_ITEMS:
+                text = ("Component cleanup needed: " if ev.get("run") else "Component cleanup skipped: ") + str(ev.get("reason"))
+                rep["findings"].append({"step": step, "kind": "problem" if ev.get("run") else "ok", "text": text})
+            elif kind == "health_decision" and len(rep["findings"]) < REPORT_MAX_ITEMS:
+                text = f"{ev.get('action')} {ev.get('step')}: {ev.get('reason')}"
+                rep["findings"].append({"step": step, "kind": "ok", "text": text})
+            elif kind == "restore_point":
+                rep["restore_point"] = {k: ev.get(k) for k in ("status", "detail", "secs", "waited")}
+            elif kind == "run_start":
+                rep.update(started=ev.get("t"), version=ev.get("version"), admin=ev.get("admin"))
+                rep["profile"] = ev.get("profile") or {}
+            elif kind == "plan":
+                rep["plan"] = ev.get("steps")
+            elif kind == "preflight":
+                before = _free_by_drive(ev.get("snapshot") or {})
+            elif kind == "post_state":
+                after = _free_by_drive(ev.get("snapshot") or {})
+            elif kind == "run_end":
+                rep.update(finished=ev.get("t"), status=ev.get("status"))
+
+    for drive in sorted(set(before) | set(after)):
+        b, a = before.get(drive), after.get(drive)
+        rep["drives"][drive] = {
+            "free_before": b,
+            "free_after": a,
+            "delta": a - b if a is not None and b is not None else None,
+        }
+    return rep
+
+
+_REPORT_CSS = """
+body{font-family:Segoe UI,Arial,sans-serif;margin:24px;color:#222}
+h1{font-size:20px;margin:0 0 4px}h2{font-size:15px;margin:22px 0 6px}
+table{border-collapse:collapse;min-width:420px}td,th{border:1px solid #ddd;padding:4px 10px;text-align:left}
+th{background:#f4f4f4}td.n{text-align:right;font-variant-numeric:tabular-nums}
+.ok{color:#1b7f3b}.fixed{color:#1a73e8}.problem{color:#b26a00}.error,.cancel{color:#c62828}
+.muted{color:#777}
+"""
+
+
+def render_report_html(rep: dict) -> str:
+    e = html.escape
+
+    def when(t):
+        return datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S") if t else "-"
+
+    def size(n):
+        if n is None:
+            return "-"
+        return ("-" if n < 0 else "") + format_bytes(abs(n))
+
+    def ms(v, sign=False):
+        return "-" if v is None else (f"{v:+.1f} ms" if sign else f"{v:.1f} ms")
+
+    def table(head, rows):
+        out = ["<table><tr>" + "".join(f"<th>{e(h)}</th>" for h in head) + "</tr>"]
+        out += rows or [f'<tr><td colspan="{len(head)}" class="muted">none</td></tr>']
+        out.append("</table>")
+        return "\n".join(out)
+
+    rp = rep.get("restore_point")
+    restore = ""
+    if rp:
+        restore = (
+            f"<p>Restore point: <b class='{e(str(rp['status']))}'>{e(str(rp['status']))}</b> in "
+            f"{(rp['secs'] or 0):.1f} s, steps waited {(rp['waited'] or 0):.1f} s "
+            f"<span class='muted'>{e(str(rp['detail'] or ''))}</span></p>"
+        )
+
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>Windows Fixer report {e(rep['run_id'])}</title><style>{_REPORT_CSS}</style></head><body>",
+        "<h1>Windows Fixer run report</h1>",
+        f"<div class='muted'>{e(str(rep.get('version') or ''))} &middot; {when(rep.get('started'))} &rarr; "
+        f"{when(rep.get('finished'))} &middot; admin: {e(str(rep.get('admin')))}</div>",
+        f"<p>Status: <b class='{e(str(rep['status']))}'>{e(str(rep['status']))}</b> &middot; "
+        f"reclaimed <b>{size(rep['reclaimed']['total'])}</b> &middot; "
+        f"{rep['warnings']} warning(s), {rep['errors']} error(s)</p>",
+        restore,
+        "<h2>Free space</h2>",
+        table(
+            ["Drive", "Before", "After", "Change"],
+            [
+                f"<tr><td>{e(d)}</td><td class='n'>{size(v['free_before'])}</td>"
+                f"<td class='n'>{size(v['free_after'])}</td><td class='n'>{size(v['delta'])}</td></tr>"
+                for d, v in rep["drives"].items()
+            ],
+        ),
+        "<h2>Reclaimed per target</h2>",
+        table(
+            ["Target", "Found", "Freed", "Not deleted", "Errors"],
+            [
+                f"<tr><td>{e(str(k))}</td><td class='n'>{size(v.get('found'))}</td><td class='n'>{size(v.get('freed'))}</td>"
+                f"<td class='n'>{v.get('failed') or 0}</td>"
+                f"<td>{e(', '.join(f'{c} {n}' for c, n in (v.get('errors') or {}).items()))}</td></tr>"
+                for k, v in rep["reclaimed"]["targets"].items()
+            ],
+        ),
+        "<h2>Findings</h2>",
+        table(
+            ["Step", "Finding"],
+            [
+                f"<tr><td>{e(f['step'])}</td><td class='{e(f['kind'])}'>{e(f['text'])}</td></tr>"
+                for f in rep["findings"]
+            ],
+        ),
+        "<h2>Network</h2>",
+        table(
+            ["Step", "Probe", "Target", "Before", "After", "Change", "Failures"],
+            [
+                f"<tr><td>{e(str(r['step']))}</td><td>{e(r['kind'].upper())}</td><td>{e(r['target'])}</td>"
+                f"<td class='n'>{ms(r['before_ms'])}</td><td class='n'>{ms(r['after_ms'])}</td>"
+                f"<td class='n'>{ms(r['delta_ms'], sign=True)}</td><td>{r['before_fail']} &rarr; {r['after_fail']}</td></tr>"
+                for r in rep["network"]
+            ],
+        ),
+        "<h2>Steps</h2>",
+        table(
+            ["Step", "Result", "Duration"],
+            [
+                f"<tr><td>{e(str(s['step']))}</td><td class='{e(str(s['result']))}'>{e(str(s['result']))}</td>"
+                f"<td class='n'>{(s['secs'] or 0):.1f} s</td></tr>"
+                for s in rep["steps"]
+            ],
+        ),
+        "<h2>Failures</h2>",
+        table(
+            ["Step", "Detail"],
+            [f"<tr><td>{e(str(x['step']))}</td><td>{e(str(x['detail']))}</td></tr>" for x in rep["failures"]],
+        ),
+        f"<p class='muted'>Journal: {e(rep['journal'])} ({rep['log_lines']} log lines)</p>",
+        "</body></html>",
+    ]
+    return "\n".join(parts)
+
+
+def write_run_report(journal_path: str) -> dict:
+    """Write ``<journal>.html`` and ``<journal>.json`` next to the journal."""
+    rep = build_run_report(journal_path)
+    base = os.path.splitext(journal_path)[0]
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(rep, f, ensure_ascii=False, indent=2)
+    with open(base + ".html", "w", encoding="utf-8") as f:
+        f.write(render_report_html(rep))
+    return {"html": base + ".html", "json": base + ".json", "data": rep}
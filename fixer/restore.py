@@ -0,0 +1,84 @@
+"""System Restore point backends."""
+
+import time
+import subprocess
+
+from .runner import BackgroundJob
+
+
+CREATE_NO_WINDOW = 0x08000000
+
+
+class WindowsRestorePoint:
+    """Creates a System Restore point through PowerShell's Checkpoint-Computer.
+
+    Windows allows one new point per 24 hours by default; when a recent one
+    exists the result is "skipped", which still leaves a rollback point.
+    """
+
+    name = "System Restore"
+    TIMEOUT = 15 * 60
+
+    def create(self, description: str, should_abort):
+        desc = description.replace("'", "''")
+        cmd = [
+            "powershell", "-NoProfile", "-NonInteractive", "-Command",
+            f"Checkpoint-Computer -Description '{desc}' -RestorePointType MODIFY_SETTINGS -WarningAction Stop",
+        ]
+        try:
+            proc = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, creationflags=CREATE_NO_WINDOW
+            )
+        except OSError as e:
+            return "error", str(e)
+        t0 = time.monotonic()
+        while True:
+            try:
+                out, _ = proc.communicate(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                if should_abort() or time.monotonic() - t0 > self.TIMEOUT:
+                    proc.kill()
+                    proc.communicate()
+                    return ("cancel", "cancelled") if should_abort() else ("error", "timed out")
+        if proc.returncode == 0:
+            return "ok", "restore point created"
+        text = " ".join((out or "").split())
+        if "1440" in text or "already been created" in text:
+            return "skipped", "a restore point was created in the last 24 hours"
+        return "error", text[-300:] or f"exit code {proc.returncode}"
+
+
+class StubRestorePoint:
+    """Stand-in backend: waits ``secs`` (cancellable) and reports ``status``."""
+
+    name = "stub"
+
+    def __init__(self, secs: float = 2.0, status: str = "ok"):
+        self.secs = secs
+        self.status = status
+
+    def create(self, description: str, should_abort):
+        end = time.monotonic() + self.secs
+        while time.monotonic() < end:
+            if should_abort():
+                return "cancel", "cancelled"
+            time.sleep(0.05)
+        return self.status, f"(stub) {description}"
+
+
+class RestorePointJob(BackgroundJob):
+    def __init__(self, backend, description: str, should_abort):
+        super().__init__(backend.create, description, should_abort)
+
+    @property
+    def status(self):
+        if not self.done():
+            return None
+        return "error" if self.error else self.result[0]
+
+    @property
+    def detail(self) -> str:
+        if not self.done():
+            return ""
+        return str(self.error) if self.error else self.result[1]
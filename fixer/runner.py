@@ -0,0 +1,186 @@
+"""Running external commands for the steps."""
+
+import time
+import subprocess
+import threading
+
+from .profiling import PROFILER
+
+
+class CommandRunner:
+    def __init__(self, log_cb, output_cb=None):
+        """``log_cb`` gets the runner's own messages, ``output_cb`` the command's output lines."""
+        self.log_cb = log_cb
+        self.output_cb = output_cb or log_cb
+        self.current_proc = None
+        self.background = None
+        self._cancel_all = False
+        self._skip_step = False
+
+    def reset_all(self):
+        self._cancel_all = False
+        self._skip_step = False
+        self.current_proc = None
+
+    def request_cancel_all(self):
+        self._cancel_all = True
+        self._terminate_current("Cancel requested")
+
+    def request_skip_step(self):
+        self._skip_step = True
+        self._terminate_current("Skip requested")
+
+    def reset_flags_for_step(self):
+        self._skip_step = False
+
+    def cancel_all_requested(self) -> bool:
+        return self._cancel_all
+
+    def skip_requested(self) -> bool:
+        return self._skip_step
+
+    def _terminate_current(self, reason: str):
+        if self.current_proc:
+            try:
+                self.log_cb(f"[INFO] {reason}. Terminating current command...")
+                self.current_proc.terminate()
+            except Exception:
+                pass
+
+    def run_cmd(self, cmd):
+        with PROFILER.timer("cmd.total"):
+            return self._run_cmd(cmd)
+
+    def _run_cmd(self, cmd):
+        shown = cmd if isinstance(cmd, str) else " ".join(cmd)
+        self.log_cb(f"\n=== RUN: {shown} ===")
+        prof = PROFILER.active()
+
+        try:
+            with PROFILER.timer("cmd.spawn"):
+                self.current_proc = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                    universal_newlines=True,
+                    **(self.background.popen_kwargs() if self.background else {}),
+                )
+            if self.background:
+                self.background.lower_child(self.current_proc)
+        except Exception as e:
+            self.log_cb(f"[ERROR] Failed to start command: {e}")
+            self.current_proc = None
+            return "error"
+
+        try:
+            if self.current_proc.stdout:
+                for line in self.current_proc.stdout:
+                    if self._cancel_all:
+                        self._terminate_current("Cancel requested")
+                        break
+                    if self._skip_step:
+                        self._terminate_current("Skip requested")
+                        break
+                    if prof:
+                        prof.count("cmd.lines")
+                    self.output_cb(line.rstrip("\n"))
+        finally:
+            try:
+                if self.current_proc and self.current_proc.stdout:
+                    self.current_proc.stdout.close()
+            except Exception:
+                pass
+
+        try:
+            if self.current_proc:
+                self.current_proc.wait(timeout=10)
+        except Exception:
+            try:
+                if self.current_proc:
+                    self.current_proc.kill()
+            except Exception:
+                pass
+
+        self.current_proc = None
+
+        if self._cancel_all:
+            self.log_cb("=== STOPPED (cancel) ===\n")
+            return "cancel"
+        if self._skip_step:
+            self.log_cb("=== SKIPPED ===\n")
+            return "skip"
+
+        self.log_cb("=== DONE ===\n")
+        return "ok"
+
+
+class StubCommandRunner(CommandRunner):
+    """Pretends to run commands (a few output lines each), honouring skip/cancel.
+
+    Lets the engine, the agent and the controller be exercised on any OS.
+    """
+
+    def __init__(self, log_cb, output_cb=None, secs: float = 0.5, lines: int = 5):
+        super().__init__(log_cb, output_cb)
+        self.secs = secs
+        self.lines = lines
+
+    def _run_cmd(self, cmd):
+        shown = cmd if isinstance(cmd, str) else " ".join(cmd)
+        self.log_cb(f"\n=== RUN (stub): {shown} ===")
+        for i in range(self.lines):
+            if self._cancel_all:
+                self.log_cb("=== STOPPED (cancel) ===\n")
+                return "cancel"
+            if self._skip_step:
+                self.log_cb("=== SKIPPED ===\n")
+                return "skip"
+            time.sleep(self.secs / max(1, self.lines))
+            self.output_cb(f"[stub] {shown}: {(i + 1) * 100 // self.lines}%")
+        self.log_cb("=== DONE ===\n")
+        return "ok"
+
+
+class BackgroundJob:
+    """Runs ``fn(*args)`` on its own thread; steps that need the result call ``wait``.
+
+    ``cancel`` is called when a waiter gives up because of ``should_abort``.
+    """
+
+    def __init__(self, fn, *args, cancel=None):
+        self.result = None
+        self.error = None
+        self.secs = 0.0
+        self.waited = 0.0
+        self.cancel = cancel
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(fn, args), daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self, fn, args):
+        t0 = time.perf_counter()
+        try:
+            self.result = fn(*args)
+        except Exception as e:
+            self.error = e
+        self.secs = time.perf_counter() - t0
+        self._done.set()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, should_abort) -> bool:
+        """Block until finished (or ``should_abort``); returns True if finished."""
+        t0 = time.perf_counter()
+        while not self._done.wait(0.1):
+            if should_abort():
+                if self.cancel:
+                    self.cancel()
+                break
+        self.waited += time.perf_counter() - t0
+        return self._done.is_set()
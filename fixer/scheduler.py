@@ -0,0 +1,240 @@
+"""Cron and idle-triggered schedules."""
+
+import os
+import time
+import ctypes
+import platform
+from datetime import datetime, timedelta
+import hashlib
+
+from .storage import JsonStore
+
+
+_CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+_CRON_NAMES = {
+    "month": {m: i for i, m in enumerate("jan feb mar apr may jun jul aug sep oct nov dec".split(), 1)},
+    "weekday": {d: i for i, d in enumerate("sun mon tue wed thu fri sat".split())},
+}
+_CRON_ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *"}
+
+
+class CronExpr:
+    """Five-field cron expression (minute hour day month weekday), local time.
+
+    Supports ``*``, lists, ranges, ``/step``, month/weekday names and the
+    @hourly/@daily/@weekly/@monthly aliases. As in cron, when both day and
+    weekday are restricted a time matches either of them; like Vixie cron, a
+    field starting with ``*`` (``*/2`` too) counts as unrestricted.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        fields = _CRON_ALIASES.get(text.strip().lower(), text).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron needs 5 fields: {text!r}")
+        self.sets = {}
+        for raw, (name, lo, hi) in zip(fields, _CRON_FIELDS):
+            self.sets[name] = self._parse(raw.lower(), name, lo, hi)
+        self.any_day = fields[2].startswith("*")
+        self.any_weekday = fields[4].startswith("*")
+
+    @staticmethod
+    def _parse(raw: str, name: str, lo: int, hi: int) -> frozenset:
+        names = _CRON_NAMES.get(name, {})
+        out = set()
+        for part in raw.split(","):
+            rng, _, step = part.partition("/")
+            if rng == "*":
+                a, b = lo, hi
+            else:
+                first, _, last = rng.partition("-")
+                a = names[first] if first in names else int(first)
+                b = a if not last else (names[last] if last in names else int(last))
+                if step and not last:
+                    b = hi
+            if not (lo <= a <= hi and lo <= b <= hi and a <= b):
+                raise ValueError(f"cron {name} out of range: {part!r}")
+            out.update(range(a, b + 1, int(step) if step else 1))
+        if name == "weekday":
+            out = {d % 7 for d in out}  # 0 and 7 are both Sunday
+        return frozenset(out)
+
+    def _day_matches(self, d) -> bool:
+        dom = d.day in self.sets["day"]
+        dow = (d.weekday() + 1) % 7 in self.sets["weekday"]
+        if self.any_day or self.any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def next_after(self, ts: float) -> float:
+        """First matching minute strictly after ``ts`` (epoch seconds)."""
+        t = datetime.fromtimestamp(ts).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.sets["month"]:
+                t = (t.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+            elif t.hour not in self.sets["hour"]:
+                t = (t + timedelta(hours=1)).replace(minute=0)
+            elif t.minute not in self.sets["minute"]:
+                t += timedelta(minutes=1)
+            else:
+                return t.timestamp()
+        raise ValueError(f"cron never matches: {self.text!r}")
+
+
+def idle_seconds():
+    """Seconds since the last keyboard/mouse input, or None when unknown."""
+    if os.name != "nt":
+        return None
+
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+    info = LASTINPUTINFO(ctypes.sizeof(LASTINPUTINFO), 0)
+    try:
+        if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+            return None
+        return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000.0
+    except (AttributeError, OSError):
+        return None
+
+
+class Schedule:
+    """One entry of the "schedules" setting.
+
+    Either ``cron`` (run at matching times) or ``idle_minutes`` (run once the
+    user has been idle that long, at most every ``min_interval_hours``).
+    ``jitter_minutes`` spreads start times per host; ``catch_up`` runs a
+    missed occurrence at the next chance instead of dropping it.
+    """
+
+    GRACE = 15 * 60
+
+    def __init__(self, spec: dict, host: str = ""):
+        self.id = str(spec.get("id") or spec.get("cron") or "idle")
+        self.enabled = bool(spec.get("enabled", True))
+        self.cron = CronExpr(spec["cron"]) if spec.get("cron") else None
+        self.idle_minutes = float(spec.get("idle_minutes") or 0)
+        if not self.cron and not self.idle_minutes:
+            raise ValueError(f"schedule {self.id!r} needs cron or idle_minutes")
+        self.min_interval = float(spec.get("min_interval_hours", 24)) * 3600
+        self.catch_up = bool(spec.get("catch_up", True))
+        self.profile = dict(spec.get("profile") or {})
+        jitter = float(spec.get("jitter_minutes") or 0) * 60
+        # Same host, same offset: spread across a fleet, stable between restarts.
+        digest = hashlib.sha256(f"{host}/{self.id}".encode("utf-8")).digest()
+        self.offset = int.from_bytes(digest[:4], "big") % int(jitter) if jitter >= 1 else 0
+
+    def next_due(self, anchor: float) -> float:
+        """Next cron start (with this host's jitter) after ``anchor``."""
+        return self.cron.next_after(anchor - self.offset) + self.offset
+
+    def check(self, now: float, state: dict, idle=None):
+        """Return (decision, due_time): "run", "missed" or None."""
+        if not self.enabled:
+            return None, None
+        if self.cron:
+            due = self.next_due(state.get("anchor", now))
+            if due > now:
+                return None, due
+            if self.catch_up or now - due <= self.GRACE:
+                return "run", due
+            return "missed", due
+        last = state.get("last_run")
+        if last is not None and now - last < self.min_interval:
+            return None, last + self.min_interval
+        if idle is not None and idle >= self.idle_minutes * 60:
+            return "run", now
+        return None, None
+
+
+class Scheduler:
+    """Evaluates schedules and launches due runs, one at a time.
+
+    Per-schedule state (anchor, last run, last status) lives in
+    schedule_state.json. ``clock`` and ``idle`` are injectable so evaluation
+    can be exercised without waiting or a Windows desktop.
+    """
+
+    def __init__(self, specs, state_path=None, clock=time.time, idle=idle_seconds, host=None, log_cb=print):
+        self.log_cb = log_cb
+        self.clock = clock
+        self.idle = idle
+        host = platform.node() if host is None else host
+        self.schedules = []
+        for spec in specs or []:
+            try:
+                self.schedules.append(Schedule(spec, host))
+            except (KeyError, ValueError, TypeError) as e:
+                log_cb(f"[WARN] Ignoring schedule {spec!r}: {e}")
+        self.store = JsonStore("schedule_state.json")
+        if state_path:
+            self.store.path = state_path
+        state = self.store.load()
+        self.state = state if isinstance(state, dict) else {}
+
+    def _save_state(self):
+        if not self.store.save(self.state):
+            self.log_cb(f"[WARN] Could not save {self.store.path}")
+
+    def due(self):
+        """Schedules to run now. New schedules start counting from now."""
+        now = self.clock()
+        idle = None
+        out = []
+        changed = False
+        for sch in self.schedules:
+            st = self.state.setdefault(sch.id, {})
+            if "anchor" not in st:
+                st["anchor"] = now
+                changed = True
+            if sch.idle_minutes and idle is None:
+                idle = self.idle()
+            decision, when = sch.check(now, st, idle)
+            if decision == "run":
+                out.append(sch)
+            elif decision == "missed":
+                self.log_cb(
+                    f"[INFO] Schedule {sch.id}: missed run at {datetime.fromtimestamp(when):%Y-%m-%d %H:%M} (catch_up off)."
+                )
+                st["anchor"] = now
+                changed = True
+        if changed:
+            self._save_state()
+        return out
+
+    def mark_run(self, sch: Schedule, status: str):
+        now = self.clock()
+        self.state[sch.id] = {"anchor": now, "last_run": now, "last_status": status}
+        self._save_state()
+
+    def next_times(self) -> dict:
+        """{schedule id: next cron start, or None} for display."""
+        now = self.clock()
+        out = {}
+        for sch in self.schedules:
+            st = self.state.get(sch.id, {})
+            out[sch.id] = sch.next_due(st.get("anchor", now)) if sch.cron and sch.enabled else None
+        return out
+
+    def run_pending(self, launch) -> int:
+        """Launch every due schedule with ``launch(profile) -> status``."""
+        ran = 0
+        for sch in self.due():
+            self.log_cb(f"[INFO] Schedule {sch.id}: starting run.")
+            try:
+                status = launch(sch.profile)
+            except Exception as e:
+                status = "error"
+                self.log_cb(f"[ERROR] Schedule {sch.id}: {e}")
+            self.mark_run(sch, status)
+            self.log_cb(f"[INFO] Schedule {sch.id}: finished ({status}).")
+            ran += 1
+        return ran
+
+    def run_forever(self, launch, poll: float = 30, should_stop=lambda: False, sleep=time.sleep):
+        while not should_stop():
+            self.run_pending(launch)
+            sleep(poll)
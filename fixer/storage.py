@@ -0,0 +1,225 @@
+"""Settings and state files under %APPDATA%\\WindowsFixer."""
+
+import os
+import sys
+import json
+import time
+import threading
+from datetime import datetime
+
+from .meta import APP_ID
+
+
+def app_data_path(name: str) -> str:
+    base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    folder = os.path.join(base, APP_ID)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, name)
+
+
+def resource_path(relative_path: str) -> str:
+    """A file shipped with the app: next to the exe (or windows_fixer.py), else in PyInstaller's bundle."""
+    # 1) Prefer files next to the exe (portable)
+    try:
+        if getattr(sys, "frozen", False):
+            exe_dir = os.path.dirname(sys.executable)
+        else:
+            exe_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        candidate = os.path.join(exe_dir, relative_path)
+        if os.path.exists(candidate):
+            return candidate
+    except Exception:
+        pass
+
+    # 2) Fallback to PyInstaller temp extraction
+    try:
+        base_path = sys._MEIPASS  # type: ignore[attr-defined]
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+
+def atomic_write_text(path: str, text: str):
+    """Write to a temp file next to ``path``, fsync, then replace ``path``.
+
+    A crash or full disk leaves either the old or the new file, never half of
+    one. Errors are raised to the caller.
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(3):
+            try:
+                os.replace(tmp, path)
+                break
+            except PermissionError:
+                # Windows: a scanner or indexer may hold the target for a moment.
+                if attempt == 2:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+    finally:
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def atomic_write_json(path: str, data, **dump_kw):
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, **dump_kw))
+
+
+class JsonStore:
+    """A JSON sub-store in its own file (caches, scheduler state).
+
+    Kept out of settings.json so large or frequently changing data never
+    makes a settings toggle rewrite it, and vice versa.
+    """
+
+    def __init__(self, name: str, compact: bool = True):
+        self.path = app_data_path(name)
+        self.dump_kw = {"separators": (",", ":")} if compact else {}
+
+    def load(self, default=None):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {} if default is None else default
+
+    def save(self, data) -> bool:
+        try:
+            atomic_write_json(self.path, data, **self.dump_kw)
+            return True
+        except OSError:
+            return False
+
+
+SETTINGS_SCHEMA = 1
+SETTINGS_DEFAULTS = {"always_admin": False, "language": "en"}
+
+
+def _migrate_settings_v0(data: dict) -> dict:
+    # v0: the unversioned file. Drop nulls and fix values older builds could write.
+    data = {k: v for k, v in data.items() if v is not None}
+    if data.get("language") not in ("en", "ar"):
+        data["language"] = "en"
+    if not isinstance(data.get("schedules", []), list):
+        data.pop("schedules")
+    return data
+
+
+# schema version -> function upgrading a dict of that version by one step
+SETTINGS_MIGRATIONS = {0: _migrate_settings_v0}
+
+
+def migrate_settings(data: dict) -> dict:
+    version = data.get("schema", 0)
+    while version < SETTINGS_SCHEMA:
+        data = SETTINGS_MIGRATIONS[version](dict(data))
+        version += 1
+        data["schema"] = version
+    return data
+
+
+class SettingsStore:
+    """settings.json: schema-versioned, with batched, atomic writes.
+
+    Changes are collected for ``delay`` seconds and written once; a write
+    whose content is unchanged is skipped. Write errors are reported through
+    ``on_error`` and retried on the next flush instead of being dropped.
+    Call ``close()`` on exit to write anything still pending.
+    """
+
+    def __init__(self, path=None, delay: float = 1.0, on_error=None):
+        self.path = path or app_data_path("settings.json")
+        self.delay = delay
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        self._timer = None
+        self._written = None
+        self._data = self._load()
+
+    def _load(self) -> dict:
+        raw = None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = f.read()
+            data = json.loads(raw)
+            if not isinstance(data, dict):
+                raise ValueError("settings.json is not an object")
+        except FileNotFoundError:
+            return dict(SETTINGS_DEFAULTS, schema=SETTINGS_SCHEMA)
+        except (OSError, ValueError):
+            # Keep the unreadable file for inspection rather than overwrite it.
+            try:
+                os.replace(self.path, self.path + datetime.now().strftime(".bad-%Y%m%d-%H%M%S"))
+            except OSError:
+                pass
+            return dict(SETTINGS_DEFAULTS, schema=SETTINGS_SCHEMA)
+
+        if data.get("schema", 0) >= SETTINGS_SCHEMA:
+            self._written = raw
+            return data
+        data = migrate_settings(data)
+        self._data = data
+        self.flush()
+        return data
+
+    # ----- dict-like access -----
+    def get(self, key, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def __getitem__(self, key):
+        with self._lock:
+            return self._data[key]
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def update(self, changes: dict):
+        with self._lock:
+            self._data.update(changes)
+            if self._timer is None and self.delay > 0:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if self.delay <= 0:
+            self.flush()
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return dict(self._data)
+
+    # ----- persistence -----
+    def flush(self) -> bool:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            text = json.dumps(self._data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+            if text == self._written:
+                return True
+            try:
+                atomic_write_text(self.path, text)
+            except OSError as e:
+                if self.on_error:
+                    self.on_error(e)
+                return False
+            self._written = text
+            return True
+
+    def close(self) -> bool:
+        return self.flush()
+
+
+def load_settings() -> dict:
+    return SettingsStore(delay=0).as_dict()
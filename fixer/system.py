@@ -0,0 +1,30 @@
+"""Elevation and drive helpers (Windows APIs are looked up on call)."""
+
+import os
+import sys
+import ctypes
+
+
+def is_admin() -> bool:
+    try:
+        return ctypes.windll.shell32.IsUserAnAdmin() != 0
+    except Exception:
+        return False
+
+
+def relaunch_as_admin():
+    params = " ".join([f'"{a}"' for a in sys.argv])
+    ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, params, None, 0)
+    sys.exit(0)
+
+
+def list_drives():
+    drives = []
+    bitmask = ctypes.windll.kernel32.GetLogicalDrives()
+    for i in range(26):
+        if bitmask & (1 << i):
+            letter = chr(ord("A") + i)
+            path = f"{letter}:\\"
+            if os.path.exists(path):
+                drives.append(f"{letter}:")
+    return drives or ["C:"]
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def appdata(tmp_path, monkeypatch):
+    """A fresh %APPDATA%; returns the folder the app keeps its files in."""
+    monkeypatch.setenv("APPDATA", str(tmp_path))
+    return tmp_path / "WindowsFixer"
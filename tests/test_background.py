@@ -0,0 +1,172 @@
+"""BackgroundMode throttling, load pausing and priorities with a fake clock."""
+
+import os
+import subprocess
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from fixer.background import BACKGROUND_NICE, BackgroundMode
+from fixer.cleanup import CleanupTarget, scan_cleanup_targets
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self) -> float:
+        return self.t
+
+    def sleep(self, secs: float):
+        self.t += secs
+
+
+class FakeMonitor:
+    """Returns the queued (cpu, disk) samples, then the last one forever."""
+
+    def __init__(self, *samples):
+        self.samples = list(samples)
+
+    def sample(self):
+        return self.samples.pop(0) if len(self.samples) > 1 else self.samples[0]
+
+
+def make(clock, **kw):
+    logs = []
+    return BackgroundMode(logs.append, clock=clock, sleep=clock.sleep, **kw), logs
+
+
+# ----- throttle -----
+def test_ops_per_second():
+    clock = FakeClock()
+    bg, _ = make(clock, ops_per_sec=10)
+    stats = SimpleNamespace(removed=0, bytes=0)
+    check = bg.gate(stats, lambda: False)
+    for _ in range(50):
+        stats.removed += 1
+        assert check() is False
+    assert clock.t == pytest.approx(5.0)
+    assert bg.throttled_secs == pytest.approx(5.0)
+
+
+def test_mb_per_second():
+    clock = FakeClock()
+    bg, _ = make(clock, mb_per_sec=2)
+    stats = SimpleNamespace(removed=0, bytes=0)
+    check = bg.gate(stats, lambda: False)
+    for _ in range(8):
+        stats.removed += 1
+        stats.bytes += 1024 * 1024
+        check()
+    assert clock.t == pytest.approx(4.0)
+
+
+def test_no_limits_never_sleeps():
+    clock = FakeClock()
+    bg, _ = make(clock)
+    stats = SimpleNamespace(removed=0, bytes=0)
+    check = bg.gate(stats, lambda: False)
+    stats.removed, stats.bytes = 10_000, 10 * 1024**3
+    assert check() is False
+    assert clock.t == 0 and bg.throttled_secs == 0
+
+
+def test_throttle_stops_on_abort():
+    clock = FakeClock()
+    bg, _ = make(clock, ops_per_sec=1)
+    stats = SimpleNamespace(removed=0, bytes=0)
+    abort = {"now": False}
+
+    def sleep(secs):
+        clock.t += secs
+        abort["now"] = clock.t >= 2
+
+    bg.sleep = sleep
+    check = bg.gate(stats, lambda: abort["now"])
+    stats.removed = 100
+    assert check() is True
+    assert clock.t == pytest.approx(2.0)
+
+
+# ----- load pausing -----
+def test_wait_until_idle_pauses_while_busy():
+    clock = FakeClock()
+    monitor = FakeMonitor((95, 0), (90, 0), (20, 75), (10, 5))
+    bg, logs = make(clock, busy_cpu=80, busy_disk=70, monitor=monitor)
+    assert bg.wait_until_idle(lambda: False) == pytest.approx(1.5)
+    assert bg.paused_secs == pytest.approx(1.5)
+    assert "machine busy (CPU 95%)" in logs[0]
+    assert logs[-1] == "[INFO] Background mode: resumed after 1.5s."
+
+
+def test_wait_until_idle_gives_up_after_max_pause():
+    clock = FakeClock()
+    bg, logs = make(clock, busy_disk=50, monitor=FakeMonitor((0, 99)), max_pause=5)
+    assert bg.wait_until_idle(lambda: False) == pytest.approx(5.0)
+    assert logs[-1] == "[WARN] Background mode: still busy after 5s, continuing."
+
+
+def test_wait_until_idle_returns_on_abort():
+    clock = FakeClock()
+    bg, _ = make(clock, busy_cpu=50, monitor=FakeMonitor((99, 0)))
+    assert bg.wait_until_idle(lambda: clock.t >= 1) == pytest.approx(1.0)
+
+
+def test_gate_excludes_paused_time_from_the_rate():
+    clock = FakeClock()
+    monitor = FakeMonitor((99, 0), (99, 0), (0, 0))
+    bg, _ = make(clock, ops_per_sec=1, busy_cpu=50, monitor=monitor)
+    stats = SimpleNamespace(removed=0, bytes=0)
+    check = bg.gate(stats, lambda: False)
+    stats.removed = 3
+    check()
+    # 1s paused while busy does not count towards the 3s the deletes need
+    assert bg.paused_secs == pytest.approx(1.0)
+    assert clock.t == pytest.approx(4.0)
+
+
+# ----- threads and children -----
+def test_run_lowered_returns_and_raises():
+    bg, _ = make(FakeClock())
+    assert bg.run_lowered(lambda a, b: a + b, 2, 3) == 5
+    with pytest.raises(ZeroDivisionError):
+        bg.run_lowered(lambda: 1 / 0)
+    names = []
+    bg.run_lowered(lambda: names.append(threading.current_thread().name))
+    assert names != [threading.current_thread().name]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="per-thread nice is Linux only")
+def test_run_lowered_leaves_the_caller_alone():
+    tid = threading.get_native_id()
+    before = os.getpriority(os.PRIO_PROCESS, tid)
+    bg, _ = make(FakeClock())
+    inside = bg.run_lowered(lambda: os.getpriority(os.PRIO_PROCESS, threading.get_native_id()))
+    assert inside >= min(19, BACKGROUND_NICE)
+    assert os.getpriority(os.PRIO_PROCESS, tid) == before
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX nice")
+def test_lower_child_from_the_parent():
+    bg, _ = make(FakeClock())
+    assert "preexec_fn" not in bg.popen_kwargs()
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"], **bg.popen_kwargs())
+    try:
+        bg.lower_child(proc)
+        assert os.getpriority(os.PRIO_PROCESS, proc.pid) >= BACKGROUND_NICE
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def test_scan_pool_workers_are_lowered(tmp_path):
+    for i in range(4):
+        (tmp_path / f"f{i}.tmp").write_bytes(b"x" * 10)
+    lowered = []
+    bg = SimpleNamespace(lower_current_thread=lambda: lowered.append(threading.current_thread().name))
+    target = CleanupTarget("t", [str(tmp_path)])
+    plan = scan_cleanup_targets([target], lambda: False, max_workers=2, background=bg)
+    assert sum(size for _, size in plan["t"]) == 40
+    assert lowered and all(name.startswith("scan") for name in lowered)
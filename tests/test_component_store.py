@@ -0,0 +1,53 @@
+"""/AnalyzeComponentStore parsing against the recorded transcripts."""
+
+import json
+import os
+
+import pytest
+
+from fixer import component_cleanup_decision, normalize_profile, parse_component_store
+from fixer.component_store import parse_size
+
+TRANSCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "transcripts")
+
+with open(os.path.join(TRANSCRIPTS, "expected.json"), encoding="utf-8") as f:
+    EXPECTED = {k: v for k, v in json.load(f).items() if not k.startswith("_")}
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_transcript(name):
+    with open(os.path.join(TRANSCRIPTS, name), encoding="utf-8") as f:
+        info = parse_component_store(f.read().splitlines())
+    run, _ = component_cleanup_decision(info, 500 * 1024 * 1024)
+    got = {"parsed": info is not None, "run": run}
+    if info:
+        got.update(
+            recommended=info.get("recommended"),
+            reclaimable_packages=info.get("reclaimable_packages"),
+            reclaimable_mb=round(info["reclaimable"] / 1024**2, 1),
+        )
+    assert {k: got.get(k) for k in EXPECTED[name]} == EXPECTED[name]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("8.23 GB", int(8.23 * 1024**3)),
+        ("8,23 GB", int(8.23 * 1024**3)),
+        ("1.234,5 MB", int(1234.5 * 1024**2)),
+        ("1,234.5 MB", int(1234.5 * 1024**2)),
+        ("1.234.567 bytes", 1234567),
+        ("1,234,567 bytes", 1234567),
+        ("0 bytes", 0),
+        ("unknown", None),
+    ],
+)
+def test_parse_size(text, expected):
+    assert parse_size(text) == expected
+
+
+def test_profile_coerces_component_numbers():
+    p = normalize_profile({"component_min_mb": "750", "component_cache_hours": "bad", "health_max_age_hours": None})
+    assert p["component_min_mb"] == 750.0
+    assert p["component_cache_hours"] == 24
+    assert p["health_max_age_hours"] == 24
@@ -0,0 +1,155 @@
+"""StepEngine step sequencing: the restore point and health verdicts."""
+
+import functools
+import json
+import time
+
+import pytest
+
+from fixer import StepEngine, StepFinished, StepStarted, text_sink
+from fixer.restore import StubRestorePoint
+from fixer.runner import StubCommandRunner
+
+PROFILE = {
+    "targets": [],
+    "recycle_bin": False,
+    "flush_dns": True,
+    "component_cleanup": False,
+    "dism_scan": False,
+    "dism_restore": False,
+    "sfc": False,
+    "chkdsk": False,
+    "reset_network": True,
+    "preflight": False,
+    "net_measure": False,
+    "restore_point": True,
+    "restore_point_required": True,
+}
+
+
+def run_with_restore_point(backend):
+    engine = StepEngine(None, runner_cls=StubCommandRunner, dry_run=True, journal=False, restore_backend=backend)
+    lines, events, calls = [], [], []
+    engine.bus.subscribe(text_sink(lines.append, steps=True), policy="block")
+    engine.bus.subscribe(events.extend, policy="block")
+    status = engine.run(engine.build_steps(PROFILE), on_step=lambda *a: calls.append(a))
+    return engine, status, "\n".join(lines).splitlines(), events, calls
+
+
+def test_restore_point_skip_is_reported_under_its_step(appdata):
+    engine, status, lines, events, calls = run_with_restore_point(StubRestorePoint(secs=1.5, status="error"))
+    assert status == "ok"
+    assert calls == [(1, 2, "Flush DNS Cache"), (2, 2, "Reset Network Stack")]
+    header = lines.index("--- Step 2/2: Reset Network Stack ---")
+    waits = next(i for i, m in enumerate(lines) if "waits for the restore point" in m)
+    skipped = lines.index("[INFO] Step skipped: Reset Network Stack")
+    assert header < waits < skipped  # the wait and the skip sit under the step's own header
+    assert any(isinstance(e, StepStarted) and e.name == "Reset Network Stack" for e in events)
+    assert [(e.name, e.result) for e in events if isinstance(e, StepFinished)][-1] == ("Reset Network Stack", "skip")
+    assert engine.results[-1] == {"step": "Reset Network Stack", "result": "skip", "secs": 0.0}
+
+
+# ----- health verdicts -----
+SCAN_OK = "No component store corruption detected."
+REPAIRED = "The restore operation completed successfully. The component store corruption was repaired."
+SFC_CLEAN = "Windows Resource Protection did not find any integrity violations."
+SFC_UNFIXED = "Windows Resource Protection found corrupt files but was unable to fix some of them."
+SFC_FAILED = "Windows Resource Protection could not perform the requested operation."
+
+HEALTH_PROFILE = dict(PROFILE, flush_dns=False, reset_network=False, restore_point=False, dism_restore=True, sfc=True)
+
+
+class ScriptedRunner(StubCommandRunner):
+    """Answers each command with the next queued output line for it."""
+
+    def __init__(self, log_cb, output_cb=None, script=None):
+        super().__init__(log_cb, output_cb)
+        self.script = {k: list(v) for k, v in (script or {}).items()}
+        self.calls = []
+
+    def _run_cmd(self, cmd):
+        tool = cmd[0] if cmd[0] == "sfc" else cmd[-1]
+        self.calls.append(tool)
+        self.log_cb(f"\n=== RUN (stub): {' '.join(cmd)} ===")
+        queued = self.script.get(tool)
+        if queued:
+            self.output_cb(queued.pop(0))
+        self.log_cb("=== DONE ===\n")
+        return "ok"
+
+
+def health_run(appdata, script, health=None, dry_run=False, **profile):
+    store = appdata / "health.json"
+    if health is not None:
+        store.parent.mkdir(parents=True, exist_ok=True)
+        store.write_text(json.dumps(health), encoding="utf-8")
+    logs = []
+    engine = StepEngine(
+        logs.append, runner_cls=functools.partial(ScriptedRunner, script=script), dry_run=dry_run, journal=False
+    )
+    engine.run(engine.build_steps(dict(HEALTH_PROFILE, **profile)))
+    saved = json.loads(store.read_text(encoding="utf-8")) if store.exists() else None
+    return engine, "\n".join(logs).splitlines(), saved
+
+
+def ran(engine):
+    return [(r["step"], r["result"]) for r in engine.results]
+
+
+def test_recent_healthy_verdict_skips_restorehealth(appdata):
+    health = {"image": {"t": time.time() - 3600, "verdict": "ok", "source": "ScanHealth"}}
+    engine, logs, _ = health_run(appdata, {"sfc": [SFC_CLEAN]}, health)
+    assert ran(engine) == [("DISM RestoreHealth", "skip"), ("SFC ScanNow", "ok")]
+    assert engine.runner.calls == ["sfc"]
+    assert any(m.startswith("[PLAN] Skipping DISM RestoreHealth: ScanHealth 1.0 h ago found no corruption") for m in logs)
+
+
+@pytest.mark.parametrize(
+    "entry",
+    [
+        {"t": time.time() - 48 * 3600, "verdict": "ok", "source": "ScanHealth"},  # too old
+        {"t": time.time() - 3600, "verdict": "problem", "source": "SFC"},
+    ],
+)
+def test_stale_or_unhealthy_verdict_runs_restorehealth(appdata, entry):
+    engine, _, _ = health_run(appdata, {"/RestoreHealth": [REPAIRED], "sfc": [SFC_CLEAN]}, {"image": entry})
+    assert engine.runner.calls == ["/RestoreHealth", "sfc"]  # RestoreHealth before SFC
+
+
+def test_sfc_damage_queues_restorehealth_then_sfc_again(appdata):
+    health = {"image": {"t": time.time() - 3600, "verdict": "ok", "source": "ScanHealth"}}
+    script = {"sfc": [SFC_UNFIXED, SFC_CLEAN], "/RestoreHealth": [REPAIRED]}
+    engine, logs, saved = health_run(appdata, script, health)
+    assert ran(engine) == [
+        ("DISM RestoreHealth", "skip"),
+        ("SFC ScanNow", "ok"),
+        ("DISM RestoreHealth", "ok"),
+        ("SFC ScanNow (after repair)", "ok"),
+    ]
+    assert any(m.startswith("[PLAN] Adding DISM RestoreHealth: SFC could not repair") for m in logs)
+    assert any(m.startswith("[PLAN] Re-running SFC ScanNow: RestoreHealth repaired the image") for m in logs)
+    assert saved["image"]["verdict"] == "ok" and saved["image"]["source"] == "RestoreHealth"
+
+
+def test_sfc_damage_after_restorehealth_adds_nothing(appdata):
+    engine, _, saved = health_run(appdata, {"/RestoreHealth": [SCAN_OK], "sfc": [SFC_UNFIXED]})
+    assert ran(engine) == [("DISM RestoreHealth", "ok"), ("SFC ScanNow", "ok")]
+    assert saved["image"] == {"t": saved["image"]["t"], "verdict": "problem", "source": "SFC"}
+
+
+def test_sfc_failure_is_not_an_image_problem(appdata):
+    engine, _, saved = health_run(appdata, {"sfc": [SFC_FAILED]}, dism_restore=False)
+    assert ran(engine) == [("SFC ScanNow", "ok")]
+    assert saved["step_sfc"]["verdict"] == "error"
+    assert "image" not in saved
+
+
+def test_verdicts_persist(appdata):
+    _, _, saved = health_run(appdata, {"/RestoreHealth": [SCAN_OK], "sfc": [SFC_CLEAN]})
+    assert saved["image"]["verdict"] == "ok"
+    assert set(saved["secs"]) == {"step_dism_restorehealth", "step_sfc"}
+
+
+def test_dry_runs_do_not_persist_verdicts(appdata):
+    _, _, saved = health_run(appdata, {"/RestoreHealth": [SCAN_OK], "sfc": [SFC_CLEAN]}, dry_run=True)
+    assert saved is None
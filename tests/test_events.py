@@ -0,0 +1,176 @@
+"""EventBus queueing: coalescing, drop vs block, and delivery threads."""
+
+import threading
+import time
+
+from fixer.events import (
+    BytesFreed,
+    Dropped,
+    EventBus,
+    LogLine,
+    OutputChunk,
+    Progress,
+    RunFinished,
+    StepFinished,
+    StepStarted,
+    WarningLogged,
+    log_line,
+    text_sink,
+)
+
+
+def wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_log_levels():
+    assert log_line("[WARN] low disk") == WarningLogged("[WARN] low disk", "warn")
+    assert type(log_line("  [ERROR] x")) is WarningLogged
+    assert log_line("[OK] done") == LogLine("[OK] done", "ok")
+    assert log_line("=== RUN: sfc ===").level == "header"
+    assert log_line("plain") == LogLine("plain", "")
+
+
+# ----- pull subscribers -----
+def test_progress_is_coalesced_per_step():
+    bus = EventBus()
+    sub = bus.subscribe()
+    bus.publish(StepStarted(1, 2, "a"))
+    for i in range(1, 10):
+        bus.publish(Progress("a", i / 10))
+    bus.publish(StepFinished(1, "a", "ok", 1.0))
+    bus.publish(Progress("a", 0.05))  # a new step run with the same name
+    assert sub.drain() == [
+        StepStarted(1, 2, "a"),
+        Progress("a", 0.9),
+        StepFinished(1, "a", "ok", 1.0),
+        Progress("a", 0.05),
+    ]
+
+
+def test_output_lines_merge_into_chunks():
+    bus = EventBus()
+    sub = bus.subscribe(max_lines=5)
+    bus.publish_output("1", "2")
+    bus.publish_output("3")
+    bus.publish(LogLine("msg"))
+    bus.publish_output("4", "5", "6")  # over max_lines: dropped
+    assert sub.drain() == [OutputChunk(("1", "2", "3")), LogLine("msg"), Dropped(3)]
+
+
+def test_drop_policy_keeps_control_events():
+    bus = EventBus()
+    sub = bus.subscribe(max_events=3)
+    for i in range(10):
+        bus.publish(LogLine(f"line {i}"))
+        bus.publish(Progress(f"s{i}", 0.5))
+    bus.publish(StepStarted(1, 1, "s"))
+    bus.publish(WarningLogged("[WARN] w", "warn"))
+    bus.publish(BytesFreed("temp", 10, 20))
+    bus.publish(StepFinished(1, "s", "ok", 0.1))
+    bus.publish(RunFinished("ok"))
+    got = sub.drain()
+    assert got[:3] == [LogLine("line 0"), Progress("s0", 0.5), LogLine("line 1")]
+    assert got[3:] == [
+        StepStarted(1, 1, "s"),
+        WarningLogged("[WARN] w", "warn"),
+        BytesFreed("temp", 10, 20),
+        StepFinished(1, "s", "ok", 0.1),
+        RunFinished("ok"),
+        Dropped(17),
+    ]
+    assert sub.drain() == []
+
+
+# ----- callback subscribers -----
+def test_slow_drop_subscriber_loses_lines_not_boundaries():
+    bus = EventBus()
+    seen = []
+    gate = threading.Event()
+
+    def slow(batch):
+        gate.wait(5)
+        seen.extend(batch)
+
+    bus.subscribe(slow, max_events=10, interval=0.01)
+    t0 = time.monotonic()
+    bus.publish(StepStarted(1, 1, "s"))
+    for i in range(500):
+        bus.publish(LogLine(f"line {i}"))
+    bus.publish(WarningLogged("[ERROR] boom", "error"))
+    bus.publish(RunFinished("error"))
+    assert time.monotonic() - t0 < 1.0  # the producer never waited
+    gate.set()
+    assert wait_for(lambda: any(type(e) is RunFinished for e in seen))
+
+    lines = [e for e in seen if type(e) is LogLine]
+    dropped = sum(e.count for e in seen if type(e) is Dropped)
+    assert len(lines) + dropped == 500
+    assert dropped > 0
+    assert [type(e) for e in seen if type(e) not in (LogLine, Dropped)] == [StepStarted, WarningLogged, RunFinished]
+
+
+def test_block_subscriber_sees_everything_in_order():
+    bus = EventBus()
+    seen = []
+
+    def slow(batch):
+        time.sleep(0.02)
+        seen.extend(batch)
+
+    bus.subscribe(slow, max_events=5, max_lines=10, policy="block", interval=0.005, timeout=10)
+    for i in range(50):
+        bus.publish(LogLine(str(i)))
+        bus.publish_output(f"out {i}")
+    bus.publish(RunFinished("ok"))
+    assert bus.flush(10)
+    text = []
+    for e in seen:
+        text.extend(e.lines if type(e) is OutputChunk else [getattr(e, "text", None)])
+    expected = []
+    for i in range(50):
+        expected += [str(i), f"out {i}"]
+    assert text[:-1] == expected
+    assert seen[-1] == RunFinished("ok")
+    assert not any(type(e) is Dropped for e in seen)
+
+
+def test_flush_waits_for_block_subscribers_only():
+    bus = EventBus()
+    stuck = threading.Event()
+    lines = []
+    bus.subscribe(lambda batch: stuck.wait(10), interval=0.01)
+    bus.subscribe(text_sink(lines.append), policy="block", interval=0.01)
+    bus.publish(LogLine("hello"))
+    bus.publish(RunFinished("ok"))
+    t0 = time.monotonic()
+    assert bus.flush(5)
+    assert time.monotonic() - t0 < 2
+    assert lines == ["hello"]  # delivered before flush returned
+    stuck.set()
+
+
+def test_delivery_thread_exits_when_idle_and_restarts():
+    bus = EventBus()
+    seen = []
+    sub = bus.subscribe(seen.extend, interval=0.01)
+    sub.IDLE_EXIT = 0.05
+    bus.publish(LogLine("a"))
+    assert wait_for(lambda: sub._thread is None)
+    assert seen == [LogLine("a")]
+    bus.publish(LogLine("b"))
+    assert sub._thread is not None or seen[-1] == LogLine("b")
+    assert wait_for(lambda: seen == [LogLine("a"), LogLine("b")])
+
+
+def test_closed_subscription_gets_nothing():
+    bus = EventBus()
+    sub = bus.subscribe()
+    sub.close()
+    bus.publish(LogLine("late"))
+    assert sub.drain() == []
@@ -0,0 +1,73 @@
+"""FleetAgent JSON-RPC error mapping."""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from fixer.fleet import FleetAgent
+
+
+@pytest.fixture
+def agent(appdata):
+    return FleetAgent(stub=True)
+
+
+def test_unknown_method(agent):
+    assert agent.dispatch("reboot", {})[1]["code"] == -32601
+
+
+def test_profile_must_be_an_object(agent):
+    result, error = agent.dispatch("start", {"profile": ["cleanup"]})
+    assert result is None
+    assert error["code"] == -32602
+    assert agent.status() == {"state": "idle"}
+
+
+def test_value_error_from_build_steps(agent, monkeypatch):
+    def boom(self, profile):
+        raise ValueError("bad target")
+
+    monkeypatch.setattr(type(agent.engine), "build_steps", boom)
+    assert agent.dispatch("start", {"profile": {}})[1] == {"code": -32602, "message": "invalid params: bad target"}
+
+
+@pytest.mark.parametrize("params", [{"since": "abc"}, {"wait": "soon"}, {"limit": None}, ["x", "y"]])
+def test_logs_rejects_non_numeric(agent, params):
+    assert agent.dispatch("logs", params)[1]["code"] == -32602
+
+
+def test_unexpected_error_is_internal(agent, monkeypatch):
+    def boom():
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr(agent, "status", boom)
+    assert agent.dispatch("status", None)[1] == {"code": -32603, "message": "internal error: RuntimeError: disk on fire"}
+
+
+def _post(url, body):
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=5) as r:
+            return r.status, json.loads(r.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode("utf-8"))
+
+
+def test_http_errors_are_json_rpc_replies(agent):
+    server = agent.make_server("127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/rpc"
+    try:
+        assert _post(url, b"[1, 2]") == (
+            400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "invalid request"}}
+        )
+        code, resp = _post(url, json.dumps({"id": 7, "method": "start", "params": {"profile": [1]}}).encode())
+        assert code == 200 and resp["id"] == 7 and resp["error"]["code"] == -32602
+        code, resp = _post(url, json.dumps({"id": 8, "method": "logs", "params": {"since": "x"}}).encode())
+        assert code == 200 and resp["error"]["code"] == -32602
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,29 @@
+"""Translation catalogs and the --lang-report mode."""
+
+import json
+
+from fixer.cli import main
+from fixer.i18n import Catalog, lang_report
+
+
+def write(folder, code, data):
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / f"{code}.json").write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_fallback_chain_and_report(tmp_path):
+    write(tmp_path, "en", {"hello": "Hello", "bye": "Bye"})
+    write(tmp_path, "pt", {"hello": "Olá"})
+    write(tmp_path, "pt-BR", {"_meta": {"name": "Português (Brasil)"}})
+    cat = Catalog([str(tmp_path)])
+    assert cat.chain("pt-BR") == ["pt-BR", "pt", "en"]
+    assert cat.compile("pt-BR") == {"hello": "Olá", "bye": "Bye"}
+    assert cat.report() == {"en": [], "pt": ["bye"], "pt-BR": ["bye"]}
+    lines = []
+    assert lang_report(cat, lines.append) == 1
+    assert "pt: 1 missing\n  bye" in lines
+
+
+def test_package_cli_handles_lang_report(appdata, capsys):
+    assert main(["--lang-report"]) == 0  # the shipped catalogs are complete
+    assert "en: 0 missing" in capsys.readouterr().out
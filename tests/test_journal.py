@@ -0,0 +1,33 @@
+"""Run journal naming and pruning."""
+
+import json
+import os
+
+from fixer.journal import RunJournal
+
+
+def test_runs_in_the_same_second_get_their_own_journal(appdata):
+    journals = [RunJournal.create() for _ in range(3)]
+    try:
+        paths = [j.path for j in journals]
+        assert len(set(paths)) == 3
+        assert sorted(paths) == paths  # name order is creation order
+        for i, j in enumerate(journals):
+            j.write("run_start", run=i)
+    finally:
+        for j in journals:
+            j.close()
+    for i, path in enumerate(paths):
+        with open(path, encoding="utf-8") as f:
+            assert [json.loads(line)["run"] for line in f] == [i]
+
+
+def test_old_journals_are_pruned(appdata):
+    folder = appdata / "journal"
+    folder.mkdir(parents=True)
+    for i in range(RunJournal.KEEP + 5):
+        for ext in (".jsonl", ".html"):
+            (folder / f"run-20200101-0000{i:02d}{ext}").write_text("")
+    RunJournal.create().close()
+    assert len(list(folder.glob("run-*.jsonl"))) == RunJournal.KEEP
+    assert not os.path.exists(folder / "run-20200101-000000.html")
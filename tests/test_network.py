@@ -0,0 +1,117 @@
+"""DNS/TCP probes against a local DNS stub and TCP listener on 127.0.0.1."""
+
+import socket
+import time
+
+import pytest
+
+import fixer.network as network
+from benchmarks.fake_network import FakeNetwork
+from fixer.network import format_network_delta, measure_network, network_deltas, probe_dns, probe_tcp
+
+
+@pytest.fixture
+def net():
+    n = FakeNetwork(dns_delay_ms=10).start()
+    yield n
+    n.stop()
+
+
+@pytest.fixture
+def silent_udp():
+    """A bound UDP port that never answers."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    yield "%s:%d" % sock.getsockname()
+    sock.close()
+
+
+@pytest.fixture
+def closed_tcp():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    addr = "%s:%d" % sock.getsockname()
+    sock.close()
+    return addr
+
+
+def test_probe_dns_direct(net):
+    assert probe_dns("www.example.com", net.dns_addr) >= 10
+    assert net.queries == 1
+    with pytest.raises(OSError, match="rcode 2"):
+        probe_dns("fail.example.com", net.dns_addr)
+
+
+def test_probe_dns_timeout(silent_udp):
+    t0 = time.perf_counter()
+    with pytest.raises(OSError):
+        probe_dns("www.example.com", silent_udp, timeout=0.3)
+    assert 0.25 < time.perf_counter() - t0 < 2
+
+
+def test_probe_tcp(net, closed_tcp):
+    assert probe_tcp(net.tcp_addr) >= 0
+    with pytest.raises(OSError):
+        probe_tcp(closed_tcp, timeout=1)
+
+
+def test_system_resolver_lookup_times_out(monkeypatch):
+    monkeypatch.setattr(network.socket, "getaddrinfo", lambda *a, **kw: time.sleep(2))
+    t0 = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        probe_dns("www.example.com", "", timeout=0.2)
+    assert time.perf_counter() - t0 < 1
+
+
+def test_measure_against_local_targets(net, silent_udp, closed_tcp):
+    tcp_port = net.tcp_addr.split(":")[1]
+    m = measure_network(
+        ["www.example.com", "fail.example.com"], [f"resolver:{tcp_port}", closed_tcp], net.dns_addr, samples=2
+    )
+    assert m["dns_server"] == net.dns_addr
+    assert m["dns"]["www.example.com"]["ok"] == 2
+    assert m["dns"]["www.example.com"]["median_ms"] >= 10
+    assert m["dns"]["fail.example.com"] == {"ok": 0, "fail": 2, "error": "DNS rcode 2"}
+    # "resolver" is replaced by the DNS server's host
+    assert m["tcp"][f"127.0.0.1:{tcp_port}"]["ok"] == 2
+    assert m["tcp"][closed_tcp]["fail"] == 2
+
+    silent = measure_network(["www.example.com"], [], silent_udp, samples=1, timeout=0.3)
+    assert silent["dns"]["www.example.com"]["fail"] == 1
+    assert silent["secs"] < 2
+
+
+def test_default_server_is_the_first_system_resolver(net, monkeypatch):
+    monkeypatch.setattr(network, "system_dns_servers", lambda: [net.dns_addr, "192.0.2.1"])
+    m = measure_network(["www.example.com"], [], samples=1)
+    assert m["dns_server"] == net.dns_addr
+    assert net.queries == 1
+
+
+def test_no_resolver_falls_back_to_the_system_lookup(monkeypatch):
+    monkeypatch.setattr(network, "system_dns_servers", lambda: [])
+    m = measure_network(["localhost"], ["resolver:53"], samples=2)
+    assert m["dns_server"] == ""
+    assert m["tcp"] == {}  # no resolver to connect to
+    assert m["dns"]["localhost"]["ok"] == 2
+    row = network_deltas(m, m)[0]
+    assert row["basis"] == "first"
+    assert format_network_delta(row).endswith("[first lookup via the system resolver]")
+
+
+def test_deltas_compare_medians(net):
+    slow = FakeNetwork(dns_delay_ms=60).start()
+    try:
+        before = measure_network(["www.example.com"], [], slow.dns_addr, samples=3)
+    finally:
+        slow.stop()
+    after = measure_network(["www.example.com"], [], net.dns_addr, samples=3)
+    after["dns_server"] = before["dns_server"] = "same"
+    (row,) = network_deltas(before, after)
+    assert row["basis"] == "median"
+    assert row["delta_ms"] < -30
+    assert format_network_delta(row).startswith("[NET] DNS www.example.com: ")
+
+    failed = dict(after, dns={"www.example.com": {"ok": 0, "fail": 3, "error": "timed out"}})
+    line = format_network_delta(network_deltas(before, failed)[0])
+    assert line.endswith("-> failed, failures 0 -> 3 (timed out)")
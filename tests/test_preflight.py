@@ -0,0 +1,124 @@
+"""Pre-flight probes, snapshot caching and the plan decisions they drive."""
+
+import time
+
+import pytest
+
+import fixer.preflight as preflight
+from fixer import StepEngine
+from fixer.preflight import Preflight, Probe, preflight_findings, run_probes
+from fixer.runner import StubCommandRunner
+
+GB = 1024**3
+
+
+def free_space(free_gb, total_gb=100):
+    return Probe("free_space", lambda: {"drives": {"C:": {"total": total_gb * GB, "free": free_gb * GB}}, "system": "C:"})
+
+
+def reboot(pending):
+    return Probe("pending_reboot", lambda: {"pending": pending, "reasons": ["CBS"] if pending else []})
+
+
+def services(start="AUTO_START"):
+    return Probe("wu_services", lambda: {"supported": True, "services": {"wuauserv": {"state": "RUNNING", "start": start}}})
+
+
+def plan(probes, **profile):
+    logs = []
+    engine = StepEngine(logs.append, runner_cls=StubCommandRunner, dry_run=True, journal=False, probes=probes)
+    selected = {
+        "targets": [],
+        "recycle_bin": False,
+        "flush_dns": False,
+        "component_cleanup": True,
+        "dism_scan": False,
+        "dism_restore": True,
+        "sfc": True,
+        "chkdsk": False,
+        "reset_network": False,
+    }
+    steps = engine.build_steps(dict(selected, **profile))
+    out = engine.adjust_plan(steps, engine.preflight.snapshot())
+    engine.bus.flush()
+    return [name for name, _ in out], "\n".join(logs).splitlines()
+
+
+# ----- probes -----
+def test_run_probes_reports_errors_and_timeouts():
+    def broken():
+        raise OSError("sc failed")
+
+    t0 = time.perf_counter()
+    out = run_probes([Probe("ok", lambda: {"x": 1}), Probe("broken", broken), Probe("hung", lambda: time.sleep(2), 0.2)])
+    assert time.perf_counter() - t0 < 1  # the hung probe is not waited for
+    assert out["ok"] == {"ok": True, "data": {"x": 1}}
+    assert out["broken"] == {"ok": False, "error": "sc failed"}
+    assert out["hung"] == {"ok": False, "error": "timed out after 0.2s"}
+    assert preflight_findings(out) == [
+        "[WARN] Pre-flight broken: sc failed",
+        "[WARN] Pre-flight hung: timed out after 0.2s",
+    ]
+
+
+def test_snapshot_is_cached_until_max_age(monkeypatch):
+    now = {"t": 1000.0}
+    monkeypatch.setattr(preflight.time, "time", lambda: now["t"])
+    calls = []
+    pf = Preflight([Probe("count", lambda: calls.append(1) or {"n": len(calls)})], max_age=60)
+    first = pf.snapshot()
+    now["t"] += 59
+    assert pf.snapshot() is first and len(calls) == 1
+    now["t"] += 2
+    assert pf.snapshot()["count"]["data"] == {"n": 2}
+    assert pf.snapshot(force=True)["count"]["data"] == {"n": 3}
+    pf.update({"extra": {"ok": True, "data": {}}})
+    assert set(pf.snapshot()) == {"count", "extra"}
+
+
+# ----- decisions -----
+def test_pass_leaves_the_plan_alone(appdata):
+    steps, logs = plan([free_space(50), reboot(False), services()])
+    assert steps == ["DISM Component Cleanup", "DISM RestoreHealth", "SFC ScanNow"]
+    assert not [m for m in logs if m.startswith(("[WARN]", "[PLAN]"))]
+
+
+def test_warn_only_findings(appdata):
+    stack = Probe("servicing_stack", lambda: {"packages_pending": True})
+    steps, logs = plan([free_space(50), stack, services("DISABLED")])
+    assert steps == ["DISM Component Cleanup", "DISM RestoreHealth", "SFC ScanNow"]
+    assert "[WARN] Servicing stack has packages pending; DISM may wait or fail." in logs
+    assert any(m.startswith("[WARN] Service wuauserv is disabled") for m in logs)
+
+
+def test_pending_reboot_blocks_servicing_steps(appdata):
+    steps, logs = plan([free_space(50), reboot(True)])
+    assert steps == ["SFC ScanNow"]
+    assert "[WARN] A reboot is pending (CBS)." in logs
+    assert sum(m.startswith("[PLAN] Skipping DISM") for m in logs) == 2
+
+
+def test_no_auto_adjust_only_warns(appdata):
+    steps, logs = plan([free_space(1), reboot(True)], auto_adjust=False)
+    assert steps == ["DISM Component Cleanup", "DISM RestoreHealth", "SFC ScanNow"]
+    assert "[WARN] A reboot is pending (CBS)." in logs
+    assert not [m for m in logs if m.startswith("[PLAN]")]
+
+
+@pytest.mark.parametrize(
+    "profile, first, note",
+    [
+        ({"targets": ["temp"]}, "Cleanup", None),  # already first, nothing to change
+        ({}, "DISM Component Cleanup", "[WARN] Low disk space: consider selecting Cleanup (Temp files)"),
+        ({"auto_clean_temp": True}, "Cleanup", "[PLAN] Low disk space: adding Temp cleanup before the other steps."),
+    ],
+)
+def test_low_disk(appdata, profile, first, note):
+    steps, logs = plan([free_space(1)], **profile)
+    assert steps[0] == first
+    assert "[WARN] Low disk space on C: (1.0 GB free)." in logs
+    advice = [m for m in logs if m.startswith(("[PLAN] Low disk", "[WARN] Low disk space:"))]
+    if note is None:
+        assert advice == []
+    else:
+        assert len(advice) == 1 and advice[0].startswith(note)
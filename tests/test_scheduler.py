@@ -0,0 +1,179 @@
+"""Schedule evaluation driven by a fake clock and idle source."""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from fixer.scheduler import CronExpr, Schedule, Scheduler
+
+
+def ts(*args) -> float:
+    return datetime(*args).timestamp()
+
+
+def local(t: float) -> datetime:
+    return datetime.fromtimestamp(t)
+
+
+class FakeClock:
+    def __init__(self, t: float):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def make_scheduler(specs, clock, idle=lambda: None, host="host-a"):
+    """A Scheduler keeping its state in the current APPDATA (see the ``appdata`` fixture)."""
+    logs = []
+    return Scheduler(specs, clock=clock, idle=idle, host=host, log_cb=logs.append), logs
+
+
+@pytest.fixture
+def berlin(monkeypatch):
+    if not hasattr(time, "tzset"):
+        pytest.skip("needs time.tzset")
+    monkeypatch.setenv("TZ", "Europe/Berlin")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+# ----- cron parsing -----
+def test_cron_fields():
+    c = CronExpr("*/15 9-17 * jan-mar mon,fri")
+    assert c.sets["minute"] == {0, 15, 30, 45}
+    assert c.sets["hour"] == set(range(9, 18))
+    assert c.sets["month"] == {1, 2, 3}
+    assert c.sets["weekday"] == {1, 5}
+    assert CronExpr("0 0 * * 7").sets["weekday"] == {0}
+    assert CronExpr("@daily").sets["hour"] == {0}
+    assert CronExpr("5/20 * * * *").sets["minute"] == {5, 25, 45}
+
+
+@pytest.mark.parametrize("text", ["* * * *", "60 * * * *", "* 24 * * *", "0 0 0 * *", "5-1 * * * *", "0 0 * foo *"])
+def test_cron_rejects(text):
+    with pytest.raises((ValueError, KeyError)):
+        CronExpr(text)
+
+
+def test_cron_day_or_weekday():
+    # both restricted: the 13th or any Friday
+    c = CronExpr("0 12 13 * fri")
+    assert local(c.next_after(ts(2026, 3, 1))) == datetime(2026, 3, 6, 12, 0)  # a Friday before the 13th
+    assert local(c.next_after(ts(2026, 3, 12, 13))) == datetime(2026, 3, 13, 12, 0)
+    # a stepped "*" is not a restriction (as in Vixie cron): odd days that are Mondays
+    c = CronExpr("0 12 */2 * mon")
+    assert local(c.next_after(ts(2026, 3, 1))) == datetime(2026, 3, 9, 12, 0)
+
+
+def test_cron_month_boundary():
+    c = CronExpr("0 3 1 * *")
+    assert local(c.next_after(ts(2026, 1, 31, 23, 59))) == datetime(2026, 2, 1, 3, 0)
+    assert local(c.next_after(ts(2026, 12, 31, 12))) == datetime(2027, 1, 1, 3, 0)
+    # the 31st only exists in some months
+    assert local(CronExpr("0 0 31 * *").next_after(ts(2026, 4, 1))) == datetime(2026, 5, 31, 0, 0)
+
+
+def test_cron_dst_spring_forward(berlin):
+    # 2026-03-29 02:00 -> 03:00 in Europe/Berlin: 02:30 does not exist that day
+    c = CronExpr("30 2 * * *")
+    t = c.next_after(ts(2026, 3, 28, 12))
+    assert local(t).date() == datetime(2026, 3, 29).date()  # the day is not skipped
+    assert local(c.next_after(t)) == datetime(2026, 3, 30, 2, 30)
+
+
+def test_cron_dst_fall_back(berlin):
+    # 2026-10-25 03:00 -> 02:00: 02:30 happens twice but the job runs once
+    c = CronExpr("30 2 * * *")
+    first = c.next_after(ts(2026, 10, 25, 1))
+    assert local(first) == datetime(2026, 10, 25, 2, 30)
+    assert local(c.next_after(first)) == datetime(2026, 10, 26, 2, 30)
+
+
+# ----- jitter -----
+def test_jitter_stable_per_host():
+    spec = {"id": "nightly", "cron": "0 2 * * *", "jitter_minutes": 60}
+    a1, a2 = Schedule(spec, "host-a"), Schedule(spec, "host-a")
+    assert a1.offset == a2.offset
+    assert 0 <= a1.offset < 3600
+    offsets = {Schedule(spec, f"host-{i}").offset for i in range(20)}
+    assert len(offsets) > 10  # spread across the fleet
+    due = a1.next_due(ts(2026, 5, 1, 12))
+    assert due == ts(2026, 5, 2, 2) + a1.offset
+
+
+# ----- Scheduler -----
+def test_new_schedule_anchors_at_now(appdata):
+    clock = FakeClock(ts(2026, 5, 1, 12))
+    sched, _ = make_scheduler([{"id": "n", "cron": "0 2 * * *"}], clock)
+    assert sched.due() == []
+    assert sched.next_times() == {"n": ts(2026, 5, 2, 2)}
+
+
+def test_missed_run_catch_up(appdata):
+    clock = FakeClock(ts(2026, 5, 1, 12))
+    sched, _ = make_scheduler([{"id": "n", "cron": "0 2 * * *"}], clock)
+    sched.due()
+    clock.t = ts(2026, 5, 3, 9)  # machine was off at 02:00 on both nights
+    launched = []
+    assert sched.run_pending(lambda profile: launched.append(profile) or "ok") == 1
+    assert len(launched) == 1  # one catch-up run, not one per missed night
+    assert sched.state["n"]["last_status"] == "ok"
+    assert sched.due() == []
+    clock.t = ts(2026, 5, 4, 2)
+    assert [s.id for s in sched.due()] == ["n"]
+
+
+def test_missed_run_grace_without_catch_up(appdata):
+    clock = FakeClock(ts(2026, 5, 1, 12))
+    sched, logs = make_scheduler([{"id": "n", "cron": "0 2 * * *", "catch_up": False}], clock)
+    sched.due()
+    clock.t = ts(2026, 5, 2, 2) + Schedule.GRACE - 1  # late, but within the grace window
+    assert [s.id for s in sched.due()] == ["n"]
+    clock.t = ts(2026, 5, 2, 2) + Schedule.GRACE + 1
+    assert sched.due() == []
+    assert any("missed run" in m for m in logs)
+    assert sched.state["n"]["anchor"] == clock.t
+    assert sched.next_times()["n"] == ts(2026, 5, 3, 2)
+
+
+def test_state_survives_restart(appdata):
+    clock = FakeClock(ts(2026, 5, 1, 12))
+    spec = [{"id": "n", "cron": "0 2 * * *"}]
+    sched, _ = make_scheduler(spec, clock)
+    sched.due()
+    clock.t = ts(2026, 5, 2, 8)
+    again, _ = make_scheduler(spec, clock)
+    assert [s.id for s in again.due()] == ["n"]  # anchor came from the state file
+
+
+def test_idle_gating(appdata):
+    clock = FakeClock(ts(2026, 5, 1, 12))
+    idle = {"secs": 300}
+    spec = [{"id": "idle", "idle_minutes": 10, "min_interval_hours": 24}]
+    sched, _ = make_scheduler(spec, clock, idle=lambda: idle["secs"])
+    assert sched.due() == []
+    idle["secs"] = None  # unknown (no desktop session): never triggers
+    assert sched.due() == []
+    idle["secs"] = 601
+    assert [s.id for s in sched.due()] == ["idle"]
+    sched.run_pending(lambda profile: "ok")
+    clock.t += 23 * 3600  # still idle, but within min_interval
+    assert sched.due() == []
+    clock.t += 2 * 3600
+    assert [s.id for s in sched.due()] == ["idle"]
+
+
+def test_disabled_and_invalid_schedules(appdata):
+    clock = FakeClock(ts(2026, 5, 1, 12))
+    sched, logs = make_scheduler(
+        [{"id": "off", "cron": "* * * * *", "enabled": False}, {"id": "bad", "cron": "nope"}, {"id": "empty"}], clock
+    )
+    assert [s.id for s in sched.schedules] == ["off"]
+    assert len([m for m in logs if m.startswith("[WARN] Ignoring schedule")]) == 2
+    clock.t += 3600
+    assert sched.due() == []
+    assert sched.next_times() == {"off": None}
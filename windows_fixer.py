@@ -1,24 +1,52 @@
 import os
 import sys
 import json
-import shutil
+import glob
+import time
 import ctypes
-import subprocess
 import threading
-import queue
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, font as tkfont
 import webbrowser
 from datetime import date
 import re
+import urllib.error
 import urllib.request
 
+from array import array
 from io import BytesIO
-from PIL import Image, ImageDraw
-import winsound
 
-APP_ID = "WindowsFixer"
-APP_VERSION = "v1.0.0"
+from fixer.cleanup import CLEANUP_TARGETS, expand_target_paths, format_bytes, scan_space
+from fixer.cli import parse_args, run_cli
+from fixer.engine import DEFAULT_PROFILE, StepEngine
+from fixer.events import (
+    BytesFreed,
+    Dropped,
+    LogLine,
+    OutputChunk,
+    Progress,
+    RunFinished,
+    StepFinished,
+    StepStarted,
+    WarningLogged,
+    log_line,
+)
+from fixer.i18n import BASE_LANGUAGE, Catalog
+from fixer.meta import APP_VERSION
+from fixer.profiling import PROFILER
+from fixer.storage import JsonStore, SettingsStore, app_data_path, load_settings, resource_path
+from fixer.system import is_admin, list_drives, relaunch_as_admin
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:  # Only needed for the About window artwork
+    Image = ImageDraw = None
+
+try:
+    import winsound
+except ImportError:  # Non-Windows (benchmarks / headless tooling)
+    winsound = None
+
 BUILD_DATE = date.today().isoformat()
 
 DONATE_PAGE = "https://buymeacoffee.com/ilukezippo"
@@ -26,32 +54,14 @@ GITHUB_PAGE = "https://github.com/ilukezippo/Windows_Fixer"
 GITHUB_API_LATEST = "https://api.github.com/repos/ilukezippo/Windows_Fixer/releases/latest"
 GITHUB_RELEASES_PAGE = "https://github.com/ilukezippo/Windows_Fixer/releases"
 
+UPDATE_CACHE_TTL = 12 * 3600
+UPDATE_FAIL_BACKOFF = 3600
+UPDATE_TIMEOUT = 5
+
 WIN_W = 1280
 WIN_H = 980
 
 
-def resource_path(relative_path: str) -> str:
-    # 1) Prefer files next to the exe (portable)
-    try:
-        if getattr(sys, "frozen", False):
-            exe_dir = os.path.dirname(sys.executable)
-        else:
-            exe_dir = os.path.dirname(os.path.abspath(__file__))
-        candidate = os.path.join(exe_dir, relative_path)
-        if os.path.exists(candidate):
-            return candidate
-    except Exception:
-        pass
-
-    # 2) Fallback to PyInstaller temp extraction
-    try:
-        base_path = sys._MEIPASS  # type: ignore[attr-defined]
-    except Exception:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
-
-
-
 def set_app_icon(root):
     ico = resource_path("icon.ico")
     if os.path.exists(ico):
@@ -82,6 +92,8 @@ def load_flag_image():
 
 
 def make_donate_image(w=160, h=44):
+    if Image is None:
+        return None
     r = h // 2
     top = (255, 187, 71)
     mid = (247, 162, 28)
@@ -129,6 +141,9 @@ def play_success_sound(log_cb=None):
         log_cb(f"[SOUND] Exists success.wav: {os.path.exists(wav1)}")
         log_cb(f"[SOUND] Exists Success.wav: {os.path.exists(wav2)}")
 
+    if winsound is None:
+        return False
+
     try:
         if os.path.exists(wav):
             # Purge any previous sound + play async
@@ -148,207 +163,229 @@ def play_success_sound(log_cb=None):
         return False
 
 
-def _settings_path():
-    base = os.environ.get("APPDATA") or os.path.expanduser("~")
-    folder = os.path.join(base, APP_ID)
-    os.makedirs(folder, exist_ok=True)
-    return os.path.join(folder, "settings.json")
+# ---------- Update check ----------
+def is_headless() -> bool:
+    return "--headless" in sys.argv or os.environ.get("WINDOWS_FIXER_HEADLESS") == "1"
 
 
-def load_settings():
-    path = _settings_path()
-    try:
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return {"always_admin": False, "language": "en"}
+def update_endpoint(settings: dict) -> str:
+    # Env var wins so a mirror / local stand-in can be used without touching settings.
+    return os.environ.get("WINDOWS_FIXER_UPDATE_URL") or settings.get("update_endpoint") or GITHUB_API_LATEST
 
 
-def save_settings(data: dict):
-    path = _settings_path()
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+def _read_update_cache() -> dict:
+    return JsonStore("update_cache.json").load()
 
 
-def is_admin() -> bool:
-    try:
-        return ctypes.windll.shell32.IsUserAnAdmin() != 0
-    except Exception:
-        return False
+def _write_update_cache(cache: dict):
+    JsonStore("update_cache.json").save(cache)
 
 
-def relaunch_as_admin():
-    params = " ".join([f'"{a}"' for a in sys.argv])
-    ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, params, None, 0)
-    sys.exit(0)
+def fetch_latest_release(endpoint: str, ttl: int = UPDATE_CACHE_TTL, force: bool = False, timeout: int = UPDATE_TIMEOUT):
+    """Return the latest-release JSON, hitting the network at most once per ``ttl``.
 
+    The cached copy is revalidated with If-None-Match, a failed request is not
+    retried for UPDATE_FAIL_BACKOFF (or until a rate-limit reset), and the last
+    good response is returned while offline. ``force`` (manual check) ignores
+    the TTL and backoff but still sends the ETag. Raises only when there is
+    nothing cached at all.
+    """
+    now = time.time()
+    cache = _read_update_cache()
+    if cache.get("endpoint") != endpoint:
+        cache = {"endpoint": endpoint}
+    data = cache.get("data")
 
-def list_drives():
-    drives = []
-    bitmask = ctypes.windll.kernel32.GetLogicalDrives()
-    for i in range(26):
-        if bitmask & (1 << i):
-            letter = chr(ord("A") + i)
-            path = f"{letter}:\\"
-            if os.path.exists(path):
-                drives.append(f"{letter}:")
-    return drives or ["C:"]
+    if not force:
+        if data is not None and now - cache.get("fetched", 0) < ttl:
+            return data
+        if now < cache.get("retry_after", 0):
+            if data is not None:
+                return data
+            raise OSError("update check backing off after a failed request")
 
+    headers = {"User-Agent": "Windows-Fixer", "Accept": "application/json"}
+    if data is not None and cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
 
-def safe_rmtree(path: str, log_cb):
     try:
-        if os.path.isdir(path) and not os.path.islink(path):
-            shutil.rmtree(path, ignore_errors=True)
+        req = urllib.request.Request(endpoint, headers=headers)
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            data = json.loads(r.read().decode("utf-8", "replace"))
+            cache.update(data=data, etag=r.headers.get("ETag"), fetched=now, retry_after=0)
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and data is not None:
+            cache.update(fetched=now, retry_after=0)
         else:
-            try:
-                os.remove(path)
-            except Exception:
-                pass
-    except Exception as e:
-        log_cb(f"[WARN] Could not delete {path}: {e}")
-
-
-def delete_temp_folders(delete_prefetch: bool, log_cb, should_abort):
-    targets = []
-    user_temp = os.environ.get("TEMP") or os.path.join(os.environ.get("USERPROFILE", ""), "AppData", "Local", "Temp")
-    if user_temp:
-        targets.append(user_temp)
-
-    win_temp = os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Temp")
-    targets.append(win_temp)
-
-    if delete_prefetch:
-        targets.append(os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Prefetch"))
-
-    for folder in targets:
-        if should_abort():
-            log_cb("[INFO] Aborted cleanup.")
-            return
-
-        if not folder or not os.path.exists(folder):
-            log_cb(f"[INFO] Skip (not found): {folder}")
-            continue
-
-        log_cb(f"[INFO] Cleaning: {folder}")
-        try:
-            for name in os.listdir(folder):
-                if should_abort():
-                    log_cb("[INFO] Aborted cleanup.")
-                    return
-                safe_rmtree(os.path.join(folder, name), log_cb)
-            log_cb(f"[OK] Cleaned: {folder}")
-        except PermissionError:
-            log_cb(f"[WARN] Permission denied: {folder} (try Admin)")
-        except Exception as e:
-            log_cb(f"[WARN] Error cleaning {folder}: {e}")
-
-
-def clear_recycle_bin(log_cb):
-    try:
-        ctypes.windll.shell32.SHEmptyRecycleBinW(None, None, 0x1 | 0x2 | 0x4)
-        log_cb("[OK] Recycle Bin cleared (or already empty).")
-    except Exception as e:
-        log_cb(f"[WARN] Could not clear Recycle Bin: {e}")
-
-
-class CommandRunner:
-    def __init__(self, log_cb):
-        self.log_cb = log_cb
-        self.current_proc = None
-        self._cancel_all = False
-        self._skip_step = False
-
-    def reset_all(self):
-        self._cancel_all = False
-        self._skip_step = False
-        self.current_proc = None
-
-    def request_cancel_all(self):
-        self._cancel_all = True
-        self._terminate_current("Cancel requested")
-
-    def request_skip_step(self):
-        self._skip_step = True
-        self._terminate_current("Skip requested")
-
-    def reset_flags_for_step(self):
-        self._skip_step = False
-
-    def cancel_all_requested(self) -> bool:
-        return self._cancel_all
-
-    def skip_requested(self) -> bool:
-        return self._skip_step
+            reset = e.headers.get("X-RateLimit-Reset") if e.headers else None
+            cache["retry_after"] = float(reset) if reset and reset.isdigit() else now + UPDATE_FAIL_BACKOFF
+            _write_update_cache(cache)
+            if data is None:
+                raise
+            return data
+    except Exception:
+        cache["retry_after"] = now + UPDATE_FAIL_BACKOFF
+        _write_update_cache(cache)
+        if data is None:
+            raise
+        return data
 
-    def _terminate_current(self, reason: str):
-        if self.current_proc:
-            try:
-                self.log_cb(f"[INFO] {reason}. Terminating current command...")
-                self.current_proc.terminate()
-            except Exception:
-                pass
+    _write_update_cache(cache)
+    return data
 
-    def run_cmd(self, cmd):
-        shown = cmd if isinstance(cmd, str) else " ".join(cmd)
-        self.log_cb(f"\n=== RUN: {shown} ===")
 
-        try:
-            self.current_proc = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-            )
-        except Exception as e:
-            self.log_cb(f"[ERROR] Failed to start command: {e}")
-            self.current_proc = None
-            return "error"
+# ---------- Log view ----------
+SEV_PLAIN, SEV_INFO, SEV_OK, SEV_WARN, SEV_ERROR, SEV_HEADER = range(6)
+# LogLine.level (fixer.events) -> colour class
+SEV_BY_LEVEL = {
+    "error": SEV_ERROR,
+    "warn": SEV_WARN,
+    "ok": SEV_OK,
+    "info": SEV_INFO,
+    "net": SEV_INFO,
+    "plan": SEV_INFO,
+    "header": SEV_HEADER,
+}
 
-        try:
-            if self.current_proc.stdout:
-                for line in self.current_proc.stdout:
-                    if self._cancel_all:
-                        self._terminate_current("Cancel requested")
-                        break
-                    if self._skip_step:
-                        self._terminate_current("Skip requested")
-                        break
-                    self.log_cb(line.rstrip("\n"))
-        finally:
-            try:
-                if self.current_proc and self.current_proc.stdout:
-                    self.current_proc.stdout.close()
-            except Exception:
-                pass
 
-        try:
-            if self.current_proc:
-                self.current_proc.wait(timeout=10)
-        except Exception:
-            try:
-                if self.current_proc:
-                    self.current_proc.kill()
-            except Exception:
-                pass
+class LineStore:
+    """Append-only log lines: UTF-8 text in one buffer, line ends in an array.
 
-        self.current_proc = None
+    Reading any window of lines costs the same whatever the total, and
+    clearing is O(1). Each line keeps the severity it was appended with.
+    """
 
-        if self._cancel_all:
-            self.log_cb("=== STOPPED (cancel) ===\n")
-            return "cancel"
-        if self._skip_step:
-            self.log_cb("=== SKIPPED ===\n")
-            return "skip"
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._buf = bytearray()
+        self._ends = array("Q")
+        self._sev = array("B")
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def append(self, msg: str, sev: int = SEV_PLAIN):
+        for part in msg.split("\n"):
+            self._buf += part.encode("utf-8", "replace")
+            self._buf += b"\n"
+            self._ends.append(len(self._buf))
+            self._sev.append(sev)
+
+    def line(self, i: int) -> str:
+        start = self._ends[i - 1] if i else 0
+        return self._buf[start : self._ends[i] - 1].decode("utf-8", "replace")
+
+    def window(self, start: int, stop: int) -> list:
+        """[(text, severity)] for lines ``start`` .. ``stop - 1`` that exist."""
+        stop = min(stop, len(self._ends))
+        return [(self.line(i), self._sev[i]) for i in range(max(0, start), stop)]
+
+    def text(self) -> str:
+        return self._buf.decode("utf-8", "replace")
+
+
+class LogView(ttk.Frame):
+    """Log widget drawing only the visible lines of a LineStore on a Canvas.
+
+    A fixed pool of canvas text items (one per visible row) is re-pointed at
+    different lines on scroll, so scrolling and appending cost the same for
+    50 lines or 5 million. It follows the tail until the user scrolls up.
+    """
+
+    COLORS = {
+        SEV_PLAIN: "#1a1a1a",
+        SEV_INFO: "#1a1a1a",
+        SEV_OK: "#1b7f3b",
+        SEV_WARN: "#b26a00",
+        SEV_ERROR: "#c62828",
+        SEV_HEADER: "#1a56b0",
+    }
+    MAX_CHARS = 1000
+
+    def __init__(self, master, store=None, font=("Consolas", 9)):
+        super().__init__(master)
+        self.store = store if store is not None else LineStore()
+        self.font = tkfont.Font(self, font=font)
+        self.row_h = self.font.metrics("linespace") + 1
+        self.canvas = tk.Canvas(self, background="white", highlightthickness=0)
+        self.sb = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.sb.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.configure(yscrollcommand=self.sb.set)
+
+        self.top = 0
+        self.follow = True
+        self._items = []
+        self._shown = []
+
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<Enter>", lambda e: self.canvas.focus_set())
+        self.canvas.bind("<MouseWheel>", lambda e: self.yview("scroll", -int(e.delta / 120) * 3, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.yview("scroll", -3, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.yview("scroll", 3, "units"))
+        self.menu = tk.Menu(self, tearoff=0)
+        self.menu.add_command(command=self.copy_all)
+        self.canvas.bind("<Button-3>", lambda e: self.menu.tk_popup(e.x_root, e.y_root))
+
+    def rows(self) -> int:
+        return max(1, self.canvas.winfo_height() // self.row_h)
+
+    def _clamp(self):
+        self.top = max(0, min(self.top, len(self.store) - self.rows()))
+
+    def append_many(self, rows):
+        """Append (text, severity) rows."""
+        for msg, sev in rows:
+            self.store.append(msg, sev)
+        if self.follow:
+            self.top = len(self.store)
+        self.redraw()
+
+    def clear(self):
+        self.store.clear()
+        self.top = 0
+        self.follow = True
+        self.redraw()
+
+    def yview(self, *args):
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.store))
+        elif args[0] == "scroll":
+            n = int(args[1])
+            self.top += n * self.rows() if args[2] == "pages" else n
+        self._clamp()
+        self.follow = self.top >= len(self.store) - self.rows()
+        self.redraw()
+
+    def redraw(self):
+        rows = self.rows()
+        self._clamp()
+        while len(self._items) < rows:
+            y = len(self._items) * self.row_h + 2
+            self._items.append(self.canvas.create_text(4, y, anchor="nw", font=self.font, text=""))
+            self._shown.append(None)
+
+        visible = self.store.window(self.top, self.top + rows)
+        for i, item in enumerate(self._items):
+            row = visible[i] if i < len(visible) else ("", SEV_PLAIN)
+            if self._shown[i] != row:
+                text, sev = row
+                self.canvas.itemconfigure(item, text=text[: self.MAX_CHARS], fill=self.COLORS[sev])
+                self._shown[i] = row
+
+        total = len(self.store)
+        if total <= rows:
+            self.sb.set(0.0, 1.0)
+        else:
+            self.sb.set(self.top / total, (self.top + rows) / total)
 
-        self.log_cb("=== DONE ===\n")
-        return "ok"
+    def copy_all(self):
+        self.clipboard_clear()
+        self.clipboard_append(self.store.text())
 
 
 def add_option_with_desc(parent, text, desc, variable, wrap=560):
@@ -369,15 +406,27 @@ class App(tk.Tk):
 
         self.withdraw()
 
-        self.settings = load_settings()
-        self.lang = self.settings.get("language", "en")
+        self.settings = SettingsStore(on_error=lambda e: self.enqueue_log(f"[WARN] Could not save settings: {e}"))
+        self.catalog = Catalog()
+        self.lang = self.settings.get("language", BASE_LANGUAGE)
+        self.strings = self.catalog.compile(self.lang)
+        self._i18n = []
         self.var_always_admin = tk.BooleanVar(value=bool(self.settings.get("always_admin", False)))
+        self.var_background = tk.BooleanVar(value=bool(self.settings.get("background", False)))
 
         self.icon_path = set_app_icon(self)
 
-        self.log_queue = queue.Queue()
-        self.runner = CommandRunner(self.enqueue_log)
+        PROFILER.enabled = bool(self.settings.get("instrumentation", False))
+        self.var_instrumentation = tk.BooleanVar(value=PROFILER.enabled)
+        self.engine = StepEngine(None)
+        # Drained every 80 ms on the Tk thread; a stalled UI drops lines instead of growing the queue.
+        self.events = self.engine.bus.subscribe(max_events=5000, max_lines=50000)
+        self.step_index = self.step_name = None
+        self.run_freed = self.run_warnings = 0
+        self.runner = self.engine.runner
         self.worker_thread = None
+        # Per-folder space scan totals, kept for this session only.
+        self.space_cache = {}
         self.running = False
 
         self.var_select_all = tk.BooleanVar(value=False)
@@ -390,13 +439,13 @@ class App(tk.Tk):
         self.var_chkdsk_mode = tk.StringVar(value="scan")
         self.var_drive = tk.StringVar(value="C:")
         self.var_reset_network = tk.BooleanVar(value=False)
+        self.var_restore_point = tk.BooleanVar(value=False)
 
-        self.var_temp = tk.BooleanVar(value=True)
-        self.var_prefetch = tk.BooleanVar(value=False)
+        self.target_vars = {t.key: tk.BooleanVar(value=t.default) for t in CLEANUP_TARGETS}
+        self.target_widgets = {}
         self.var_recycle_bin = tk.BooleanVar(value=True)
         self.var_flush_dns = tk.BooleanVar(value=False)
         self.var_dism_component_cleanup = tk.BooleanVar(value=False)
-        self.var_wu_cache = tk.BooleanVar(value=False)
 
         self._all_option_vars = [
             self.var_dism_scan,
@@ -404,12 +453,11 @@ class App(tk.Tk):
             self.var_sfc,
             self.var_chkdsk,
             self.var_reset_network,
-            self.var_temp,
-            self.var_prefetch,
+            self.var_restore_point,
+            *self.target_vars.values(),
             self.var_recycle_bin,
             self.var_flush_dns,
             self.var_dism_component_cleanup,
-            self.var_wu_cache,
         ]
 
         self.var_step_text = tk.StringVar(value="Idle")
@@ -421,6 +469,7 @@ class App(tk.Tk):
 
         self.create_menu()
         self.create_ui()
+        self.bind_ui_texts()
         self.refresh_drive_list()
 
         self.var_chkdsk.trace_add("write", lambda *_: self.update_chkdsk_controls())
@@ -451,46 +500,44 @@ class App(tk.Tk):
         self.check_latest_app_version_async(show_if_latest=True)
 
     def check_latest_app_version_async(self, show_if_latest: bool = False):
+        if is_headless():
+            return
+
+        endpoint = update_endpoint(self.settings)
+
         def worker():
             try:
-                req = urllib.request.Request(GITHUB_API_LATEST, headers={"User-Agent": "Windows-Fixer"})
-                with urllib.request.urlopen(req, timeout=10) as r:
-                    data = json.loads(r.read().decode("utf-8", "replace"))
+                data = fetch_latest_release(endpoint, force=show_if_latest)
+                releases_page = str(data.get("html_url") or GITHUB_RELEASES_PAGE)
 
                 tag = str(data.get("tag_name") or data.get("name") or "").strip()
 
                 if tag and self._parse_ver_tuple(tag) > self._parse_ver_tuple(APP_VERSION):
                     def _ask():
-                        msg = (
-                            f"A newer version {tag} is available.\n\nOpen the releases page?"
-                            if self.lang == "en"
-                            else f"يوجد إصدار أحدث {tag}.\n\nفتح صفحة الإصدارات؟"
-                        )
-                        if messagebox.askyesno("Update" if self.lang == "en" else "تحديث", msg, parent=self):
-                            webbrowser.open(GITHUB_RELEASES_PAGE)
+                        msg = self.t("update_available").format(tag=tag)
+                        if messagebox.askyesno(self.t("update_title"), msg, parent=self):
+                            webbrowser.open(releases_page)
 
                     self.after(0, _ask)
                 else:
                     if show_if_latest:
                         def _info():
-                            msg = "You already have the latest version." if self.lang == "en" else "أنت تستخدم أحدث إصدار."
-                            messagebox.showinfo("Update" if self.lang == "en" else "تحديث", msg, parent=self)
+                            messagebox.showinfo(self.t("update_title"), self.t("update_latest"), parent=self)
                         self.after(0, _info)
 
             except Exception:
                 if show_if_latest:
                     def _err():
-                        msg = (
-                            "Could not check for updates. Please try again later."
-                            if self.lang == "en"
-                            else "تعذر التحقق من التحديثات. حاول لاحقاً."
-                        )
-                        messagebox.showwarning("Update" if self.lang == "en" else "تحديث", msg, parent=self)
+                        messagebox.showwarning(self.t("update_title"), self.t("update_failed"), parent=self)
                     self.after(0, _err)
 
         threading.Thread(target=worker, daemon=True).start()
 
     # ---------- Center ----------
+    def destroy(self):
+        self.settings.close()
+        super().destroy()
+
     def center_window(self):
         self.update_idletasks()
         w = self.winfo_width()
@@ -513,169 +560,134 @@ class App(tk.Tk):
 
         self.file_menu = tk.Menu(menubar, tearoff=0)
         self.file_menu.add_checkbutton(
-            label=("Always run as admin" if self.lang == "en" else "تشغيل دائم كمسؤول"),
             variable=self.var_always_admin,
             command=self.on_toggle_always_admin,
         )
+        self.bind_menu(self.file_menu, "menu_always_admin")
+        self.file_menu.add_checkbutton(
+            variable=self.var_background,
+            command=self.on_toggle_background,
+        )
+        self.bind_menu(self.file_menu, "background_mode")
         self.file_menu.add_separator()
 
+        # One entry per catalog found, so a dropped-in lang/<code>.json shows up here.
         self.lang_menu = tk.Menu(self.file_menu, tearoff=0)
         self.lang_var = tk.StringVar(value=self.lang)
-        self.lang_menu.add_radiobutton(label="English", value="en", variable=self.lang_var, command=self.on_change_language)
-        self.lang_menu.add_radiobutton(label="العربية", value="ar", variable=self.lang_var, command=self.on_change_language)
-        self.file_menu.add_cascade(label=("Language" if self.lang == "en" else "اللغة"), menu=self.lang_menu)
+        for code, name in self.catalog.languages().items():
+            self.lang_menu.add_radiobutton(label=name, value=code, variable=self.lang_var, command=self.on_change_language)
+        self.file_menu.add_cascade(menu=self.lang_menu)
+        self.bind_menu(self.file_menu, "menu_language")
 
         self.file_menu.add_separator()
-        self.file_menu.add_command(label=("About" if self.lang == "en" else "حول"), command=self.show_about)
+        self.file_menu.add_command(command=self.show_about)
+        self.bind_menu(self.file_menu, "menu_about")
         self.file_menu.add_separator()
-        self.file_menu.add_command(label=("Exit" if self.lang == "en" else "خروج"), command=self.destroy)
-
-        menubar.add_cascade(label=("File" if self.lang == "en" else "ملف"), menu=self.file_menu)
+        self.file_menu.add_command(command=self.destroy)
+        self.bind_menu(self.file_menu, "menu_exit")
+
+        menubar.add_cascade(menu=self.file_menu)
+        self.bind_menu(menubar, "menu_file")
+
+        self.tools_menu = tk.Menu(menubar, tearoff=0)
+        self.tools_menu.add_command(command=self.show_space_analysis)
+        self.bind_menu(self.tools_menu, "space_title", suffix="...")
+        self.tools_menu.add_command(command=self.show_diagnostics)
+        self.bind_menu(self.tools_menu, "diag_title", suffix="...")
+        self.tools_menu.add_command(command=self.open_last_report)
+        self.bind_menu(self.tools_menu, "report_open")
+        menubar.add_cascade(menu=self.tools_menu)
+        self.bind_menu(menubar, "menu_tools")
         self.config(menu=menubar)
 
     def on_toggle_always_admin(self):
         self.settings["always_admin"] = bool(self.var_always_admin.get())
-        save_settings(self.settings)
         if self.var_always_admin.get() and not is_admin():
+            self.settings.close()
             relaunch_as_admin()
 
+    def on_toggle_background(self):
+        self.settings["background"] = bool(self.var_background.get())
+
     def on_change_language(self):
         self.lang = self.lang_var.get()
+        self.strings = self.catalog.compile(self.lang)
         self.settings["language"] = self.lang
-        save_settings(self.settings)
-        self.create_menu()
         self.apply_language()
 
     # ---------- Language ----------
     def t(self, key: str) -> str:
-        en = {
-            "admin_yes": "Admin: YES",
-            "admin_no": "Admin: NO (recommended)",
-            "run_admin": "Run as Admin",
-            "choose_fix": "Choose what to fix",
-            "select_all": "Select All",
-            "repair": "Repair",
-            "cleanup": "Cleanup",
-            "progress": "Progress",
-            "log": "Log",
-            "start": "Start",
-            "skip": "Skip Step",
-            "cancel": "Cancel",
-            "clear_log": "Clear Log",
-            "drive": "Drive:",
-            "refresh": "Refresh",
-            "mode": "Mode:",
-            "scan_only": "Scan only",
-            "fix_f": "Fix errors (/f)",
-            "opt_dism_scan": "Check Windows Image Health (DISM ScanHealth)",
-            "desc_dism_scan": "Checks for corruption in the Windows image. Useful before RestoreHealth.",
-            "opt_dism_restore": "Repair Windows Image (DISM RestoreHealth)",
-            "desc_dism_restore": "Repairs corrupted Windows system image using Windows Update sources.",
-            "opt_sfc": "Repair System Files (SFC ScanNow)",
-            "desc_sfc": "Scans and repairs protected system files. Best after DISM.",
-            "opt_chkdsk": "Check Disk for errors (CHKDSK)",
-            "desc_chkdsk": "Scans the selected drive for file system errors. Fix mode may require reboot.",
-            "opt_reset_net": "Reset Network Stack (Winsock + TCP/IP)",
-            "desc_reset_net": "Fixes common network issues. May require reboot or reconnecting VPN/Wi-Fi.",
-            "opt_temp": "Clean Temporary Files",
-            "desc_temp": "Deletes files from user Temp and Windows Temp. Some locked files may be skipped.",
-            "opt_prefetch": "Clean Prefetch Files",
-            "desc_prefetch": "Cleans Prefetch cache. Windows will recreate it. Admin recommended.",
-            "opt_recycle": "Empty Recycle Bin",
-            "desc_recycle": "Clears deleted files from Recycle Bin to free space immediately.",
-            "opt_dns": "Flush DNS Cache",
-            "desc_dns": "Resets DNS cache (can help with some internet / browsing issues).",
-            "opt_comp": "Clean Windows Component Store (DISM StartComponentCleanup)",
-            "desc_comp": "Removes superseded Windows component versions. Safe but may take time.",
-            "opt_wu": "Fix Windows Update downloads (Clear Update Cache)",
-            "desc_wu": "Stops update services and clears old downloaded update files. Requires Admin.",
-        }
-        ar = {
-            "admin_yes": "المسؤول: نعم",
-            "admin_no": "المسؤول: لا (مُفضل)",
-            "run_admin": "تشغيل كمسؤول",
-            "choose_fix": "اختر عمليات الإصلاح",
-            "select_all": "تحديد الكل",
-            "repair": "إصلاح",
-            "cleanup": "تنظيف",
-            "progress": "التقدم",
-            "log": "السجل",
-            "start": "ابدأ",
-            "skip": "تخطي الخطوة",
-            "cancel": "إلغاء",
-            "clear_log": "مسح السجل",
-            "drive": "القرص:",
-            "refresh": "تحديث",
-            "mode": "الوضع:",
-            "scan_only": "فحص فقط",
-            "fix_f": "إصلاح الأخطاء (/f)",
-            "opt_dism_scan": "فحص سلامة صورة ويندوز (DISM ScanHealth)",
-            "desc_dism_scan": "يفحص وجود تلف في صورة النظام. مفيد قبل RestoreHealth.",
-            "opt_dism_restore": "إصلاح صورة النظام (DISM RestoreHealth)",
-            "desc_dism_restore": "يعالج تلف مكونات ويندوز بالاعتماد على مصادر Windows Update.",
-            "opt_sfc": "إصلاح ملفات النظام (SFC ScanNow)",
-            "desc_sfc": "يفحص ويصلح ملفات النظام المحمية. الأفضل تشغيله بعد DISM.",
-            "opt_chkdsk": "فحص القرص للأخطاء (CHKDSK)",
-            "desc_chkdsk": "يفحص نظام الملفات في القرص المحدد. وضع الإصلاح قد يتطلب إعادة تشغيل.",
-            "opt_reset_net": "إعادة ضبط الشبكة (Winsock + TCP/IP)",
-            "desc_reset_net": "يعالج مشاكل الشبكة الشائعة. قد يتطلب إعادة تشغيل أو إعادة الاتصال.",
-            "opt_temp": "تنظيف الملفات المؤقتة",
-            "desc_temp": "يحذف ملفات Temp للمستخدم و Windows Temp. قد يتم تخطي الملفات المقفلة.",
-            "opt_prefetch": "تنظيف ملفات Prefetch",
-            "desc_prefetch": "ينظف كاش Prefetch وسيقوم ويندوز بإعادة إنشائه. يفضل تشغيله كمسؤول.",
-            "opt_recycle": "تفريغ سلة المحذوفات",
-            "desc_recycle": "يحذف الملفات من سلة المحذوفات لتوفير مساحة فورًا.",
-            "opt_dns": "مسح كاش DNS",
-            "desc_dns": "يعيد ضبط ذاكرة DNS (قد يساعد في بعض مشاكل التصفح/الإنترنت).",
-            "opt_comp": "تنظيف مخزن مكونات ويندوز (DISM StartComponentCleanup)",
-            "desc_comp": "يزيل إصدارات المكونات القديمة (آمن لكنه قد يأخذ وقت).",
-            "opt_wu": "إصلاح تنزيلات تحديثات ويندوز (مسح كاش التحديث)",
-            "desc_wu": "يوقف خدمات التحديث ويمسح ملفات التحديث المحملة. يتطلب تشغيل كمسؤول.",
-        }
-        return (ar if self.lang == "ar" else en).get(key, key)
+        text = self.strings.get(key)
+        if text is None:
+            if self.catalog.note_missing(self.lang, key):
+                self.enqueue_log(f"[WARN] Missing translation: {key} ({self.lang})")
+            return key
+        return text
+
+    def bind_text(self, widget, key, option: str = "text"):
+        """Label ``widget`` with ``key`` now and on every language change.
+
+        ``key`` may be a callable returning the key, for state-dependent text.
+        """
+        self._i18n.append((widget.configure, option, key, ""))
+        return widget
+
+    def bind_menu(self, menu, key, suffix: str = ""):
+        """Bind the label of the entry just added to ``menu``."""
+        index = menu.index("end")
+        self._i18n.append((lambda i=index, m=menu, **kw: m.entryconfigure(i, **kw), "label", key, suffix))
 
     def apply_language(self):
-        self.lbl_admin.config(text=(self.t("admin_yes") if is_admin() else self.t("admin_no")))
-        self.btn_admin.config(text=self.t("run_admin"))
-        self.opts_group.config(text=self.t("choose_fix"))
-        self.cb_select_all.config(text=self.t("select_all"))
-        self.lbl_repair.config(text=self.t("repair"))
-        self.lbl_cleanup.config(text=self.t("cleanup"))
-        self.cb_dism_scan.config(text=self.t("opt_dism_scan"))
-        self.desc_dism_scan.config(text=self.t("desc_dism_scan"))
-        self.cb_dism_restore.config(text=self.t("opt_dism_restore"))
-        self.desc_dism_restore.config(text=self.t("desc_dism_restore"))
-        self.cb_sfc.config(text=self.t("opt_sfc"))
-        self.desc_sfc.config(text=self.t("desc_sfc"))
-        self.cb_chkdsk.config(text=self.t("opt_chkdsk"))
-        self.desc_chkdsk.config(text=self.t("desc_chkdsk"))
-        self.cb_reset_net.config(text=self.t("opt_reset_net"))
-        self.desc_reset_net.config(text=self.t("desc_reset_net"))
-        self.lbl_drive.config(text=self.t("drive"))
-        self.btn_drive_refresh.config(text=self.t("refresh"))
-        self.lbl_mode.config(text=self.t("mode"))
-        self.rb_scan.config(text=self.t("scan_only"))
-        self.rb_fix.config(text=self.t("fix_f"))
-        self.cb_temp.config(text=self.t("opt_temp"))
-        self.desc_temp.config(text=self.t("desc_temp"))
-        self.cb_prefetch.config(text=self.t("opt_prefetch"))
-        self.desc_prefetch.config(text=self.t("desc_prefetch"))
-        self.cb_recycle.config(text=self.t("opt_recycle"))
-        self.desc_recycle.config(text=self.t("desc_recycle"))
-        self.cb_dns.config(text=self.t("opt_dns"))
-        self.desc_dns.config(text=self.t("desc_dns"))
-        self.cb_comp.config(text=self.t("opt_comp"))
-        self.desc_comp.config(text=self.t("desc_comp"))
-        self.cb_wu.config(text=self.t("opt_wu"))
-        self.desc_wu.config(text=self.t("desc_wu"))
-        self.prog_group.config(text=self.t("progress"))
-        self.log_group.config(text=self.t("log"))
-        self.btn_start.config(text=self.t("start"))
-        self.btn_skip.config(text=self.t("skip"))
-        self.btn_cancel.config(text=self.t("cancel"))
-        self.btn_clear.config(text=self.t("clear_log"))
+        for configure, option, key, suffix in self._i18n:
+            configure(**{option: self.t(key() if callable(key) else key) + suffix})
         self.refresh_admin_ui()
 
+    def bind_ui_texts(self):
+        pairs = [
+            (self.lbl_admin, lambda: "admin_yes" if is_admin() else "admin_no"),
+            (self.btn_admin, "run_admin"),
+            (self.opts_group, "choose_fix"),
+            (self.cb_select_all, "select_all"),
+            (self.lbl_repair, "repair"),
+            (self.lbl_cleanup, "cleanup"),
+            (self.cb_dism_scan, "opt_dism_scan"),
+            (self.desc_dism_scan, "desc_dism_scan"),
+            (self.cb_dism_restore, "opt_dism_restore"),
+            (self.desc_dism_restore, "desc_dism_restore"),
+            (self.cb_sfc, "opt_sfc"),
+            (self.desc_sfc, "desc_sfc"),
+            (self.cb_chkdsk, "opt_chkdsk"),
+            (self.desc_chkdsk, "desc_chkdsk"),
+            (self.cb_reset_net, "opt_reset_net"),
+            (self.desc_reset_net, "desc_reset_net"),
+            (self.cb_restore_point, "opt_restore_point"),
+            (self.desc_restore_point, "desc_restore_point"),
+            (self.lbl_drive, "drive"),
+            (self.btn_drive_refresh, "refresh"),
+            (self.lbl_mode, "mode"),
+            (self.rb_scan, "scan_only"),
+            (self.rb_fix, "fix_f"),
+        ]
+        for t in CLEANUP_TARGETS:
+            cb, desc = self.target_widgets[t.key]
+            pairs += [(cb, t.label_key), (desc, t.desc_key)]
+        pairs += [
+            (self.cb_recycle, "opt_recycle"),
+            (self.desc_recycle, "desc_recycle"),
+            (self.cb_dns, "opt_dns"),
+            (self.desc_dns, "desc_dns"),
+            (self.cb_comp, "opt_comp"),
+            (self.desc_comp, "desc_comp"),
+            (self.prog_group, "progress"),
+            (self.log_group, "log"),
+            (self.btn_start, "start"),
+            (self.btn_skip, "skip"),
+            (self.btn_cancel, "cancel"),
+            (self.btn_clear, "clear_log"),
+        ]
+        for widget, key in pairs:
+            self.bind_text(widget, key)
+
     # ---------- Select All ----------
     def on_select_all_toggled(self):
         if self._select_all_guard:
@@ -760,16 +772,18 @@ class App(tk.Tk):
         self.rb_fix.pack(side="left", padx=8)
 
         self.cb_reset_net, self.desc_reset_net = add_option_with_desc(left, "", "", self.var_reset_network, wrap=640)
+        self.cb_restore_point, self.desc_restore_point = add_option_with_desc(
+            left, "", "", self.var_restore_point, wrap=640
+        )
 
         self.lbl_cleanup = ttk.Label(right, text="", font=("Segoe UI", 10, "bold"))
         self.lbl_cleanup.pack(anchor="w")
 
-        self.cb_temp, self.desc_temp = add_option_with_desc(right, "", "", self.var_temp, wrap=520)
-        self.cb_prefetch, self.desc_prefetch = add_option_with_desc(right, "", "", self.var_prefetch, wrap=520)
+        for t in CLEANUP_TARGETS:
+            self.target_widgets[t.key] = add_option_with_desc(right, "", "", self.target_vars[t.key], wrap=520)
         self.cb_recycle, self.desc_recycle = add_option_with_desc(right, "", "", self.var_recycle_bin, wrap=520)
         self.cb_dns, self.desc_dns = add_option_with_desc(right, "", "", self.var_flush_dns, wrap=520)
         self.cb_comp, self.desc_comp = add_option_with_desc(right, "", "", self.var_dism_component_cleanup, wrap=520)
-        self.cb_wu, self.desc_wu = add_option_with_desc(right, "", "", self.var_wu_cache, wrap=520)
 
         self.opts_group.grid_columnconfigure(0, weight=1)
         self.opts_group.grid_columnconfigure(1, weight=1)
@@ -798,12 +812,9 @@ class App(tk.Tk):
         self.log_group = ttk.LabelFrame(self, text="", padding=8)
         self.log_group.pack(fill="both", expand=True, padx=12, pady=10)
 
-        self.txt = tk.Text(self.log_group, wrap="word")
-        self.txt.pack(side="left", fill="both", expand=True)
-
-        sb = ttk.Scrollbar(self.log_group, orient="vertical", command=self.txt.yview)
-        sb.pack(side="right", fill="y")
-        self.txt.config(yscrollcommand=sb.set)
+        self.log_view = LogView(self.log_group)
+        self.log_view.pack(fill="both", expand=True)
+        self.bind_menu(self.log_view.menu, "log_copy_all")
 
     def refresh_admin_ui(self):
         self.btn_admin.config(state="disabled" if is_admin() else "normal")
@@ -823,20 +834,53 @@ class App(tk.Tk):
 
     # ---------- log ----------
     def enqueue_log(self, msg: str):
-        self.log_queue.put(msg)
+        self.engine.bus.publish(log_line(msg))
 
     def flush_log_queue(self):
-        try:
-            while True:
-                msg = self.log_queue.get_nowait()
-                self.txt.insert("end", msg + "\n")
-                self.txt.see("end")
-        except queue.Empty:
-            pass
+        prof = PROFILER.active()
+        if prof:
+            t0 = time.perf_counter()
+            prof.gauge("log.queue_depth", self.events.pending())
+        batch = []
+        for ev in self.events.drain():
+            kind = type(ev)
+            if kind is LogLine:
+                batch.append((ev.text, SEV_BY_LEVEL.get(ev.level, SEV_PLAIN)))
+            elif kind is OutputChunk:
+                batch.extend((line, SEV_PLAIN) for line in ev.lines)
+            elif kind is WarningLogged:
+                self.run_warnings += 1
+                batch.append((ev.text, SEV_BY_LEVEL[ev.level]))
+            elif kind is StepStarted:
+                self.set_progress(ev.index, ev.total, ev.name)
+            elif kind is Progress:
+                if ev.step == self.step_name:
+                    self.progress["value"] = int((self.step_index - 1 + ev.fraction) * 100 / self.total_steps)
+            elif kind is StepFinished:
+                if ev.index == self.step_index and self.total_steps:
+                    self.progress["value"] = int(ev.index * 100 / self.total_steps)
+            elif kind is BytesFreed:
+                self.run_freed += ev.freed
+                if self.step_name:
+                    self.var_step_text.set(
+                        f"Step {self.step_index}/{self.total_steps}: {self.step_name} "
+                        f"({format_bytes(self.run_freed)} freed)"
+                    )
+            elif kind is RunFinished:
+                self.finish_progress(ev.status)
+            elif kind is Dropped:
+                batch.append((f"[WARN] {ev.count} log line(s) dropped (output fell behind).", SEV_WARN))
+                if prof:
+                    prof.count("log.dropped", ev.count)
+        if batch:
+            self.log_view.append_many(batch)
+        if prof:
+            prof.count("log.lines", len(batch))
+            prof.record("ui.tick", time.perf_counter() - t0)
         self.after(80, self.flush_log_queue)
 
     def on_clear(self):
-        self.txt.delete("1.0", "end")
+        self.log_view.clear()
 
     # ---------- run/cancel/skip ----------
     def set_running(self, running: bool):
@@ -849,6 +893,7 @@ class App(tk.Tk):
 
     def on_run_as_admin(self):
         if not is_admin():
+            self.settings.close()
             relaunch_as_admin()
 
     def on_skip(self):
@@ -859,197 +904,257 @@ class App(tk.Tk):
         if self.running:
             self.runner.request_cancel_all()
 
-    def should_abort_now(self):
-        return self.runner.cancel_all_requested() or self.runner.skip_requested()
-
-    def run_command_step(self, cmd):
-        self.runner.reset_flags_for_step()
-        return self.runner.run_cmd(cmd)
-
     # ---------- steps ----------
+    def current_profile(self) -> dict:
+        return {
+            "targets": [t.key for t in CLEANUP_TARGETS if self.target_vars[t.key].get()],
+            "recycle_bin": bool(self.var_recycle_bin.get()),
+            "flush_dns": bool(self.var_flush_dns.get()),
+            "component_cleanup": bool(self.var_dism_component_cleanup.get()),
+            "dism_scan": bool(self.var_dism_scan.get()),
+            "dism_restore": bool(self.var_dism_restore.get()),
+            "sfc": bool(self.var_sfc.get()),
+            "chkdsk": bool(self.var_chkdsk.get()),
+            "chkdsk_drive": self.var_drive.get(),
+            "chkdsk_mode": self.var_chkdsk_mode.get(),
+            "reset_network": bool(self.var_reset_network.get()),
+            "restore_point": bool(self.var_restore_point.get()),
+            "restore_point_required": bool(self.settings.get("restore_point_required", False)),
+            "native_delete": bool(self.settings.get("native_delete", False)),
+            "preflight": bool(self.settings.get("preflight", True)),
+            "auto_adjust": bool(self.settings.get("auto_adjust", True)),
+            "auto_clean_temp": bool(self.settings.get("auto_clean_temp", False)),
+            "background": bool(self.var_background.get()),
+            # tuning knobs only set in settings.json
+            **{
+                k: self.settings.get(k, DEFAULT_PROFILE[k])
+                for k in DEFAULT_PROFILE
+                if k.startswith(("bg_", "net_", "component_", "health_")) and k != "component_cleanup"
+            },
+        }
+
     def build_steps(self):
-        steps = []
-        if self.var_temp.get() or self.var_prefetch.get():
-            steps.append(("Cleanup (Temp/Prefetch)", self.step_temp_prefetch))
-        if self.var_recycle_bin.get():
-            steps.append(("Empty Recycle Bin", self.step_clear_recycle))
-        if self.var_flush_dns.get():
-            steps.append(("Flush DNS Cache", self.step_flush_dns))
-        if self.var_dism_component_cleanup.get():
-            steps.append(("DISM Component Cleanup", self.step_dism_component_cleanup))
-        if self.var_wu_cache.get():
-            steps.append(("Clear Windows Update Cache", self.step_wu_cache))
-
-        if self.var_dism_scan.get():
-            steps.append(("DISM ScanHealth", self.step_dism_scanhealth))
-        if self.var_dism_restore.get():
-            steps.append(("DISM RestoreHealth", self.step_dism_restorehealth))
-        if self.var_sfc.get():
-            steps.append(("SFC ScanNow", self.step_sfc))
-        if self.var_chkdsk.get():
-            drive = self.var_drive.get().strip().upper()
-            mode = self.var_chkdsk_mode.get()
-            steps.append((f"CHKDSK ({drive}, {mode})", self.step_chkdsk))
-        if self.var_reset_network.get():
-            steps.append(("Reset Network Stack", self.step_reset_network))
-
-        return steps
+        return self.engine.build_steps(self.current_profile())
 
     def on_start(self):
         if self.running:
             return
 
-        self.runner.reset_all()
-
         steps = self.build_steps()
         if not steps:
             messagebox.showwarning(
-                "Nothing selected" if self.lang == "en" else "لا يوجد اختيار",
-                "Select at least one task." if self.lang == "en" else "اختر عملية واحدة على الأقل.",
+                self.t("nothing_selected_title"),
+                self.t("nothing_selected"),
                 parent=self,
             )
             return
 
         self.total_steps = len(steps)
+        self.run_freed = self.run_warnings = 0
         self.progress["value"] = 0
         self.var_step_text.set("Starting...")
 
         self.set_running(True)
-        self.enqueue_log(f"--- Windows Fixer {APP_VERSION} ---")
-        self.enqueue_log("Starting...")
-
         self.worker_thread = threading.Thread(target=self.worker, args=(steps,), daemon=True)
         self.worker_thread.start()
 
-    def set_progress(self, step_index: int, step_name: str):
-        pct = 0 if self.total_steps <= 0 else int((step_index / self.total_steps) * 100)
-
-        def _ui():
-            self.var_step_text.set(f"Step {step_index}/{self.total_steps}: {step_name}")
-            self.progress["value"] = pct
-
-        self.after(0, _ui)
-
-    def finish_progress(self, msg="Done"):
-        def _ui():
-            self.var_step_text.set(msg)
-            self.progress["value"] = 100
-
-        self.after(0, _ui)
-
-    # ----- step implementations -----
-    def step_temp_prefetch(self):
-        self.runner.reset_flags_for_step()
-        delete_temp_folders(self.var_prefetch.get(), self.enqueue_log, self.should_abort_now)
-        if self.runner.cancel_all_requested():
-            return "cancel"
-        if self.runner.skip_requested():
-            return "skip"
-        return "ok"
-
-    def step_clear_recycle(self):
-        self.runner.reset_flags_for_step()
-        clear_recycle_bin(self.enqueue_log)
-        return "ok"
+    def set_progress(self, step_index: int, total: int, step_name: str):
+        self.total_steps = total
+        self.step_index, self.step_name = step_index, step_name
+        self.var_step_text.set(f"Step {step_index}/{total}: {step_name}")
+        self.progress["value"] = 0 if total <= 0 else int((step_index - 1) * 100 / total)
+
+    def finish_progress(self, status: str):
+        self.step_index = self.step_name = None
+        note = []
+        if self.run_freed:
+            note.append(f"{format_bytes(self.run_freed)} freed")
+        if self.run_warnings:
+            note.append(f"{self.run_warnings} warning(s)")
+        note = f" ({', '.join(note)})" if note else ""
+        if status == "cancel":
+            self.var_step_text.set("Cancelled" + note)
+        elif status == "ok":
+            self.var_step_text.set("Done" + note)
+            # ✅ FIX: play sound on main UI thread (not worker thread)
+            self.after(200, lambda: play_success_sound(self.enqueue_log))
+        else:
+            return
+        self.progress["value"] = 100
 
-    def step_flush_dns(self):
-        return self.run_command_step(["ipconfig", "/flushdns"])
+    def selected_targets(self):
+        return [t for t in CLEANUP_TARGETS if self.target_vars[t.key].get()]
 
-    def step_dism_component_cleanup(self):
-        return self.run_command_step(["DISM", "/Online", "/Cleanup-Image", "/StartComponentCleanup"])
+    def worker(self, steps):
+        try:
+            # Step, progress and end-of-run updates arrive as events in flush_log_queue.
+            self.engine.run(steps)
+        finally:
+            self.after(0, lambda: self.set_running(False))
 
-    def step_wu_cache(self):
-        self.runner.reset_flags_for_step()
-        if not is_admin():
-            self.enqueue_log("[WARN] Windows Update cache cleanup needs Admin. Skipping.")
-            return "ok"
+    # ---------- Diagnostics ----------
+    def on_toggle_instrumentation(self):
+        PROFILER.enabled = bool(self.var_instrumentation.get())
+        if PROFILER.enabled:
+            PROFILER.reset()
+        self.settings["instrumentation"] = PROFILER.enabled
+
+    def open_last_report(self):
+        path = self.engine.last_report["html"] if self.engine.last_report else None
+        if not path:
+            found = sorted(glob.glob(os.path.join(app_data_path("journal"), "run-*.html")))
+            path = found[-1] if found else None
+        if not path or not os.path.exists(path):
+            messagebox.showinfo(self.t("report_open"), self.t("report_none"), parent=self)
+            return
+        webbrowser.open(path)
 
-        r = self.run_command_step(["net", "stop", "wuauserv"])
-        if r in ("cancel", "skip"):
-            return r
-        r = self.run_command_step(["net", "stop", "bits"])
-        if r in ("cancel", "skip"):
-            return r
+    def show_diagnostics(self):
+        win = tk.Toplevel(self)
+        win.title(self.t("diag_title"))
+        win.geometry("640x520")
+        apply_icon_to_tlv(win, self.icon_path)
 
-        windir = os.environ.get("WINDIR", r"C:\Windows")
-        dl = os.path.join(windir, "SoftwareDistribution", "Download")
-        self.enqueue_log(f"[INFO] Cleaning: {dl}")
+        frame = ttk.Frame(win, padding=12)
+        frame.pack(fill="both", expand=True)
 
-        try:
-            if os.path.exists(dl):
-                for name in os.listdir(dl):
-                    if self.should_abort_now():
-                        return "skip" if self.runner.skip_requested() else "cancel"
-                    safe_rmtree(os.path.join(dl, name), self.enqueue_log)
-                self.enqueue_log("[OK] Windows Update download cache cleaned.")
+        row = ttk.Frame(frame)
+        row.pack(fill="x")
+        ttk.Checkbutton(
+            row, text=self.t("diag_enable"), variable=self.var_instrumentation, command=self.on_toggle_instrumentation
+        ).pack(side="left")
+        ttk.Button(row, text=self.t("diag_reset"), command=PROFILER.reset).pack(side="right")
+
+        txt = tk.Text(frame, wrap="none", font=("Consolas", 9))
+        txt.pack(fill="both", expand=True, pady=(8, 0))
+
+        def _render():
+            if not win.winfo_exists():
+                return
+            if PROFILER.enabled:
+                snap = PROFILER.snapshot()
+                snap["gauges"]["log.queue_depth_now"] = self.events.pending()
+                body = json.dumps(snap, indent=2)
             else:
-                self.enqueue_log("[INFO] Cache folder not found; skip.")
-        except Exception as e:
-            self.enqueue_log(f"[WARN] Could not clean Windows Update cache: {e}")
-
-        r = self.run_command_step(["net", "start", "bits"])
-        if r in ("cancel", "skip"):
-            return r
-        return self.run_command_step(["net", "start", "wuauserv"])
-
-    def step_dism_scanhealth(self):
-        return self.run_command_step(["DISM", "/Online", "/Cleanup-Image", "/ScanHealth"])
-
-    def step_dism_restorehealth(self):
-        return self.run_command_step(["DISM", "/Online", "/Cleanup-Image", "/RestoreHealth"])
-
-    def step_sfc(self):
-        return self.run_command_step(["sfc", "/scannow"])
-
-    def step_chkdsk(self):
-        drive = self.var_drive.get().strip().upper()
-        mode = self.var_chkdsk_mode.get()
-        if mode == "scan":
-            return self.run_command_step(["chkdsk", drive])
-        self.enqueue_log("[INFO] Fix mode may require restart (Windows may ask to schedule it).")
-        return self.run_command_step(["cmd", "/c", f"chkdsk {drive} /f"])
-
-    def step_reset_network(self):
-        r = self.run_command_step(["netsh", "winsock", "reset"])
-        if r in ("cancel", "skip"):
-            return r
-        return self.run_command_step(["netsh", "int", "ip", "reset"])
-
-    def worker(self, steps):
-        try:
-            for idx, (name, fn) in enumerate(steps, start=1):
-                if self.runner.cancel_all_requested():
-                    self.enqueue_log("[INFO] Cancelled. Stopping all steps.")
-                    self.finish_progress("Cancelled")
-                    return
+                body = self.t("diag_off")
+            txt.delete("1.0", "end")
+            txt.insert("end", body)
+            win.after(500, _render)
 
-                self.set_progress(idx, name)
-                result = fn()
-
-                if result == "cancel":
-                    self.enqueue_log("[INFO] Cancelled. Stopping all steps.")
-                    self.finish_progress("Cancelled")
-                    return
+        _render()
+        self.center_child(win)
 
-                if result == "skip":
-                    self.enqueue_log(f"[INFO] Step skipped: {name}")
-                    continue
+    # ---------- Space analysis ----------
+    def default_space_roots(self):
+        roots = []
+        for t in self.selected_targets():
+            roots.extend(p for p in expand_target_paths(t) if os.path.isdir(p))
+        return roots or [d + "\\" for d in list_drives()[:1]]
 
-            self.finish_progress("Done")
-            self.enqueue_log("All selected tasks finished.")
+    def show_space_analysis(self):
+        win = tk.Toplevel(self)
+        win.title(self.t("space_title"))
+        win.geometry("860x560")
+        apply_icon_to_tlv(win, self.icon_path)
 
-            # ✅ FIX: play sound on main UI thread (not worker thread)
-            self.after(200, lambda: play_success_sound(self.enqueue_log))
+        frame = ttk.Frame(win, padding=12)
+        frame.pack(fill="both", expand=True)
 
-        except Exception as e:
-            self.enqueue_log(f"[ERROR] {e}")
-        finally:
-            self.after(0, lambda: self.set_running(False))
+        row = ttk.Frame(frame)
+        row.pack(fill="x")
+        ttk.Label(row, text=self.t("space_paths")).pack(side="left")
+        var_paths = tk.StringVar(value=";".join(self.default_space_roots()))
+        ttk.Entry(row, textvariable=var_paths).pack(side="left", fill="x", expand=True, padx=6)
+        btn_scan = ttk.Button(row, text=self.t("space_scan"))
+        btn_scan.pack(side="left")
+
+        var_status = tk.StringVar(value="")
+        ttk.Label(frame, textvariable=var_status).pack(anchor="w", pady=6)
+
+        body = ttk.Frame(frame)
+        body.pack(fill="both", expand=True)
+        view = ttk.Treeview(body, columns=("size", "files", "share"))
+        view.heading("#0", text=self.t("space_col_name"))
+        view.heading("size", text=self.t("space_col_size"))
+        view.heading("files", text=self.t("space_col_files"))
+        view.heading("share", text=self.t("space_col_share"))
+        view.column("#0", width=480)
+        for col in ("size", "files", "share"):
+            view.column(col, width=100, anchor="e")
+        view.pack(side="left", fill="both", expand=True)
+        sb = ttk.Scrollbar(body, orient="vertical", command=view.yview)
+        sb.pack(side="right", fill="y")
+        view.config(yscrollcommand=sb.set)
+
+        state = {"tree": None}
+
+        def _insert_children(parent_iid, idx):
+            tree = state["tree"]
+            whole = max(1, tree.total_bytes[idx])
+            for child in tree.top_children(idx, 25):
+                iid = str(child)
+                view.insert(
+                    parent_iid,
+                    "end",
+                    iid=iid,
+                    text=tree.names[child],
+                    values=(
+                        format_bytes(tree.total_bytes[child]),
+                        f"{tree.total_files[child]:,}",
+                        f"{tree.total_bytes[child] * 100 / whole:.1f}%",
+                    ),
+                )
+                if tree.child_count[child]:
+                    view.insert(iid, "end", iid=f"{iid}:stub")
+
+        def _on_open(_e=None):
+            iid = view.focus()
+            stub = f"{iid}:stub"
+            if state["tree"] is not None and view.exists(stub):
+                view.delete(stub)
+                _insert_children(iid, int(iid))
+
+        view.bind("<<TreeviewOpen>>", _on_open)
+
+        def _show(tree, secs):
+            if not win.winfo_exists():
+                return
+            state["tree"] = tree
+            view.delete(*view.get_children())
+            total = sum(tree.total_bytes[r] for r in tree.roots)
+            files = sum(tree.total_files[r] for r in tree.roots)
+            for r in tree.roots:
+                iid = str(r)
+                view.insert("", "end", iid=iid, text=tree.names[r], open=True, values=(
+                    format_bytes(tree.total_bytes[r]), f"{tree.total_files[r]:,}", ""
+                ))
+                _insert_children(iid, r)
+            var_status.set(self.t("space_done").format(
+                size=format_bytes(total), files=f"{files:,}", dirs=f"{len(tree):,}", secs=secs
+            ))
+            btn_scan.config(state="normal")
+
+        def _progress(n, _path):
+            self.after(0, lambda: win.winfo_exists() and var_status.set(self.t("space_scanning").format(n=f"{n:,}")))
+
+        def _scan():
+            roots = [p.strip() for p in var_paths.get().split(";") if p.strip()]
+            btn_scan.config(state="disabled")
+
+            def _work():
+                t0 = time.perf_counter()
+                tree = scan_space(roots, cache=self.space_cache, progress_cb=_progress)
+                self.after(0, lambda: _show(tree, time.perf_counter() - t0))
+
+            threading.Thread(target=_work, daemon=True).start()
+
+        btn_scan.config(command=_scan)
+        self.center_child(win)
 
     # ---------- About ----------
     def show_about(self):
         win = tk.Toplevel(self)
-        win.title("About" if self.lang == "en" else "حول")
+        win.title(self.t("about_title"))
         win.resizable(False, False)
         apply_icon_to_tlv(win, self.icon_path)
 
@@ -1057,11 +1162,7 @@ class App(tk.Tk):
         frame.pack(fill="both", expand=True)
 
         title = "Windows Fixer"
-        sub = (
-            "is a freeware Windows repair & cleanup tool.\nRuns SFC, DISM, CHKDSK and safe cleanup tasks."
-            if self.lang == "en"
-            else "أداة مجانية لإصلاح وتنظيف ويندوز.\nتشغل SFC و DISM و CHKDSK مع عمليات تنظيف آمنة."
-        )
+        sub = self.t("about_sub")
 
         tk.Label(frame, text=title, font=("Segoe UI", 14, "bold")).pack(pady=(0, 4))
         tk.Label(frame, text=sub, wraplength=520, justify="center").pack(pady=(0, 8))
@@ -1078,7 +1179,7 @@ class App(tk.Tk):
 
         link_row = ttk.Frame(frame)
         link_row.pack(pady=(8, 0))
-        tk.Label(link_row, text=("Info and Latest Updates at " if self.lang == "en" else "المعلومات وآخر التحديثات: ")).pack(
+        tk.Label(link_row, text=self.t("about_info")).pack(
             side="left"
         )
         link = tk.Label(
@@ -1095,8 +1196,8 @@ class App(tk.Tk):
         win._don = donate_img
         tk.Button(
             frame,
-            image=donate_img,
-            text=("Donate" if self.lang == "en" else "تبرع"),
+            image=donate_img or "",
+            text=self.t("about_donate"),
             compound="center",
             font=("Segoe UI", 11, "bold"),
             fg="#0f3462",
@@ -1108,11 +1209,17 @@ class App(tk.Tk):
             command=lambda: webbrowser.open(DONATE_PAGE),
         ).pack(pady=(12, 0))
 
-        ttk.Button(frame, text=("Close" if self.lang == "en" else "إغلاق"), command=win.destroy).pack(pady=(10, 0))
+        ttk.Button(frame, text=self.t("close"), command=win.destroy).pack(pady=(10, 0))
         self.center_child(win)
 
 
-if __name__ == "__main__":
+# ---------- Command line ----------
+def main(argv=None):
+    args = parse_args(argv)
+    rc = run_cli(args)
+    if rc is not None:
+        return rc
+
     try:
         ctypes.windll.shcore.SetProcessDpiAwareness(1)
     except Exception:
@@ -1123,3 +1230,8 @@ if __name__ == "__main__":
         relaunch_as_admin()
 
     App().mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())